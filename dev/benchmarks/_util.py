@@ -0,0 +1,106 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helper functions shared by the benchmark scripts.
+"""
+
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from repoguard.core import process
+
+
+def measure(function, repeat=3):
+    """
+    Runs the given function several times and returns the best run time.
+
+    :param function: Function without arguments that has to be measured.
+    :type function: callable
+
+    :param repeat: Number of runs.
+    :type repeat: int
+
+    :return: The fastest run time in seconds.
+    :rtype: float
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        function()
+        duration = time.time() - start
+        if best is None or duration < best:
+            best = duration
+    return best
+
+def report(title, rows):
+    """
+    Prints the given (label, seconds) rows as a simple table.
+    """
+
+    print title
+    print "-" * len(title)
+    for label, seconds in rows:
+        print "%-40s %10.1f ms" % (label, seconds * 1000)
+    print
+
+def create_repository(root, files, properties=None):
+    """
+    Creates a local repository under root and commits the given files
+    in revision 1 using the svn command line client.
+
+    :param root: Directory in which the repository and working copy are created.
+    :type root: string
+
+    :param files: Mapping of repository paths to file contents.
+    :type files: dict
+
+    :param properties: Mapping of repository paths to property dictionaries.
+    :type properties: dict
+
+    :return: The path to the repository.
+    :rtype: string
+    """
+
+    repos_path = os.path.join(root, "repos")
+    working_copy = os.path.join(root, "wc")
+    url = "file://" + os.path.abspath(repos_path).replace(os.sep, "/")
+    process.execute('svnadmin create "%s"' % repos_path)
+    process.execute('svn checkout -q "%s" "%s"' % (url, working_copy))
+    for path, content in files.iteritems():
+        path = os.path.join(working_copy, path)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        file_object = open(path, "wb")
+        try:
+            file_object.write(content)
+        finally:
+            file_object.close()
+
+    cwd = os.getcwd()
+    os.chdir(working_copy)
+    try:
+        process.execute("svn add -q --force .")
+        for path, props in (properties or {}).iteritems():
+            for name, value in props.iteritems():
+                process.execute('svn propset -q %s "%s" "%s"' % (name, value, path))
+        process.execute('svn commit -q -m "Benchmark import"')
+    finally:
+        os.chdir(cwd)
+    return repos_path
@@ -0,0 +1,94 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Measures the ASCIIEncoded scanner on files from 1 KB to 100 MB. The
+previous line by line implementation is only measured for the small files.
+
+Usage: python dev/benchmarks/asciiencoded.py [number_of_runs]
+"""
+
+
+import os
+import shutil
+import string
+import sys
+import tempfile
+
+import _util
+
+from repoguard.checks.asciiencoded import ASCIIEncoded
+
+
+_SIZES = [
+    ("1 KB", 1024), ("1 MB", 1024 ** 2), ("10 MB", 10 * 1024 ** 2), ("100 MB", 100 * 1024 ** 2)
+]
+_LEGACY_LIMIT = 1024 ** 2
+_LINE = "    value = compute(value, 'some text') # comment\n"
+
+
+def _legacy_check(path, include, exclude):
+    result = list()
+    row = 1
+    include = string.printable + include
+    file_object = open(path, 'r')
+    try:
+        for line in file_object.readlines():
+            col = 1
+            for letter in line:
+                if not letter in include or letter in exclude:
+                    result.append((row, col, line))
+                col += 1
+            row += 1
+    finally:
+        file_object.close()
+    return result
+
+def _create_file(path, size, letter=None):
+    file_object = open(path, "wb")
+    try:
+        chunk = _LINE * (1024 * 1024 / len(_LINE))
+        written = 0
+        while written < size:
+            data = chunk[:size - written]
+            if letter and written == 0:
+                data = data[:len(data) / 2] + letter + data[len(data) / 2 + 1:]
+            file_object.write(data)
+            written += len(data)
+    finally:
+        file_object.close()
+
+def main(repeat=3):
+    root = tempfile.mkdtemp()
+    try:
+        for content, letter in [("ASCII only", None), ("one unexpected letter", "\xe4")]:
+            rows = []
+            for label, size in _SIZES:
+                path = os.path.join(root, "file.txt")
+                _create_file(path, size, letter)
+                rows.append(("%s, scanner" % label, _util.measure(
+                    lambda: ASCIIEncoded.ascii_check(path, "", ""), repeat
+                )))
+                if size <= _LEGACY_LIMIT:
+                    rows.append(("%s, line by line" % label, _util.measure(
+                        lambda: _legacy_check(path, "", ""), repeat
+                    )))
+            _util.report("ASCIIEncoded, %s (best of %d runs)" % (content, repeat), rows)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
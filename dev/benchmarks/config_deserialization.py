@@ -0,0 +1,70 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Compares the deserialization of a check configuration with the compiled
+serializer plans, with plans that are rebuilt for every call and with
+the per-run section cache of the modules.
+
+Usage: python dev/benchmarks/config_deserialization.py [number_of_calls] [number_of_runs]
+"""
+
+
+import sys
+
+import _util
+
+from configobj import ConfigObj
+
+from repoguard.checks.keywords import Keywords
+from repoguard.core.module import ConfigSerializer
+
+
+_CONFIG = """
+check_files = .*\.java, .*\.py
+ignore_files = .*/generated/.*,
+keywords = Date, Revision, Author, Id
+"""
+
+
+def _rebuilt_plans(serializer, config, count):
+    for _ in range(count):
+        ConfigSerializer._plans.clear()
+        serializer.from_config(config)
+
+def _compiled_plans(serializer, config, count):
+    for _ in range(count):
+        serializer.from_config(config)
+
+def _cached_sections(module, config, count):
+    for _ in range(count):
+        module.deserialize(config)
+
+def main(count=1000, repeat=3):
+    config = ConfigObj(_CONFIG.splitlines())
+    serializer = Keywords.__config__
+    module = Keywords(None)
+    _util.report("%d deserializations (best of %d runs)" % (count, repeat), [
+        ("plans rebuilt per call", _util.measure(
+            lambda: _rebuilt_plans(serializer, config, count), repeat)),
+        ("compiled plans", _util.measure(
+            lambda: _compiled_plans(serializer, config, count), repeat)),
+        ("cached sections", _util.measure(
+            lambda: _cached_sections(module, config, count), repeat))
+    ])
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,116 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Compares the parse times of the configuration files with ConfigObj and
+with the fast RepoGuard configuration parser.
+
+Usage: python dev/benchmarks/config_parser.py [number_of_runs]
+"""
+
+
+import os
+import shutil
+import sys
+import tempfile
+
+import _util
+
+from configobj import ConfigObj
+import mock
+
+from repoguard.core import parser
+from repoguard.core.config import ProjectConfig
+
+
+_CFG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "cfg")
+_FILES = [
+    os.path.join(_CFG, "repoguard.conf"),
+    os.path.join(_CFG, "logger.conf"),
+    os.path.join(_CFG, "templates", "default.tpl.conf"),
+    os.path.join(_CFG, "templates", "python.tpl.conf")
+]
+_PROFILE = """
+    [[profile%(index)d]]
+        regex = ^project%(index)d/
+        [[[precommit]]]
+        default = delayonerror
+        checks = Keywords.default, RejectTabs, ASCIIEncoded
+        success = ,
+        error = File.default,
+        [[[postcommit]]]
+        checks = Checkout.default,
+        success = File.default,
+        error = ,
+"""
+_SECTIONS = """
+[checks]
+    [[Keywords]]
+        [[[default]]]
+        keywords = Id, Date, Revision
+    [[Checkout]]
+        [[[default]]]
+        entries = entry1,
+        entries.entry1.source = ${hooks}/template.txt
+        entries.entry1.destination = .
+[handlers]
+    [[File]]
+        [[[default]]]
+        file = ${hooks}/repoguard.log
+"""
+
+
+def _parse_files(read):
+    for path in _FILES:
+        ConfigObj(read(path), encoding="UTF-8", interpolation="template")
+
+def _load_project(path, template_dirs, read):
+    with mock.patch.object(parser, "read", side_effect=read):
+        ProjectConfig(path, os.path.dirname(path), template_dirs)
+
+def main(repeat=200):
+    root = tempfile.mkdtemp()
+    try:
+        path = os.path.join(root, "repoguard.conf")
+        file_object = open(path, "wb")
+        try:
+            file_object.write("extends = python\n[profiles]\n")
+            for index in range(50):
+                file_object.write(_PROFILE % {"index" : index})
+            file_object.write(_SECTIONS)
+        finally:
+            file_object.close()
+        template_dirs = [os.path.join(_CFG, "templates")]
+
+        configobj = lambda infile: infile
+        _util.report("Parse time of the shipped configuration files (best of %d runs)" % repeat, [
+            ("ConfigObj", _util.measure(lambda: _parse_files(configobj), repeat)),
+            ("fast parser", _util.measure(lambda: _parse_files(parser.read), repeat))
+        ])
+        _util.report("Load time of a project configuration with 50 profiles "
+                     "(best of %d runs)" % repeat, [
+            ("ConfigObj", _util.measure(
+                lambda: _load_project(path, template_dirs, configobj), repeat
+            )),
+            ("fast parser", _util.measure(
+                lambda: _load_project(path, template_dirs, parser.read), repeat
+            ))
+        ])
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,87 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares the post-commit latency of the repoguard command with the live
+project configuration and with a compiled execution plan.
+
+Requires an installed RepoGuard, because the checks are entry points.
+
+Usage: python dev/benchmarks/execution_plan.py [number_of_runs]
+"""
+
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import _util
+
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+_CONFIG = """vcs = svn
+[profiles]
+    [[default]]
+        [[[postcommit]]]
+            checks = RejectTabs, ASCIIEncoded, Keywords.default
+            success = ,
+            error = ,
+    [[java]]
+        regex = ^src/
+        [[[postcommit]]]
+            checks = CaseInsensitiveFilenameClash, RejectTabs
+            success = ,
+            error = ,
+[checks]
+    [[Keywords]]
+        [[[default]]]
+            keywords = Id, Date
+"""
+
+
+def _call(command, environment):
+    if subprocess.call(command, env=environment) != 0:
+        raise RuntimeError("%s failed." % " ".join(command))
+
+def main(repeat=5):
+    root = tempfile.mkdtemp()
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.path.join(_ROOT, "src")
+    try:
+        files = dict(("src/File%d.java" % i, "class File%d {\n}\n" % i) for i in range(50))
+        repos_path = _util.create_repository(root, files)
+        config_path = os.path.join(repos_path, "hooks", "repoguard.conf")
+        file_object = open(config_path, "wb")
+        try:
+            file_object.write(_CONFIG)
+        finally:
+            file_object.close()
+
+        hook = [sys.executable, "-m", "repoguard.main", "postcommit", repos_path, "1"]
+        rows = [("live configuration", _util.measure(
+            lambda: _call(hook, environment), repeat
+        ))]
+        _call([sys.executable, "-m", "repoguard.main", "compile", config_path], environment)
+        rows.append(("compiled execution plan", _util.measure(
+            lambda: _call(hook, environment), repeat
+        )))
+        _util.report("Post-commit latency (best of %d runs)" % repeat, rows)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,90 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Compares the case-insensitive existence queries of the
+CaseInsensitiveFilenameClash check with the previous tree scan per added
+file on synthetic repository trees of 100000 and 1000000 nodes. The tree
+listing itself is not measured.
+
+Usage: python dev/benchmarks/filename_clash.py [number_of_added_files] [number_of_runs]
+"""
+
+
+import sys
+
+import _util
+
+from configobj import ConfigObj
+
+from repoguard.checks.caseinsensitivefilenameclash import CaseInsensitiveFilenameClash
+from repoguard.core.transaction import Transaction
+
+
+class _TreeTransaction(Transaction):
+    """
+    Transaction whose tree and changes are generated instead of listed.
+    """
+
+    def __init__(self, tree, added):
+        Transaction.__init__(self, "repos", "1")
+        self.tree = tree
+        self.added = added
+
+    def _get_tree(self, path=""):
+        return self.tree
+
+    def _get_changes(self):
+        return [(filename, "A") for filename in self.added]
+
+
+def _create_tree(size, added):
+    tree = ["/"]
+    directories = size // 100
+    for directory in range(directories):
+        tree.append("module%d/" % directory)
+        tree.extend("module%d/File%d.java" % (directory, index) for index in range(99))
+    return tree + added
+
+def _legacy_check(transaction):
+    errors = []
+    for filename in transaction.added:
+        folded = filename.lower()
+        count = 0
+        for path in transaction.tree:
+            if path.lower() == folded:
+                count += 1
+                if count >= 2:
+                    errors.append(filename)
+                    break
+    return errors
+
+def main(count=100, repeat=3):
+    added = ["new/File%d.java" % index for index in range(count - 1)] + ["MODULE0/"]
+    for size in (100000, 1000000):
+        tree = _create_tree(size, added)
+        transaction = _TreeTransaction(tree, added)
+        def run():
+            check = CaseInsensitiveFilenameClash(_TreeTransaction(tree, added))
+            assert not check.run(ConfigObj()).success
+        _util.report("%d added paths on %d nodes (best of %d runs)" % (
+            count, len(tree), repeat), [
+            ("scan per added file", _util.measure(lambda: _legacy_check(transaction), repeat)),
+            ("case-folded count map", _util.measure(run, repeat))
+        ])
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
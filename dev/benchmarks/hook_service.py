@@ -0,0 +1,128 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares the one-shot repoguard command with the resident hook service.
+Measures the start-up of the service and the latency of post-commit runs
+of the repoguard command, of the repoguard-client script and of requests
+sent directly to the socket.
+
+Requires an installed RepoGuard, because the checks are entry points.
+
+Usage: python dev/benchmarks/hook_service.py [number_of_runs]
+"""
+
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import _util
+
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+_CLIENT = os.path.join(_ROOT, "scripts", "repoguard-client")
+_CONFIG = """vcs = svn
+[profiles]
+    [[default]]
+        [[[postcommit]]]
+            checks = RejectTabs, ASCIIEncoded
+            success = ,
+            error = ,
+"""
+
+
+def _environment(socket_path):
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.path.join(_ROOT, "src")
+    environment["REPOGUARD_SOCKET"] = socket_path
+    environment["REPOGUARD_COMMAND"] = "false"
+    return environment
+
+def _call(command, environment):
+    if subprocess.call(command, env=environment) != 0:
+        raise RuntimeError("%s failed." % " ".join(command))
+
+def _wait_for(socket_path, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(socket_path)
+            return
+        except socket.error:
+            time.sleep(0.005)
+        finally:
+            client.close()
+    raise RuntimeError("Service did not start.")
+
+def _request(socket_path, repos_path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+        client.sendall(
+            '{"hook": "postcommit", "repo_path": "%s", "txn_name": "1"}\n' % repos_path
+        )
+        while client.recv(4096):
+            pass
+    finally:
+        client.close()
+
+def main(repeat=5):
+    root = tempfile.mkdtemp()
+    socket_path = os.path.join(root, "repoguard.sock")
+    environment = _environment(socket_path)
+    try:
+        files = dict(("src/File%d.java" % i, "class File%d {\n}\n" % i) for i in range(50))
+        repos_path = _util.create_repository(root, files)
+        file_object = open(os.path.join(repos_path, "hooks", "repoguard.conf"), "wb")
+        try:
+            file_object.write(_CONFIG)
+        finally:
+            file_object.close()
+
+        one_shot = [sys.executable, "-m", "repoguard.main", "postcommit", repos_path, "1"]
+        rows = [("repoguard postcommit", _util.measure(
+            lambda: _call(one_shot, environment), repeat
+        ))]
+
+        start = time.time()
+        service = subprocess.Popen(
+            [sys.executable, "-m", "repoguard.main", "serve", "-s", socket_path, repos_path],
+            env=environment
+        )
+        try:
+            _wait_for(socket_path)
+            rows.append(("service start-up", time.time() - start))
+            client = [sys.executable, _CLIENT, "postcommit", repos_path, "1"]
+            rows.append(("repoguard-client postcommit", _util.measure(
+                lambda: _call(client, environment), repeat
+            )))
+            rows.append(("socket request", _util.measure(
+                lambda: _request(socket_path, repos_path), repeat
+            )))
+        finally:
+            service.terminate()
+            service.wait()
+        _util.report("Post-commit latency (best of %d runs)" % repeat, rows)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
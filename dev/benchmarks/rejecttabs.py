@@ -0,0 +1,109 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Compares the RejectTabs check with the previous line by line scanner on
+a commit of 10000 files. The files are served from a local directory, so
+only the property lookups and the scanning are measured.
+
+Usage: python dev/benchmarks/rejecttabs.py [number_of_files] [number_of_runs]
+"""
+
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+import _util
+
+from configobj import ConfigObj
+
+from repoguard.checks.rejecttabs import RejectTabs
+
+
+_CONTENT = "class Example(object):\n\n    def run(self):\n        return '\t'\n" * 200
+_PATTERN = re.compile("^\s*\t")
+
+
+class _DirectoryTransaction(object):
+    """
+    Provides the files of a directory as added files of a transaction.
+    """
+
+    def __init__(self, directory, files):
+        self.directory = directory
+        self.files = files
+
+    def get_files(self, *_):
+        return self.files
+
+    def get_file(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def get_properties(self, _):
+        return {}
+
+    def has_property(self, keyword, filename):
+        return keyword in self.get_properties(filename)
+
+    def get_property(self, keyword, filename):
+        return self.get_properties(filename)[keyword]
+
+
+def _legacy_check(transaction):
+    errors = []
+    for filename, attr in sorted(transaction.get_files().iteritems()):
+        if attr not in ["A", "U"]:
+            continue
+        if transaction.has_property("svn:mime-type", filename):
+            if transaction.get_property("svn:mime-type", filename) == "application/octet-stream":
+                continue
+        file_object = open(transaction.get_file(filename), "r")
+        try:
+            for line in file_object:
+                if _PATTERN.match(line):
+                    errors.append("File %s contains leading tabs" % filename)
+                    break
+        finally:
+            file_object.close()
+    return errors
+
+def main(count=10000, repeat=3):
+    root = tempfile.mkdtemp()
+    try:
+        files = {}
+        for index in range(count):
+            filename = "File%d.py" % index
+            file_object = open(os.path.join(root, filename), "wb")
+            try:
+                file_object.write(_CONTENT)
+            finally:
+                file_object.close()
+            files[filename] = "A"
+        transaction = _DirectoryTransaction(root, files)
+
+        check = RejectTabs(transaction)
+        _util.report("RejectTabs on %d files (best of %d runs)" % (count, repeat), [
+            ("line by line", _util.measure(lambda: _legacy_check(transaction), repeat)),
+            ("whole file", _util.measure(lambda: check.run(ConfigObj()), repeat))
+        ])
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
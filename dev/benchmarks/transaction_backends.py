@@ -0,0 +1,82 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares the svnlook and the bindings transaction backend on a local
+file:// repository.
+
+Usage: python dev/benchmarks/transaction_backends.py [number_of_files]
+"""
+
+
+import shutil
+import sys
+import tempfile
+
+import _util
+
+from repoguard.core.transaction import Transaction
+try:
+    from repoguard.core.svnfs import FSTransaction
+except ImportError:
+    FSTransaction = None
+
+
+def _queries(transaction):
+    """ Runs the queries of a RejectTabs and Keywords enabled commit. """
+
+    transaction.user_id
+    transaction.commit_msg
+    for filename in transaction.get_files():
+        if filename.endswith("/"):
+            continue
+        transaction.get_file(filename)
+        if transaction.has_property("svn:keywords", filename):
+            transaction.get_property("svn:keywords", filename)
+        transaction.file_exists(filename)
+
+def main(count=300):
+    root = tempfile.mkdtemp()
+    try:
+        files = dict(
+            ("module%d/File%d.java" % (i % 10, i), "class File%d {\n}\n" % i)
+            for i in range(count)
+        )
+        properties = dict(
+            (path, {"svn:keywords": "Date Revision"}) for path in files
+        )
+        repos_path = _util.create_repository(root, files, properties)
+
+        backends = [("svnlook", Transaction)]
+        if FSTransaction is None:
+            print "Subversion Python bindings not found. Skipping bindings backend."
+        else:
+            backends.append(("bindings", FSTransaction))
+
+        rows = []
+        for name, transaction_class in backends:
+            def run():
+                transaction = transaction_class(repos_path, "1")
+                try:
+                    _queries(transaction)
+                finally:
+                    transaction.cleanup()
+            rows.append((name, _util.measure(run)))
+        _util.report("Transaction queries for %d files" % count, rows)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
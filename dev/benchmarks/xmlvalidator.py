@@ -0,0 +1,99 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Reports the runtime and peak memory of the XMLValidator well-formedness 
+check and of the previous minidom based check on large XML files. Every
+measurement runs in its own process, so the peak memory can be compared.
+The minidom check is only measured for files of up to 20 MB.
+
+Usage: python dev/benchmarks/xmlvalidator.py [largest_size_in_mb]
+"""
+
+
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import _util # Adds the source directory to the path.
+
+from repoguard.checks import xmlvalidator
+
+
+_LEGACY_LIMIT = 20
+_RECORD = '  <record id="%d"><name>Name</name><value>%d</value></record>\n'
+
+
+def _create_file(path, size):
+    file_object = open(path, "wb")
+    try:
+        file_object.write("<export>\n")
+        written, index = 0, 0
+        while written < size:
+            block = "".join(_RECORD % (i, i) for i in xrange(index, index + 1000))
+            file_object.write(block)
+            written += len(block)
+            index += 1000
+        file_object.write("</export>\n")
+    finally:
+        file_object.close()
+
+def _run(method, path):
+    """ Runs one check and prints its runtime and peak memory. """
+
+    start = time.time()
+    if method == "minidom":
+        from xml.dom import minidom
+        minidom.parse(path)
+    else:
+        assert xmlvalidator._validate_file((path, path, None)) == ""
+    duration = time.time() - start
+    print duration, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _measure(method, path):
+    output = subprocess.check_output([sys.executable, __file__, "--run", method, path])
+    duration, max_rss = output.split()
+    return float(duration), int(max_rss)
+
+def main(largest=200):
+    root = tempfile.mkdtemp()
+    try:
+        print "%-30s %12s %12s" % ("File size / check", "runtime", "peak memory")
+        for size in [1, 10, 20, 100, 200]:
+            if size > largest:
+                break
+            path = os.path.join(root, "export.xml")
+            _create_file(path, size * 1024 * 1024)
+            methods = ["expat"]
+            if size <= _LEGACY_LIMIT:
+                methods.append("minidom")
+            for method in methods:
+                duration, max_rss = _measure(method, path)
+                print "%-30s %9.0f ms %9.0f MB" % (
+                    "%d MB / %s" % (size, method), duration * 1000, max_rss / 1024.0
+                )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        _run(*sys.argv[2:])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -171,7 +171,7 @@ def _run_setup(config_home, console_scripts, extras_require):
     _write_config_home_constant(config_home)
     setuptools.setup(
         name="repoguard", 
-        version="0.3.0",
+        version=_read_version(),
         cmdclass={"clean": clean, "test": test, "pylint": pylint},
         description="RepoGuard is a framework for Subversion hook scripts.",
         long_description=("RepoGuard is a framework for Subversion pre-commit hooks " 
@@ -218,6 +218,7 @@ def _run_setup(config_home, console_scripts, extras_require):
             ])
         ],
         extras_require=extras_require,
+        scripts=["scripts/repoguard-client"],
         entry_points={
             "console_scripts": [
                 console_scripts
@@ -248,11 +249,21 @@ def _run_setup(config_home, console_scripts, extras_require):
             "repoguard.tools": [
                 "Checker = repoguard.tools.checker:Checker",
                 "Configuration = repoguard.tools.config:Configuration",
-                "Repository = repoguard.tools.repository:Repository"
+                "Repository = repoguard.tools.repository:Repository",
+                "Service = repoguard.tools.service:Service"
             ]
         }
     )
 
+def _read_version():
+    file_object = open("src/repoguard/core/constants.py", "rb")
+    try:
+        for line in file_object.readlines():
+            if line.startswith("VERSION ="):
+                return line.split("=", 1)[1].strip().strip('"')
+    finally:
+        file_object.close()
+
 def _write_config_home_constant(config_home):
     constants_file_path = "src/repoguard/core/constants.py"
     file_object = open(constants_file_path, "rb")
@@ -18,11 +18,25 @@ Checks if given files contains non ascii characters.
 """
 
 
+import mmap
+import os
+import re
 import string
 
 from repoguard.core.module import Check, ConfigSerializer, Array, String
 
 
+# Maximum number of unexpected letters that are reported per file.
+MAX_FINDINGS = 100
+# Longer lines are shortened in the error message.
+MAX_LINE_LENGTH = 1000
+# Larger files are memory-mapped instead of being read.
+MMAP_SIZE = 1024 * 1024
+
+_CHUNK_SIZE = 1024 * 1024
+_patterns = {}
+
+
 class Config(ConfigSerializer):
     """
     Configuration of the ASCIIEncoded check.
@@ -40,34 +54,42 @@ class ASCIIEncoded(Check):
     """
     
     __config__ = Config
+    prefetch_attributes = ("A", "U", "_U", "UU")
     
     @staticmethod
     def ascii_check(path, include, exclude):
         """
-        Checks if the given file contains non ascii characters.
+        Checks if the given file contains non ascii characters. The file
+        content is scanned in one pass and the position is only computed 
+        for the unexpected letters.
         
         :param path: The path the file that has to been checked.
         :type path: string
         
-        :return: A list of non ascii characters.
-        :rtype: list with (row, column, letter) tuples.
+        :return: A list of non ascii characters. It contains at most 
+                 MAX_FINDINGS + 1 entries, so a truncated result can be 
+                 detected.
+        :rtype: list with (row, column, line) tuples.
         """
         
-        result = list()
-        row = 1
-        include = string.printable + include
-        file_object = open(path, 'r')
+        allowed, pattern = _compile(include, exclude)
+        if pattern is None:
+            return list()
+        
+        file_object = open(path, 'rb')
         try:
-            for line in file_object.readlines():
-                col = 1
-                for letter in line:
-                    if not letter in include or letter in exclude:
-                        result.append((row, col, line))
-                    col += 1
-                row += 1
+            size = os.fstat(file_object.fileno()).st_size
+            if size >= MMAP_SIZE:
+                content = mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                content = file_object.read()
+            try:
+                return _find_letters(content, len(content), allowed, pattern)
+            finally:
+                if size >= MMAP_SIZE:
+                    content.close()
         finally:
             file_object.close()
-        return result
     
     @staticmethod
     def format_msg(filename, errors):
@@ -77,9 +99,11 @@ class ASCIIEncoded(Check):
         
         msg = []
         msg.append("Unexpected letters in file %s:" % filename)
-        for row, col, line in errors:  
+        for row, col, line in errors[:MAX_FINDINGS]:  
             msg.append("%s: %s" % (row, line))
             msg.append("%s %s^" % (" " * len(str(row)), " " * col))
+        if len(errors) > MAX_FINDINGS:
+            msg.append("Only the first %d unexpected letters are reported." % MAX_FINDINGS)
         msg.append("")
         return "\n".join(msg)
 
@@ -98,16 +122,112 @@ class ASCIIEncoded(Check):
             config.check_files, config.ignore_files
         )
         
-        msg = ""
-        for filename, attribute in files.iteritems():
-            if attribute in ["A", "U", "_U", "UU"]:
-                filepath = self.transaction.get_file(filename)
-                result = self.ascii_check(
-                    filepath, config.include, config.exclude
-                )
-                if result:
-                    msg += self.format_msg(filename, result)
+        items = [
+            (filename, self.transaction.get_file(filename), config.include, config.exclude)
+            for filename, attribute in sorted(files.iteritems())
+                if attribute in ["A", "U", "_U", "UU"]
+        ]
+        msg = "".join(self.map_files(_check_file, items))
         if not msg:
             return self.success()
         else:
             return self.error(msg)
+
+
+def _compile(include, exclude):
+    """
+    Returns the allowed letters and the compiled pattern that matches the
+    unexpected letters. The pattern is None if all letters are allowed.
+    
+    :param include: Letters that are allowed in addition to the printable 
+                    ASCII letters.
+    :type include: string
+    
+    :param exclude: Letters that are not allowed.
+    :type exclude: string
+    
+    :rtype: tuple of string and compiled regular expression
+    """
+    
+    key = (include, exclude)
+    if not key in _patterns:
+        # The file content is matched byte by byte.
+        if isinstance(include, unicode):
+            include = include.encode("utf-8")
+        if isinstance(exclude, unicode):
+            exclude = exclude.encode("utf-8")
+        include = string.printable + include
+        allowed, letters = [], []
+        for letter in (chr(byte) for byte in range(256)):
+            if not letter in include or letter in exclude:
+                letters.append(letter)
+            else:
+                allowed.append(letter)
+        pattern = None
+        if letters:
+            pattern = re.compile(
+                "[%s]" % "".join("\\x%02x" % ord(letter) for letter in letters)
+            )
+        _patterns[key] = "".join(allowed), pattern
+    return _patterns[key]
+
+def _find_letters(content, size, allowed, pattern):
+    """
+    Returns the (row, column, line) tuples of the first MAX_FINDINGS + 1 
+    unexpected letters in the content.
+    
+    :param content: The file content.
+    :type content: string or mmap
+    
+    :param size: The size of the content.
+    :type size: int
+    
+    :param allowed: The allowed letters.
+    :type allowed: string
+    
+    :param pattern: Pattern that matches the unexpected letters.
+    :type pattern: compiled regular expression
+    """
+    
+    result = list()
+    row, counted = 1, 0
+    for start in xrange(0, size, _CHUNK_SIZE):
+        end = start + _CHUNK_SIZE
+        # Deleting the allowed letters is much faster than searching the 
+        # pattern, so the pattern is only searched in chunks that contain
+        # unexpected letters.
+        if not content[start:end].translate(None, allowed):
+            continue
+        for match in pattern.finditer(content, start, end):
+            position = match.start()
+            row += content[counted:position].count("\n")
+            counted = position
+            line_start = content.rfind("\n", 0, position) + 1
+            line_end = content.find("\n", position)
+            if line_end == -1:
+                line_end = size
+            else:
+                line_end += 1
+            if line_end - line_start > MAX_LINE_LENGTH:
+                line = content[line_start:line_start + MAX_LINE_LENGTH] + "...\n"
+            else:
+                line = content[line_start:line_end]
+            result.append((row, position - line_start + 1, line))
+            if len(result) > MAX_FINDINGS:
+                return result
+    return result
+
+def _check_file(item):
+    """
+    Returns the error message for one file or an empty string.
+    
+    :param item: The filename, the path to the file copy and the include 
+                 and exclude characters.
+    :type item: tuple
+    """
+    
+    filename, filepath, include, exclude = item
+    result = ASCIIEncoded.ascii_check(filepath, include, exclude)
+    if result:
+        return ASCIIEncoded.format_msg(filename, result)
+    return ""
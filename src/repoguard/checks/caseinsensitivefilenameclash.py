@@ -14,6 +14,8 @@
 
 """ 
 This check tests if a file with the same filename (ignoring the case) already exists in the repository.
+Added directories are checked as well. Files and directories clash with each other and with other 
+paths that are added in the same commit.
 """
 
 from repoguard.core.module import Check, ConfigSerializer, Array, String
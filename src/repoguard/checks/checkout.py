@@ -31,9 +31,20 @@ class Checkout(Check):
 
     __config__ = Config
 
+    def prefetch(self, config):
+        config = self.deserialize(config)
+        sources = [entry.source for entry in config.entries]
+        existing = self.transaction.files_exist(sources)
+        # Directories cannot be checked out.
+        return [
+            source for source in sources 
+                if existing[source] and not source.endswith("/")
+        ]
+
     def _run(self, config):
+        existing = self.transaction.files_exist([entry.source for entry in config.entries])
         for entry in config.entries:
-            if self.transaction.file_exists(entry.source):
+            if existing[entry.source]:
                 filepath = self.transaction.get_file(entry.source)
             else:
                 return self.error("File %r to checkout does not exist in the repository." % entry.source)
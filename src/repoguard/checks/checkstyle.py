@@ -64,6 +64,7 @@ class Checkstyle(Check):
     """ Performs Java source code checks using the checkstyle. """ 
     
     __config__ = Config
+    prefetch_attributes = ("A", "U", "UU")
     
     pattern = "%s -classpath %s com.puppycrawl.tools.checkstyle.Main -c %s %s"
 
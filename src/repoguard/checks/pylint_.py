@@ -53,6 +53,7 @@ class PyLint(Check):
     """
     
     __config__ = Config
+    prefetch_attributes = ("A", "U", "UU")
     
     def _run(self, config):
         """
@@ -18,11 +18,20 @@ Reject files with given extensions that include leading tabs.
 """
 
 
+import mmap
+import os
 import re
 
 from repoguard.core.module import Check, ConfigSerializer, String, Array
 
 
+# Files without mime-type that contain a NUL byte in their first bytes 
+# are binary.
+BINARY_SNIFF_SIZE = 8192
+# Larger files are memory-mapped instead of being read.
+MMAP_SIZE = 1024 * 1024
+
+
 class Config(ConfigSerializer):
     class types(ConfigSerializer.types):
         check_files = Array(String, optional=True, default=[".*"])
@@ -36,34 +45,74 @@ class RejectTabs(Check):
     
     __config__ = Config
     
-    pattern = re.compile("^\s*\t")
+    # Matches a tab that is preceded by whitespace of its line only.
+    pattern = re.compile("^[^\\S\\n]*\t", re.MULTILINE)
 
-    def _run(self, config):
+    def _get_text_files(self, config):
+        """
+        Returns the (filename, mimetype) tuples of the added or updated 
+        files that are not marked as binary.
+        """
+        
         files = self.transaction.get_files(config.check_files, 
                                            config.ignore_files)
-        errors = []
-        for filename, attr in files.iteritems():
+        text_files = []
+        for filename, attr in sorted(files.iteritems()):
             if attr not in ["A", "U"]:
                 # Process only files which were added or updated
                 continue
+            mimetype = None
             if self.transaction.has_property("svn:mime-type", filename):
-                mimetype = self.transaction.get_property("svn:mime-type", 
-                                                         filename)
-                if mimetype == "application/octet-stream":
-                    # Skip binary files
-                    continue
-    
-            file_object = open(self.transaction.get_file(filename), "r")
-            try:
-                msg = "File %s contains leading tabs"
-                for line in file_object:
-                    if self.pattern.match(line):
-                        errors.append(msg % filename)
-                        break
-            finally:
-                file_object.close()
+                mimetype = self.transaction.get_property("svn:mime-type", filename)
+            if mimetype == "application/octet-stream":
+                # Skip binary files
+                continue
+            text_files.append((filename, mimetype))
+        return text_files
+
+    def prefetch(self, config):
+        return [
+            filename for filename, _ in self._get_text_files(self.deserialize(config))
+        ]
+
+    def _run(self, config):
+        items = [
+            (filename, self.transaction.get_file(filename), mimetype is None)
+                for filename, mimetype in self._get_text_files(config)
+        ]
         
+        errors = [error for error in self.map_files(_check_file, items) if error]
         if not errors:     
             return self.success()
         else:
             return self.error("\n".join(errors))
+
+
+def _check_file(item):
+    """
+    Returns the error message for one file or None.
+    
+    :param item: The filename, the path to the file copy and whether the 
+                 file has to be skipped if its content is binary.
+    :type item: tuple
+    """
+    
+    filename, filepath, sniff = item
+    file_object = open(filepath, "rb")
+    try:
+        size = os.fstat(file_object.fileno()).st_size
+        if size >= MMAP_SIZE:
+            content = mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            content = file_object.read()
+        try:
+            if sniff and "\0" in content[:BINARY_SNIFF_SIZE]:
+                return None
+            if content.find("\t") != -1 and RejectTabs.pattern.search(content):
+                return "File %s contains leading tabs" % filename
+        finally:
+            if size >= MMAP_SIZE:
+                content.close()
+    finally:
+        file_object.close()
+    return None
@@ -33,37 +33,63 @@ class UnitTests(Check):
 
     __config__ = Config
 
-    def _run(self, config):
+    def _get_filenames(self, config):
+        """
+        Returns the added or updated files that are not tests themselves.
+        """
+        
         files = self.transaction.get_files(config.check_files, 
                                            config.ignore_files)
-        interface_pattern = re.compile("interface .* {")
-        class_pattern = re.compile("class .* {")
-    
+        return [
+            filename for filename, attribute in sorted(files.iteritems())
+                if attribute in ["A", "U", "UU"] and not "/test/" in filename
+        ]
+
+    def prefetch(self, config):
+        return self._get_filenames(self.deserialize(config))
+
+    def _run(self, config):
+        filenames = self._get_filenames(config)
+        interfaces = self.map_files(_is_interface, [
+            self.transaction.get_file(filename) for filename in filenames
+        ])
+        
+        # skip java interfaces
+        classes = [
+            filename for filename, is_interface in zip(filenames, interfaces)
+                if not is_interface
+        ]
+        unittests = [
+            filename.replace("/main/", "/test/").replace(".java", "Test.java")
+                for filename in classes
+        ]
+        existing = self.transaction.files_exist(unittests)
+        
         msg = ""
-        for filename, attribute in files.iteritems():
-            if attribute in ["A", "U", "UU"] and not "/test/" in filename:
-    
-                # skip java interfaces
-                skip = False
-                file_object = open(self.transaction.get_file(filename), "r")
-                try:
-                    for line in file_object:
-                        if interface_pattern.search(line):
-                            skip = True
-                            break
-                        elif class_pattern.search(line):
-                            break
-                finally:
-                    file_object.close()
-                    
-                if skip:
-                    continue
-    
-                unittest = filename.replace("/main/", "/test/")
-                unittest = unittest.replace(".java", "Test.java")
-                if not self.transaction.file_exists(unittest):
-                    msg += "No unittest exists for file %r.\n" % filename
+        for filename, unittest in zip(classes, unittests):
+            if not existing[unittest]:
+                msg += "No unittest exists for file %r.\n" % filename
         if msg:
             return self.error(msg)
         else:
             return self.success()
+
+
+_INTERFACE_PATTERN = re.compile("interface .* {")
+_CLASS_PATTERN = re.compile("class .* {")
+
+def _is_interface(filepath):
+    """
+    Returns whether the given Java file declares an interface.
+    """
+    
+    file_object = open(filepath, "r")
+    try:
+        for line in file_object:
+            if _INTERFACE_PATTERN.search(line):
+                return True
+            elif _CLASS_PATTERN.search(line):
+                return False
+    finally:
+        file_object.close()
+    return False
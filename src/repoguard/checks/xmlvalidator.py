@@ -12,33 +12,142 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-""" Checks XML files for correctness. """
+"""
+Checks XML files for correctness. Files are checked for well-formedness 
+with a streaming expat parser in constant memory. Optionally, they are 
+validated against a DTD, XML Schema or RELAX NG schema, which requires lxml.
+"""
 
-from xml.dom import minidom
 from xml.parsers import expat
 
+from repoguard.core.config import file_stamp
 from repoguard.core.module import Check, ConfigSerializer, Array, String
 
+
+# Compiled schemas by the stamp of the schema file. Every process compiles
+# a schema only once. The cache is not shared between processes, so forked
+# service children and pool workers compile their schemas again.
+_schemas = {}
+
 class Config(ConfigSerializer):
     class types(ConfigSerializer.types):
         check_files = Array(String, optional=True, default=[".*\.xml"])
         ignore_files = Array(String, optional=True, default=[])
+        schema = String(optional=True)
 
 class XMLValidator(Check):
 
     __config__ = Config
+    prefetch_attributes = ("A", "U")
 
     def _run(self, config):
+        if config.schema:
+            # Fails early if lxml is not installed.
+            __import__("lxml.etree")
         files = self.transaction.get_files(config.check_files, 
                                            config.ignore_files)
-        msg= ""
-        for filename, attribute in files.iteritems():
-            if attribute in ["A", "U"]:
-                try:
-                    minidom.parse(self.transaction.get_file(filename))
-                except expat.ExpatError, e:
-                    msg += "XML validation error in file %r: %s" % (filename, e)
+        items = [
+            (filename, self.transaction.get_file(filename), config.schema) 
+            for filename, attribute in sorted(files.iteritems())
+                if attribute in ["A", "U"]
+        ]
+        msg = "".join(self.map_files(_validate_file, items))
         if msg:
             return self.error(msg)
         else:
             return self.success()
+
+def _check_well_formed(source):
+    """
+    Parses the file without building a document.
+    
+    :param source: The path to the file or a file object.
+    :type source: string or file
+    
+    :return: The error message or None if the file is well-formed.
+    :rtype: string
+    """
+    
+    # Namespace processing reports unbound prefixes like minidom does.
+    parser = expat.ParserCreate(namespace_separator=" ")
+    try:
+        if hasattr(source, "read"):
+            parser.ParseFile(source)
+        else:
+            file_object = open(source, "rb")
+            try:
+                parser.ParseFile(file_object)
+            finally:
+                file_object.close()
+    except expat.ExpatError, e:
+        return str(e)
+    return None
+
+def _get_schema(path):
+    """
+    Returns the compiled schema of the given file. The type of the schema
+    is determined by the file extension: .dtd, .rng or XML Schema otherwise.
+    """
+    
+    from lxml import etree
+    
+    stamp = file_stamp(path)
+    schema = _schemas.get(stamp)
+    if schema is None:
+        if path.lower().endswith(".dtd"):
+            schema = etree.DTD(path)
+        elif path.lower().endswith(".rng"):
+            schema = etree.RelaxNG(etree.parse(path))
+        else:
+            schema = etree.XMLSchema(etree.parse(path))
+        _schemas[stamp] = schema
+    return schema
+
+def _validate_schema(source, schema_path):
+    """
+    Validates the file against the schema.
+    
+    :param source: The path to the file or a file object.
+    :type source: string or file
+    
+    :param schema_path: The path to the schema.
+    :type schema_path: string
+    
+    :return: The error message or None if the file is valid.
+    :rtype: string
+    """
+    
+    from lxml import etree
+    
+    schema = _get_schema(schema_path)
+    try:
+        # External entities must never be resolved. Their content would be
+        # reported to the committer in the validation errors.
+        if isinstance(schema, etree.XMLSchema):
+            # XML Schemas are validated while parsing, so the processed
+            # elements can be discarded.
+            for _, element in etree.iterparse(
+                source, schema=schema, resolve_entities=False, no_network=True):
+                element.clear()
+                while not element.getprevious() is None:
+                    del element.getparent()[0]
+        else:
+            parser = etree.XMLParser(resolve_entities=False, no_network=True)
+            schema.assertValid(etree.parse(source, parser))
+    except etree.Error, e:
+        return str(e)
+    return None
+
+def _validate_file(item):
+    """
+    Returns the validation error message for one file or an empty string.
+    """
+    
+    filename, filepath, schema_path = item
+    if schema_path:
+        error = _validate_schema(filepath, schema_path)
+    else:
+        error = _check_well_formed(filepath)
+    if error:
+        return "XML validation error in file %r: %s" % (filename, error)
+    return ""
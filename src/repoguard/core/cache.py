@@ -0,0 +1,206 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bounded cache for the results of external commands.
+"""
+
+
+import cPickle
+import os
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+
+DEFAULT_SIZE = 32 * 1024 * 1024
+DEFAULT_SPILL_SIZE = 1024 * 1024
+
+
+def _sizeof(value):
+    """
+    Returns the approximate number of bytes of a command result, which is
+    either a string or a list of strings.
+    """
+
+    if isinstance(value, basestring):
+        return len(value)
+    return sum(len(item) for item in value)
+
+
+class ResultCache(object):
+    """
+    Cache with a byte budget and least recently used eviction. Entries that
+    are larger than the spill size are written to the spill directory and
+    do not count against the budget.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE, spill_size=DEFAULT_SPILL_SIZE, spill_dir=None):
+        """
+        Constructor.
+
+        :param size: The maximum number of bytes that are kept in memory.
+        :type size: int
+
+        :param spill_size: Entries of this size or larger are written to disk.
+        :type spill_size: int
+
+        :param spill_dir: The directory that is used for spilled entries. If
+                          it is None large entries are not cached at all.
+        :type spill_dir: string
+        """
+
+        self.size = size
+        self.spill_size = spill_size
+        self.spill_dir = spill_dir
+        self.resident_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spills = 0
+
+        self._entries = OrderedDict()
+        self._spill_path = None
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value for the given key and marks it as recently used.
+
+        :param key: The key of the entry.
+        :type key: string
+
+        :param default: The value that is returned if the key is not cached.
+        """
+
+        self._lock.acquire()
+        try:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries[key] = entry
+            self.hits += 1
+            size, value, path = entry
+            if path is None:
+                return value
+        finally:
+            self._lock.release()
+
+        # The spilled file is read without the lock, so another thread may 
+        # replace or clear the entry in the meantime.
+        try:
+            file_object = open(path, "rb")
+            try:
+                return cPickle.load(file_object)
+            finally:
+                file_object.close()
+        except (IOError, EOFError):
+            self._lock.acquire()
+            try:
+                self.hits -= 1
+                self.misses += 1
+            finally:
+                self._lock.release()
+            return default
+
+    def __getitem__(self, key):
+        value = self.get(key, self)
+        if value is self:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        size = _sizeof(value)
+        path = None
+        if size >= self.spill_size or size > self.size:
+            if self.spill_dir is None:
+                return
+            path = self._spill(value)
+
+        self._lock.acquire()
+        try:
+            self._discard(key)
+            if path is None:
+                self._entries[key] = (size, value, None)
+                self.resident_size += size
+                self._evict()
+            else:
+                self._entries[key] = (size, None, path)
+        finally:
+            self._lock.release()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+
+        self._lock.acquire()
+        try:
+            for key in self._entries.keys():
+                self._discard(key)
+        finally:
+            self._lock.release()
+
+    def _spill(self, value):
+        if self._spill_path is None:
+            self._spill_path = tempfile.mkdtemp(prefix=".cache-", dir=self.spill_dir)
+        handle, path = tempfile.mkstemp(dir=self._spill_path)
+        file_object = os.fdopen(handle, "wb")
+        try:
+            cPickle.dump(value, file_object, cPickle.HIGHEST_PROTOCOL)
+        finally:
+            file_object.close()
+        self.spills += 1
+        return path
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        size, _, path = entry
+        if path is None:
+            self.resident_size -= size
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _evict(self):
+        while self.resident_size > self.size:
+            for key, (_, _, path) in self._entries.iteritems():
+                if path is None:
+                    break
+            self._discard(key)
+            self.evictions += 1
+
+    def _get_stats(self):
+        """
+        Returns the counters of the cache.
+
+        :rtype: dict
+        """
+
+        return {
+            "hits" : self.hits, "misses" : self.misses,
+            "evictions" : self.evictions, "spills" : self.spills,
+            "entries" : len(self), "bytes" : self.resident_size
+        }
+
+    stats = property(_get_stats)
@@ -17,15 +17,97 @@ Module that contains the main RepoGuard class.
 """
 
 import os
+import threading
+import time
 
 from repoguard.core import constants
 from repoguard.core.logger import LoggerFactory
-from repoguard.core.config import ProjectConfig
+from repoguard.core.config import ProjectConfig, ValidationStamp
 from repoguard.core.transaction import Transaction
+from repoguard.core.pathmatcher import ProfileRouter
 from repoguard.core.protocol import Protocol
-from repoguard.core.validator import ConfigValidator
 from repoguard.core.module import CheckManager, HandlerManager
 
+
+# Maximum number of revisions the post-commit hook applies to the path 
+# index. Larger gaps are left to the repo-index command.
+MAX_INDEX_UPDATES = 100
+
+class FileExecutor(object):
+    """
+    Applies the per-file functions of checks to their files on a process 
+    pool. The functions and their arguments have to be picklable. The pool 
+    is only started for batches with at least min_files files. Checks that 
+    run on other threads only use a pool that was started beforehand, 
+    because forking while other threads hold locks can deadlock the 
+    workers.
+    """
+    
+    def __init__(self, processes=1, min_files=50):
+        """
+        Constructor.
+        
+        :param processes: The number of worker processes. 0 uses one 
+                          process per CPU.
+        :type processes: int
+        
+        :param min_files: The minimum number of files that are processed 
+                          on the pool. Smaller batches run in-process.
+        :type min_files: int
+        """
+        
+        if processes == 0:
+            import multiprocessing
+            processes = multiprocessing.cpu_count()
+        self.processes = processes
+        self.min_files = min_files
+        self._pool = None
+        
+    def start(self):
+        """
+        Starts the worker processes. Has to be called from the main thread 
+        before checks run concurrently.
+        """
+        
+        if self.processes > 1 and self._pool is None:
+            import multiprocessing
+            self._pool = multiprocessing.Pool(self.processes)
+        
+    def map(self, function, items):
+        """
+        Returns the results of the function for all items in the order 
+        of the items.
+        
+        :param function: A module level function with one argument.
+        :type function: callable
+        
+        :param items: The arguments of the function calls.
+        :type items: list
+        
+        :rtype: list
+        """
+        
+        if self.processes <= 1 or len(items) < max(self.min_files, 2):
+            return [function(item) for item in items]
+        
+        if self._pool is None:
+            if threading.current_thread().name != "MainThread":
+                return [function(item) for item in items]
+            self.start()
+        chunksize = max(1, len(items) // (self.processes * 4))
+        return self._pool.map(function, items, chunksize)
+    
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        
+        if not self._pool is None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
 class RepoGuard(object):
     """
     Main RepoGuard class.
@@ -50,20 +132,105 @@ class RepoGuard(object):
         self.result = constants.SUCCESS
         self.main = None
         self.transaction = None
+        self.jobs = 1
+        self.executor = None
+        self.prefetch_workers = 0
         
         self.logger = LoggerFactory().create(self.__module__)
         
-    def load_transaction(self, name):
+    def load_transaction(self, name, backend=constants.SVNLOOK, **cache_options):
         """
         Load the transaction with the given name.
         
         :param name: The name of the current transaction.
         :type name: string
+        
+        :param backend: The backend that is used to access the repository.
+                        If the Subversion Python bindings are not available 
+                        the svnlook backend is used.
+        :type backend: constants.SVNLOOK, constants.BINDINGS
+        
+        :param cache_options: The cache_size and cache_spill_size of the 
+                              transaction result cache.
+        :type cache_options: dict
         """
         
-        self.transaction = Transaction(self.repository_path, name)
+        if backend == constants.BINDINGS:
+            try:
+                from repoguard.core.svnfs import FSTransaction
+            except ImportError:
+                self.logger.warning(
+                    "Subversion Python bindings not found. Using svnlook."
+                )
+            else:
+                self.transaction = FSTransaction(
+                    self.repository_path, name, **cache_options
+                )
+                self._attach_path_index()
+                return
+        self.transaction = Transaction(self.repository_path, name, **cache_options)
+        self._attach_path_index()
+        
+    def _get_path_index_file(self):
+        return os.path.join(
+            self.repository_path, "hooks", constants.PATH_INDEX_FILENAME
+        )
         
-    def load_config(self, tpl_dirs, config):
+    def _attach_path_index(self):
+        """
+        Attaches the path index to the transaction when it represents the 
+        revision the transaction is based on. The index is read in one 
+        transaction, so concurrent updates are not visible to the checks.
+        """
+        
+        path = self._get_path_index_file()
+        if not os.path.exists(path):
+            return
+        
+        from repoguard.core.pathindex import PathIndex
+        index = PathIndex(path)
+        base_revision = self.transaction.base_revision
+        revision = index.begin_read()
+        if not base_revision is None and revision == base_revision:
+            self.transaction.path_index = index
+        else:
+            self.logger.debug(
+                "Path index (revision %s) not used for revision %s.", 
+                revision, base_revision
+            )
+            index.close()
+        
+    def update_path_index(self):
+        """
+        Brings the path index up to date with the current revision. 
+        Nothing is done if the index has not been built yet.
+        """
+        
+        path = self._get_path_index_file()
+        if self.transaction.type != "revision" or self.transaction.txn_name is None \
+           or not os.path.exists(path):
+            return
+        
+        from repoguard.core.pathindex import PathIndex
+        index = PathIndex(path)
+        try:
+            self.logger.debug("Updating path index...")
+            revision = int(self.transaction.txn_name)
+            index.synchronize(
+                self.repository_path, revision, self.transaction.__class__, 
+                MAX_INDEX_UPDATES
+            )
+            if not index.revision is None and index.revision < revision:
+                self.logger.warning(
+                    "Path index is %d revisions behind. Run repo-index to rebuild it.",
+                    revision - index.revision
+                )
+            else:
+                self.logger.debug("Path index updated to revision %s.", index.revision)
+        finally:
+            index.close()
+        
+    def load_config(self, tpl_dirs, config, cache=None):
         """
         Load the project configuration.
         
@@ -72,41 +239,68 @@ class RepoGuard(object):
                             
         :param config: The path or a splittedline project configuration string.
         :type config: string
+        
+        :param cache: The cache of merged configurations.
+        :type cache: ConfigCache
         """
         
         self.logger.debug("Loading project configuration...")
         hooks_path = os.path.join(self.repository_path, "hooks")
-        self.main = ProjectConfig(config, hooks_path, tpl_dirs)
+        self.main = ProjectConfig(config, hooks_path, tpl_dirs, cache)
         self.logger.debug("Project configuration loaded.")
         
-    def validate(self):
+    def load_plan(self, path, template_dirs=None):
+        """
+        Loads a compiled execution plan instead of the project configuration.
+        
+        :param path: The path of the plan file.
+        :type path: string
+        
+        :param template_dirs: The current template directories.
+        :type template_dirs: list of strings
+        
+        :return: False if the plan does not exist or is stale. In this case 
+                 the project configuration has to be loaded.
+        :rtype: boolean
+        """
+        
+        from repoguard.core.plan import ExecutionPlan
+        plan = ExecutionPlan.load(path, template_dirs)
+        if plan is None:
+            self.logger.debug("No current execution plan found.")
+            return False
+        plan.register_plugins()
+        self.main = plan
+        self.logger.debug("Execution plan loaded.")
+        return True
+        
+    def validate(self, force=False):
         """
         Runs the internal validation process of the current loaded 
-        configuration.
+        configuration. The validation is skipped when the configuration 
+        and the installed plugins did not change since the last successful 
+        validation.
+        
+        :param force: Validates the configuration in any case.
+        :type force: boolean
         
         :return: Returns the status code of the validator. succes = 0, error > 0
         :rtype: integer
         """
         
-        validator = ConfigValidator(excepts=True)
-        return validator.validate(self.main)
-    
-    def _combined_profile_regexes(self):
-        """
-        Returns a regular expression string which matches all 
-        files that are covered by any special profile. A special
-        profile defines a non-empty regex parameter.
-        """
+        stamp = ValidationStamp(os.path.join(
+            self.repository_path, "hooks", constants.VALIDATION_STAMP_FILENAME
+        ))
+        if not force and stamp.matches(self.main):
+            self.logger.debug("Configuration unchanged since its last validation.")
+            return 0
         
-        combined_profile_regexes = ""
-        for profile in self.main.profiles:
-            if not profile.regex is None:
-                combined_profile_regexes += "(%s)|" % profile.regex
-        if not combined_profile_regexes:
-            combined_profile_regexes = None
-        else:
-            combined_profile_regexes = combined_profile_regexes[:-1]
-        return combined_profile_regexes   
+        from repoguard.core.validator import ConfigValidator
+        validator = ConfigValidator(excepts=True)
+        errors = validator.validate(self.main)
+        if not errors:
+            stamp.record(self.main)
+        return errors
     
     def run(self):
         """
@@ -120,32 +314,35 @@ class RepoGuard(object):
         
         try:
             self.logger.debug("Running run...")
-            combined_profile_regexes = self._combined_profile_regexes()
-            self.logger.debug("Default ignore regex: %s", combined_profile_regexes)
+            # Assign every changed path to its profiles. Default profiles 
+            # run if a path is not handled by a special profile.
+            router = ProfileRouter(
+                [(profile.name, profile.regex) for profile in self.main.profiles]
+            )
+            changes = self.transaction._get_changes() # pylint: disable=W0212
+            partitions = router.route(changes)
             
             # Process executing
             for profile in self.main.profiles:
-                ignores = list()
-                if not profile.regex is None:
-                    self.transaction.profile = profile.regex
-                else: 
-                    # default profile: covers all files
-                    # which are not handled by a special profile
-                    self.transaction.profile = ".*"
-                    if not combined_profile_regexes is None:
-                        ignores = [combined_profile_regexes]
-                    
                 # if there are no files in this profile continue.
-                if not self.transaction.get_files(ignore_list=ignores):
+                if not partitions[profile.name]:
                     self.logger.debug("Profile '%s' skipped.", profile.name)
                     continue
+                if profile.regex is None:
+                    # The checks of default profiles see all changed paths.
+                    self.transaction.set_partition(profile.name, changes)
+                else:
+                    self.transaction.set_partition(profile.name, partitions[profile.name])
                 self._run_profile(profile)
                 
             self.logger.debug("Run finished with %s.", self.result)
             return self.result
         finally:
+            self.logger.debug("Transaction cache: %s", self.transaction.cache.stats)
             self.logger.debug("Cleaning up transaction.")
             self.transaction.cleanup()
+            if not self.executor is None:
+                self.executor.close()
 
     def run_profile(self, name):
         """ Runs a specific profile. """
@@ -159,13 +356,16 @@ class RepoGuard(object):
                     
             if not profile_found:
                 self.result = constants.ERROR
-                self.logger.error("No profile with name '%s' exists." % name)
+                self.logger.error("No profile with name '%s' exists.", name)
             else:
                 self.logger.debug("Run finished with %s.", self.result)
             return self.result
         finally:
+            self.logger.debug("Transaction cache: %s", self.transaction.cache.stats)
             self.logger.debug("Cleaning up transaction.")
             self.transaction.cleanup()
+            if not self.executor is None:
+                self.executor.close()
         
     def _run_profile(self, profile):
         process = profile.get_process(self.hook)
@@ -177,32 +377,34 @@ class RepoGuard(object):
         
         self.logger.debug("Running profile '%s'...", profile.name)
         protocol = Protocol(profile.name)
+        if self.prefetch_workers > 0:
+            self._prefetch(process.checks)
         # run the configured checks
-        for name, config, interp in process.checks:
-            self.logger.debug("Loading check %s...", name)
-            check = self.checks.fetch(name, self.transaction)
-            self.logger.debug("Starting check %s...", name)
-            entry = check.run(config, interp)
-            self.logger.debug(
-                "Check %s finished with %s.", name, entry.result
-            )
-            protocol.append(entry)
-            
-            # run the configured handlers when a message was returned 
-            if entry.msg:
-                self.logger.debug(
-                    "Running handler after check %s...", entry.check
-                )
-                self.handlers.singularize(self.transaction, process, entry)
+        results = self._run_checks(process.checks)
+        try:
+            for name, interp, entry in results:
                 self.logger.debug(
-                    "Handler after check %s finished.", entry.check
+                    "Check %s finished with %s.", name, entry.result
                 )
-            
-            # cancel the _process chain when an abortonerror was detected.
-            if interp == constants.ABORTONERROR and not protocol.success:
-                msg = "Profile %s aborted after check %s."
-                self.logger.debug(msg, profile.name, entry.check)
-                break
+                protocol.append(entry)
+                
+                # run the configured handlers when a message was returned 
+                if entry.msg:
+                    self.logger.debug(
+                        "Running handler after check %s...", entry.check
+                    )
+                    self.handlers.singularize(self.transaction, process, entry)
+                    self.logger.debug(
+                        "Handler after check %s finished.", entry.check
+                    )
+                
+                # cancel the _process chain when an abortonerror was detected.
+                if interp == constants.ABORTONERROR and not protocol.success:
+                    msg = "Profile %s aborted after check %s."
+                    self.logger.debug(msg, profile.name, entry.check)
+                    break
+        finally:
+            results.close()
         
         # cumulativ execution of all handlers.
         self.logger.debug("Running handler summarize...")
@@ -212,3 +414,86 @@ class RepoGuard(object):
         if not protocol.success:
             self.result = constants.ERROR
         self.logger.debug("Profile %s finished.", profile.name)
+
+    def _prefetch(self, checks):
+        """
+        Fetches the union of the files the given checks will read.
+        
+        :param checks: The (name, config, interp) tuples of the checks.
+        :type checks: list of tuples
+        """
+        
+        filenames = set()
+        for name, config, _ in checks:
+            try:
+                check = self.checks.fetch(name, self.transaction)
+                filenames.update(check.prefetch(config))
+            except Exception: # pylint: disable=W0703
+                # The error is reported when the check runs.
+                self.logger.debug("Prefetch of check %s failed.", name, exc_info=True)
+        if not filenames:
+            return
+        
+        start = time.time()
+        count, size = self.transaction.prefetch(filenames, self.prefetch_workers)
+        self.logger.debug(
+            "Prefetched %d files (%d bytes) in %.3f seconds.", 
+            count, size, time.time() - start
+        )
+
+    def _run_checks(self, checks):
+        """
+        Runs the given checks and yields their (name, interp, entry) tuples 
+        in the configured order. With more than one job the checks run 
+        concurrently on a thread pool. Checks that are still running or 
+        pending when the generator is closed are cancelled. Pending checks 
+        are not started at all.
+        
+        :param checks: The (name, config, interp) tuples of the checks.
+        :type checks: list of tuples
+        """
+        
+        if self.jobs <= 1 or len(checks) <= 1:
+            for name, config, interp in checks:
+                self.logger.debug("Loading check %s...", name)
+                check = self.checks.fetch(name, self.transaction)
+                check.executor = self.executor
+                yield name, interp, self._run_check(check, name, config, interp)
+            return
+        
+        # The process pool is forked before any check thread exists.
+        if not self.executor is None:
+            self.executor.start()
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(min(self.jobs, len(checks)))
+        cancelled = threading.Event()
+        try:
+            results = []
+            for name, config, interp in checks:
+                # Loading modules is not thread-safe, so the checks are 
+                # loaded before they are started.
+                self.logger.debug("Loading check %s...", name)
+                check = self.checks.fetch(name, self.transaction)
+                check.executor = self.executor
+                result = pool.apply_async(
+                    self._run_check, (check, name, config, interp, cancelled)
+                )
+                results.append((name, interp, result))
+            
+            for name, interp, result in results:
+                yield name, interp, result.get()
+        finally:
+            cancelled.set()
+            self.transaction.cancel()
+            pool.close()
+            pool.join()
+            self.transaction.resume()
+            if not self.executor is None:
+                self.executor.close()
+            
+    def _run_check(self, check, name, config, interp, cancelled=None):
+        if not cancelled is None and cancelled.is_set():
+            self.logger.debug("Check %s cancelled before it started.", name)
+            return None
+        self.logger.debug("Starting check %s...", name)
+        return check.run(config, interp)
@@ -17,6 +17,8 @@
 Module that contains all classes that are necessary for the configuration.
 
 :Classes:
+    ConfigCache
+    
     Process
     
     Profile
@@ -28,15 +30,40 @@ Module that contains all classes that are necessary for the configuration.
     RepoGuardConfig
     
     TemplateConfig
+    
+    ValidationStamp
 """
 
 
+import cPickle
+import hashlib
 import os
 import re
+import tempfile
 
 from configobj import ConfigObj, Section
 
-from repoguard.core import constants
+from repoguard.core import constants, parser
+from repoguard.core.cache import DEFAULT_SIZE, DEFAULT_SPILL_SIZE
+from repoguard.core.registry import fingerprint
+
+
+def file_stamp(path):
+    """
+    Returns the path, size and modification time of a file. Size and time 
+    are None if the file does not exist.
+    
+    :param path: The path of the file.
+    :type path: string
+    
+    :rtype: tuple
+    """
+    
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path, None, None
+    return path, stat.st_size, stat.st_mtime
 
 
 class RepoGuardConfig(ConfigObj):
@@ -56,9 +83,11 @@ class RepoGuardConfig(ConfigObj):
         """
         
         ConfigObj.__init__(
-            self, config, raise_errors=True, file_error=True, 
+            self, parser.read(config), raise_errors=True, file_error=True, 
             write_empty_values=True, encoding='UTF-8', interpolation='template'
         )
+        if isinstance(config, basestring):
+            self.filename = config
         self._template_dirs = None
         self._projects = None
         
@@ -95,6 +124,105 @@ class RepoGuardConfig(ConfigObj):
     def _get_validate(self):
         return cmp(self.get('validate', 'True'), 'False')
     
+    def _get_backend(self):
+        """
+        Returns the transaction backend that has to be used.
+        
+        :return: The name of the backend.
+        :rtype: constants.SVNLOOK, constants.BINDINGS
+        """
+        
+        backend = self.get('backend', constants.SVNLOOK)
+        if not backend in constants.BACKENDS:
+            raise ValueError("Unknown transaction backend '%s'" % backend)
+        return backend
+    
+    def _get_cache_size(self):
+        """
+        Returns the number of bytes of svnlook output a transaction keeps 
+        in memory.
+        
+        :rtype: int
+        """
+        
+        return int(self.get('cache_size', DEFAULT_SIZE))
+    
+    def _get_cache_spill_size(self):
+        """
+        Returns the size in bytes from which on svnlook outputs are cached 
+        on disk instead of in memory.
+        
+        :rtype: int
+        """
+        
+        return int(self.get('cache_spill_size', DEFAULT_SPILL_SIZE))
+    
+    def _get_jobs(self):
+        """
+        Returns the number of checks of a profile that run concurrently.
+        
+        :rtype: int
+        """
+        
+        jobs = int(self.get('jobs', 1))
+        if jobs < 1:
+            raise ValueError("The number of jobs has to be positive")
+        return jobs
+    
+    def _get_processes(self):
+        """
+        Returns the number of processes the per-file work of checks is 
+        distributed to. 0 stands for one process per CPU.
+        
+        :rtype: int
+        """
+        
+        processes = int(self.get('processes', 1))
+        if processes < 0:
+            raise ValueError("The number of processes must not be negative")
+        return processes
+    
+    def _get_process_min_files(self):
+        """
+        Returns the minimum number of files for which the process pool is 
+        used.
+        
+        :rtype: int
+        """
+        
+        return int(self.get('process_min_files', 50))
+    
+    def _get_prefetch_workers(self):
+        """
+        Returns the number of files that are fetched concurrently before 
+        the checks of a profile run. 0 disables the prefetching, which is 
+        the default.
+        
+        :rtype: int
+        """
+        
+        return int(self.get('prefetch_workers', 0))
+    
+    def _get_plugin_manifest(self):
+        """
+        Returns the path of the file that persists the index of the 
+        installed checks and handlers or None if no manifest is used.
+        
+        :rtype: string
+        """
+        
+        return self.get('plugin_manifest') or None
+    
+    def _get_config_cache(self):
+        """
+        Returns the directory of the compiled configuration cache or None 
+        if the project configurations are not cached.
+        
+        :rtype: string
+        """
+        
+        return self.get('config_cache') or None
+    
     def _get_projects(self):
         """
         Returns a list of projects that are configured in the repoguard 
@@ -114,6 +242,15 @@ class RepoGuardConfig(ConfigObj):
     templates = property(_get_templates)
     projects = property(_get_projects)
     validate = property(_get_validate)
+    backend = property(_get_backend)
+    cache_size = property(_get_cache_size)
+    cache_spill_size = property(_get_cache_spill_size)
+    jobs = property(_get_jobs)
+    processes = property(_get_processes)
+    process_min_files = property(_get_process_min_files)
+    prefetch_workers = property(_get_prefetch_workers)
+    plugin_manifest = property(_get_plugin_manifest)
+    config_cache = property(_get_config_cache)
     
 class Project(Section):
     
@@ -174,7 +311,9 @@ class TemplateConfig(ConfigObj):
                        nfig-file>) for more details.
         :type config: string
         """
-        ConfigObj.__init__(self, config, encoding='UTF-8')
+        ConfigObj.__init__(self, parser.read(config), encoding='UTF-8')
+        if isinstance(config, basestring):
+            self.filename = config
         
     def _get_properties(self):
         """
@@ -486,13 +625,174 @@ class TemplateConfig(ConfigObj):
     properties = property(_get_properties, _set_properties)
     profiles = property(_get_profiles)
 
+class ConfigCache(object):
+    """
+    On-disk cache of merged configurations. Every entry records the path, 
+    size and modification time of the files it has been built from and is 
+    only used as long as none of them changed. The entries of templates 
+    are shared by all projects that extend them.
+    """
+    
+    def __init__(self, directory):
+        """
+        Constructor.
+        
+        :param directory: The directory that contains the cache entries. 
+                          It is created if it does not exist.
+        :type directory: string
+        """
+        
+        self.directory = directory
+        
+    def _entry_path(self, key):
+        return os.path.join(self.directory, hashlib.md5(repr(key)).hexdigest())
+    
+    def load(self, key):
+        """
+        Returns the cached value for the given key or None if there is no 
+        entry or one of its files changed.
+        
+        :param key: The key of the entry.
+        :type key: tuple
+        """
+        
+        try:
+            file_object = open(self._entry_path(key), "rb")
+            try:
+                entry_key, stamps, value = cPickle.load(file_object)
+            finally:
+                file_object.close()
+        except (IOError, EOFError, ValueError, cPickle.UnpicklingError):
+            return None
+        if entry_key != key or stamps != [file_stamp(path) for path, _, _ in stamps]:
+            return None
+        return value
+    
+    def store(self, key, paths, value):
+        """
+        Stores a value that has been built from the given files.
+        
+        :param key: The key of the entry.
+        :type key: tuple
+        
+        :param paths: The files and directories the value depends on.
+        :type paths: list of strings
+        
+        :param value: The picklable value.
+        """
+        
+        stamps = [file_stamp(path) for path in paths]
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # Concurrent hooks must never read a partially written entry.
+            handle, path = tempfile.mkstemp(dir=self.directory)
+            file_object = os.fdopen(handle, "wb")
+            try:
+                cPickle.dump((key, stamps, value), file_object, cPickle.HIGHEST_PROTOCOL)
+            finally:
+                file_object.close()
+            os.rename(path, self._entry_path(key))
+        except (IOError, OSError):
+            pass
+
+
+class ValidationStamp(object):
+    """
+    Records that a configuration has been validated successfully. The stamp 
+    contains a digest of the raw configuration values and of the installed 
+    plugins, so it is outdated as soon as the configuration, one of its 
+    templates or a check or handler distribution changes.
+    """
+    
+    def __init__(self, path):
+        """
+        Constructor.
+        
+        :param path: The path of the stamp file.
+        :type path: string
+        """
+        
+        self.path = path
+        
+    @staticmethod
+    def _raw_items(section):
+        """
+        Returns the values of the section without interpolation. The hooks 
+        location is left out because it does not affect the validation.
+        """
+        
+        items = []
+        for key in section.scalars:
+            if section.name != u'DEFAULT' or key != u'hooks':
+                items.append((key, dict.__getitem__(section, key)))
+        for key in section.sections:
+            items.append((key, ValidationStamp._raw_items(section[key])))
+        return items
+    
+    @classmethod
+    def digest(cls, config):
+        """
+        Returns the digest of the configuration and the installed plugins.
+        
+        :param config: The merged project configuration.
+        :type config: ProjectConfig
+        
+        :rtype: string
+        """
+        
+        return hashlib.md5(repr((fingerprint(), cls._raw_items(config)))).hexdigest()
+    
+    def matches(self, config):
+        """
+        Returns whether the configuration has been validated successfully 
+        in its current form.
+        
+        :param config: The merged project configuration.
+        :type config: ProjectConfig
+        
+        :rtype: boolean
+        """
+        
+        try:
+            file_object = open(self.path, "rb")
+            try:
+                recorded = file_object.read().strip()
+            finally:
+                file_object.close()
+        except IOError:
+            return False
+        return recorded == self.digest(config)
+    
+    def record(self, config):
+        """
+        Records the successful validation of the configuration. Failures to 
+        write the stamp are ignored, the next run validates again instead.
+        
+        :param config: The merged project configuration.
+        :type config: ProjectConfig
+        """
+        
+        try:
+            # Concurrent hooks must never read a partially written stamp.
+            handle, path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+            file_object = os.fdopen(handle, "wb")
+            try:
+                file_object.write(self.digest(config) + "\n")
+            finally:
+                file_object.close()
+            os.rename(path, self.path)
+        except (IOError, OSError):
+            pass
+
+
 class ProjectConfig(TemplateConfig):
     """
     The ProjectConfig is a class that extends the TemplateConfig by
     the ability of inheritance of template configurations.
     """
     
-    def __init__(self, config, hooks_location="hooks", template_dirs=None):
+    def __init__(self, config, hooks_location="hooks", template_dirs=None, cache=None):
         """
         Constructor.
         
@@ -508,6 +808,10 @@ class ProjectConfig(TemplateConfig):
         :param template_dirs: A list of directories where the repoguard
                               has to look for templates.
         :type template_dirs: list
+        
+        :param cache: The cache of merged configurations. It is only used 
+                      for configurations that are read from a file.
+        :type cache: ConfigCache
         """
         
         TemplateConfig.__init__(self)
@@ -518,15 +822,39 @@ class ProjectConfig(TemplateConfig):
         # Add the location of the hooks directory to the blank configuration.
         self.merge({u'DEFAULT' : {u'hooks' : hooks_location}})
         
-        self._initialize(config, template_dirs)
+        is_file = isinstance(config, str) and os.path.exists(config)
+        if cache is None or not is_file:
+            self._initialize(config, template_dirs)
+        else:
+            self._initialize_cached(config, template_dirs, cache)
         
         # Enables the template interpolation.
         self.interpolation = 'template'
         
-        if isinstance(config, str) and os.path.exists(config):
+        if is_file:
             self.filename = config
     
-    def _initialize(self, project, template_dirs=None):
+    def _initialize_cached(self, project, template_dirs, cache):
+        """
+        Initializes the project config from the cache. The merged 
+        configuration is stored without interpolation, because the 
+        hooks location differs between the repositories.
+        """
+        
+        project = os.path.abspath(project)
+        template_dirs = template_dirs or []
+        key = ("project", project, tuple(template_dirs))
+        entry = cache.load(key)
+        if entry is None:
+            entry = self._initialize(project, template_dirs, cache), self.extended
+            cache.store(
+                key, [project] + self.extended.values() + template_dirs, entry
+            )
+        else:
+            merged, self.extended = entry
+            self.merge(merged)
+    
+    def _initialize(self, project, template_dirs=None, cache=None):
         """
         Initalize the project config and merge them automatically with all 
         super templates.
@@ -536,44 +864,78 @@ class ProjectConfig(TemplateConfig):
         
         :param template_dirs: A list of paths where a template can be found.
         :type template_dirs: list
-        """
         
-        def extend(config, template_dirs):
-            """
-            Function to walk recursive up till the last extended class.
-            
-            :param config: The configuration that has to be extended.
-            :type config: ConfigObj
-            
-            :param template_dirs: A list of directories where templates
-                                  can be found.
-            :type template_dirs: list
-            """
-            
-            extends = config.get('extends', None)
-            if extends:
-                template_file = extends + constants.TEMPLATE_POSTFIX
-                for template_dir in template_dirs:
-                    template_path = os.path.join(template_dir, 
-                                                 template_file)
-                    if os.path.exists(template_path):
-                        template = TemplateConfig(template_path)
-                        template = extend(template, template_dirs)
-                        template.merge(config)
-                        self.extended[extends] = template_path
-                        
-                        return template
-                    
-                msg = "Unable to find template '%s' in %s"
-                raise ValueError(msg % (extends, " ,".join(template_dirs)))
-            return config
+        :param cache: The cache of the merged templates.
+        :type cache: ConfigCache
+        
+        :return: The project config merged with its templates.
+        :rtype: dict
+        """
         
         config = TemplateConfig(project)
         if template_dirs:
-            config = extend(config, template_dirs)
+            config = self._extend(config, template_dirs, cache)
         elif 'extends' in config:
             raise ValueError("Unable to extends. No template directory found.")
-        self.merge(config.dict())
+        merged = config.dict()
+        self.merge(merged)
+        return merged
+        
+    def _extend(self, config, template_dirs, cache=None):
+        """
+        Function to walk recursive up till the last extended class.
+        
+        :param config: The configuration that has to be extended.
+        :type config: ConfigObj
+        
+        :param template_dirs: A list of directories where templates
+                              can be found.
+        :type template_dirs: list
+        
+        :param cache: The cache of the merged templates.
+        :type cache: ConfigCache
+        """
+        
+        extends = config.get('extends', None)
+        if extends:
+            template_file = extends + constants.TEMPLATE_POSTFIX
+            for template_dir in template_dirs:
+                template_path = os.path.join(template_dir, 
+                                             template_file)
+                if os.path.exists(template_path):
+                    template = self._load_template(template_path, template_dirs, cache)
+                    template.merge(config)
+                    self.extended[extends] = template_path
+                    
+                    return template
+                
+            msg = "Unable to find template '%s' in %s"
+            raise ValueError(msg % (extends, " ,".join(template_dirs)))
+        return config
+    
+    def _load_template(self, path, template_dirs, cache=None):
+        """
+        Returns the template of the given path merged with all templates 
+        it extends.
+        """
+        
+        if cache is None:
+            return self._extend(TemplateConfig(path), template_dirs)
+        
+        key = ("template", path, tuple(template_dirs))
+        entry = cache.load(key)
+        if entry is None:
+            extended, self.extended = self.extended, {}
+            try:
+                template = self._extend(TemplateConfig(path), template_dirs, cache)
+                entry = template.dict(), self.extended
+            finally:
+                extended.update(self.extended)
+                self.extended = extended
+            cache.store(key, [path] + entry[1].values() + template_dirs, entry)
+        else:
+            self.extended.update(entry[1])
+        return TemplateConfig(entry[0])
         
 class Profile(Section):
     """
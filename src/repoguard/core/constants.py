@@ -19,6 +19,7 @@ Constants definition for the whole repoguard.
 import os
 
 NAME = "repoguard"
+VERSION = "0.3.0"
 
 CHECKS = "checks"
 HANDLERS = "handlers"
@@ -27,6 +28,10 @@ PRECOMMIT = "precommit"
 POSTCOMMIT = "postcommit"
 HOOKS = (PRECOMMIT, POSTCOMMIT)
 
+SVNLOOK = "svnlook"
+BINDINGS = "bindings"
+BACKENDS = (SVNLOOK, BINDINGS)
+
 SUCCESS = "success"
 WARNING = "warning"
 DELAYONERROR = "delayonerror"
@@ -42,6 +47,10 @@ CONFIG_POSTFIX = ".conf"
 TEMPLATE_POSTFIX = ".tpl.conf"
 CONFIG_FILENAME = "repoguard" + CONFIG_POSTFIX
 LOGGER_FILENAME = "logger" + CONFIG_POSTFIX
+PATH_INDEX_FILENAME = "repoguard.index"
+VALIDATION_STAMP_FILENAME = "repoguard.validated"
+PLAN_FILENAME = "repoguard.plan"
+SERVICE_SOCKET_FILENAME = "repoguard.sock"
 
 WIN32_CONFIG_PATTERN = "%s %s %%1 %%2 || exit 1"
 LINUX_CONFIG_PATTERN = "%s %s $1 $2 || exit 1"
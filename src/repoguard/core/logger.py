@@ -22,11 +22,183 @@ Logging factory facility to load logging _configuration from a _configuration fi
 import logging
 from logging import handlers
 import os
+import Queue
 import sys
+import threading
 
 from configobj import ConfigObj
 
-from repoguard.core import constants
+from repoguard.core import constants, parser
+
+try:
+    import fcntl
+except ImportError:
+    # File locks are not available on Windows.
+    fcntl = None
+
+
+class LazyMessage(object):
+    """
+    Logging argument that is built when the message of a record is
+    formatted. Nothing is built if the level of the record is disabled.
+    """
+    
+    __slots__ = ("_function", "_args")
+    
+    def __init__(self, function, *args):
+        """
+        Constructor.
+        
+        :param function: Function that returns the argument.
+        :type function: callable
+        
+        :param args: The arguments of the function.
+        """
+        
+        self._function = function
+        self._args = args
+        
+    def __str__(self):
+        return str(self._function(*self._args))
+
+
+class SharedRotatingFileHandler(handlers.RotatingFileHandler):
+    """
+    Rotating file handler that can be used by concurrent processes. Records
+    are written and the file is rotated under an exclusive lock of a lock 
+    file next to the log file. The log file is reopened when another 
+    process rotated it.
+    """
+    
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding=None):
+        handlers.RotatingFileHandler.__init__(
+            self, filename, maxBytes=maxBytes, backupCount=backupCount, 
+            encoding=encoding
+        )
+        self._lock_file = None
+        self._lock_pid = None
+    
+    def _lock(self):
+        # Forked processes share the locks of inherited file descriptors,
+        # so every process opens its own lock file.
+        if self._lock_pid != os.getpid():
+            if not self._lock_file is None:
+                self._lock_file.close()
+            self._lock_file = open(self.baseFilename + ".lock", "a")
+            self._lock_pid = os.getpid()
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        
+    def _reopen_rotated(self):
+        """
+        Reopens the log file if it has been rotated by another process.
+        """
+        
+        try:
+            current = os.stat(self.baseFilename)
+        except OSError:
+            current = None
+        opened = os.fstat(self.stream.fileno())
+        if current is None or (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+            self.stream.close()
+            self.stream = self._open()
+    
+    def emit(self, record):
+        if fcntl is None:
+            handlers.RotatingFileHandler.emit(self, record)
+            return
+        self._lock()
+        try:
+            if not self.stream is None:
+                self._reopen_rotated()
+            handlers.RotatingFileHandler.emit(self, record)
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+    
+    def close(self):
+        handlers.RotatingFileHandler.close(self)
+        if not self._lock_file is None:
+            self._lock_file.close()
+            self._lock_file = None
+            self._lock_pid = None
+
+
+class QueueHandler(logging.Handler):
+    """
+    Handler that passes the records to a background thread. The thread
+    formats and writes them with the wrapped handler, so the logging 
+    process never waits for file I/O. Forked child processes start their
+    own thread with the first record.
+    """
+    
+    def __init__(self, handler):
+        """
+        Constructor.
+        
+        :param handler: The handler that writes the records.
+        :type handler: logging.Handler
+        """
+        
+        logging.Handler.__init__(self)
+        self.handler = handler
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        
+    def _start(self):
+        if not self._pid is None:
+            # The thread of the parent process may have held the lock of
+            # the handler when this process has been forked.
+            self.handler.createLock()
+        self._queue = Queue.Queue()
+        self._thread = threading.Thread(target=self._write, args=(self._queue, ))
+        # The thread must not delay the exit of the process. Its records
+        # are written by the close method, which is called at exit.
+        self._thread.daemon = True
+        self._pid = os.getpid()
+        self._thread.start()
+        
+    def _write(self, queue):
+        while True:
+            record = queue.get()
+            try:
+                if record is None:
+                    return
+                self.handler.handle(record)
+            finally:
+                queue.task_done()
+                
+    def _is_running(self):
+        return self._pid == os.getpid() and self._thread.is_alive()
+    
+    def emit(self, record):
+        try:
+            if not self._is_running():
+                self._start()
+            # The arguments may be changed after the logging call returned,
+            # so the message is merged before the record is queued.
+            record.msg = record.getMessage()
+            record.args = None
+            self._queue.put(record)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except: # pylint: disable=W0702
+            self.handleError(record)
+            
+    def flush(self):
+        """
+        Waits until all queued records are written.
+        """
+        
+        if not self._thread is None and self._is_running():
+            self._queue.join()
+        self.handler.flush()
+        
+    def close(self):
+        if not self._thread is None and self._is_running():
+            self._queue.put(None)
+            self._thread.join()
+        self.handler.close()
+        logging.Handler.close(self)
 
 
 class LoggerFactory(object):
@@ -42,7 +214,10 @@ class LoggerFactory(object):
       - Specify 'output' for a custom output directory.
       - Specify 'max_bytes' to define the size of the logging file
       - Specify 'backup_count' to define the maximum number of created logging files
-      - Really everything is logged to this file.
+      - Specify 'file_level' to define the logging level of the file. By default
+        really everything is logged to this file.
+      - Specify 'queue = True' to write the file on a background thread.
+      - The file can be shared by concurrent processes.
     """
     
     _MESSAGE_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -61,7 +236,7 @@ class LoggerFactory(object):
             
             path = kwargs.get("config", constants.LOGGER_PATH)
             cls._configuration = ConfigObj(
-                path, encoding="UTF-8", interpolation="template"
+                parser.read(path), encoding="UTF-8", interpolation="template"
             )
             
             cls.default = kwargs.get("default", logging.ERROR)
@@ -89,10 +264,12 @@ class LoggerFactory(object):
             log_file_path = os.path.join(output_dir_path, name)
             max_bytes = long(cls._configuration.get("max_bytes", "5242880"))
             backup_count = int(cls._configuration.get("backup_count", "3"))
-            handler = handlers.RotatingFileHandler(
+            handler = SharedRotatingFileHandler(
                 log_file_path, encoding="UTF-8", maxBytes=max_bytes, backupCount=backup_count)
             handler.setFormatter(logging.Formatter(cls._MESSAGE_FORMAT))
-            handler.setLevel(logging.NOTSET)
+            handler.setLevel(cls._check_level(cls._configuration.get("file_level", logging.NOTSET)))
+            if str(cls._configuration.get("queue", False)).lower() in ("true", "yes", "on", "1"):
+                handler = QueueHandler(handler)
             return handler
 
     @classmethod
@@ -147,4 +324,25 @@ class LoggerFactory(object):
             level = self._configuration.get(name, default)
         level = self._check_level(level)
         self._stream_handler.setLevel(level)
+        # Disabled records are not created at all.
+        levels = [level]
+        if not self._file_handler is None:
+            levels.append(self._get_file_level())
+        logger.setLevel(min(levels))
         return logger
+    
+    def _get_file_level(self):
+        handler = self._file_handler
+        if isinstance(handler, QueueHandler):
+            handler = handler.handler
+        return handler.level
+    
+    def flush(self):
+        """
+        Waits until all records are written. Forked processes that exit
+        without running the exit handlers have to call it.
+        """
+        
+        self._stream_handler.flush()
+        if not self._file_handler is None:
+            self._file_handler.flush()
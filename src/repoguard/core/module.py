@@ -45,12 +45,11 @@ check and handler handling.
 import inspect
 import re
 
-import pkg_resources
-from validate import Validator
-
 from repoguard.core import constants
 from repoguard.core.protocol import ProtocolEntry
-from repoguard.core.logger import LoggerFactory
+from repoguard.core.logger import LazyMessage, LoggerFactory
+from repoguard.core.registry import PluginRegistry
+from repoguard.core.transaction import TransactionCancelledException
 
 
 def _objectname(obj):
@@ -70,6 +69,29 @@ def _objectname(obj):
         return obj.__class__.__name__
 
 
+_validator = None
+
+def _check_value(check, value):
+    """
+    Checks a value with the shared validator of the validate module. The 
+    module is imported on first use.
+    
+    :param check: The name of the check, e.g. "boolean" or "integer".
+    :type check: string
+    
+    :param value: The value that has to be checked.
+    :type value: object
+    
+    :return: The converted value.
+    """
+    
+    global _validator # pylint: disable=W0603
+    if _validator is None:
+        from validate import Validator
+        _validator = Validator()
+    return _validator.check(check, value)
+
+
 class Boolean(object):
     """
     Class that represents an boolean value.
@@ -94,7 +116,7 @@ class Boolean(object):
         
     @classmethod
     def validate(cls, value):
-        return Validator().check('boolean', value)
+        return _check_value('boolean', value)
 
 
 class String(object):
@@ -192,7 +214,7 @@ class Integer(object):
         :raises ValueError: Is raised when the given value is invalid.
         """
         
-        return Validator().check('integer', value)
+        return _check_value('integer', value)
     
             
 class Array(object):
@@ -256,20 +278,65 @@ class Array(object):
         return value
 
 
+def _is_attribute_type(value):
+    """
+    Returns whether a member of a types class declares an attribute.
+    """
+    
+    return not value is None and not isinstance(value, str)
+
+
+class _SerializerType(type):
+    """
+    Metaclass of the configuration serializers. It declares a slot for every 
+    attribute of the types class, so serializer instances have no instance 
+    dictionary.
+    """
+    
+    # Serializer classes that are used as attribute types are required and 
+    # have no default. As data descriptors of the metaclass these properties 
+    # take precedence over the slots of the same name.
+    optional = property(lambda cls: False)
+    default = property(lambda cls: None)
+    
+    def __new__(mcs, name, bases, namespace):
+        inherited = []
+        types = namespace.get('types')
+        for base in bases:
+            inherited.extend(getattr(base, '_slots', ()))
+            if types is None:
+                types = getattr(base, 'types', None)
+        
+        slots = list(namespace.get('__slots__', ()))
+        for field, _ in inspect.getmembers(types, _is_attribute_type):
+            if not field in inherited and not field in slots:
+                slots.append(field)
+        for field in slots:
+            # Class attributes of the same name only document the attributes.
+            namespace.pop(field, None)
+        namespace['__slots__'] = tuple(slots)
+        namespace['_slots'] = tuple(inherited + slots)
+        return type.__new__(mcs, name, bases, namespace)
+
+
 class ConfigSerializer(object):
     """
     Serializer class that converts given config in an object representation
-    and from an object representation to a config.
+    and from an object representation to a config. The objects that are 
+    created by from_config are read-only and can be pickled, so they can be 
+    shared between threads and sent to worker processes.
     """
     
+    __metaclass__ = _SerializerType
+    __slots__ = ('optional', 'default', '_frozen')
+    
     class types:
         # Special variable that is needed for the translation from the object to
         # the dictionary representation.
         id = String
-        
-    __section__ = None
-    optional = False
-    default = None
+    
+    # Field plans of all serializer classes.
+    _plans = {}
     
     def __init__(self, optional=False, default=None):
         """
@@ -284,12 +351,31 @@ class ConfigSerializer(object):
         :type default: object
         """
         
-        cls = self.__class__
-        for key, _ in inspect.getmembers(cls.types):
+        self.id = None
+        for key, _ in self._get_plan():
             setattr(self, key, None)
         self.optional = optional
         self.default = default
         
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError("Configuration '%s' is read-only." % _objectname(self))
+        object.__setattr__(self, name, value)
+        
+    def __delattr__(self, name):
+        if getattr(self, '_frozen', False):
+            raise AttributeError("Configuration '%s' is read-only." % _objectname(self))
+        object.__delattr__(self, name)
+        
+    def __getstate__(self):
+        return dict(
+            (name, getattr(self, name)) for name in self._slots if hasattr(self, name)
+        )
+    
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            object.__setattr__(self, name, value)
+        
     @classmethod
     def validate(cls, value):
         """
@@ -310,12 +396,32 @@ class ConfigSerializer(object):
         Protocol method for all invalid attributes.
         """
         
-        return not value is None and not isinstance(value, str)
+        return _is_attribute_type(value)
+    
+    @classmethod
+    def _get_plan(cls):
+        """
+        Returns the (name, type) tuples of all attributes that are 
+        deserialized. The plan is built once per class.
+        
+        :rtype: list of tuples
+        """
+        
+        plan = ConfigSerializer._plans.get(cls)
+        if plan is None:
+            plan = [
+                (name, clazz) 
+                    for name, clazz in inspect.getmembers(cls.types, ConfigSerializer.predicate)
+                        if cmp(name, 'id')
+            ]
+            ConfigSerializer._plans[cls] = plan
+        return plan
     
     @classmethod
     def from_config(cls, config):
         """
-        Converts a given config in a object representation.
+        Converts a given config in a read-only object representation. 
+        Array values are converted to tuples.
         
         :param cls: The class that has to be converted.
         :type cls: ConfigSerializer
@@ -324,48 +430,38 @@ class ConfigSerializer(object):
         :type config: dict
         """
         
-        def has_composite_key(config, key):
-            """
-            Checks if the given key is a composite key in config.
-            
-            @param config: The config where the given key has to be searched.
-            @type config: C{dict}
-            
-            @param key: The composite key.
-            @type key: C{string}
-            """
-            
-            if config:
-                for k in config.keys():
-                    if not cmp(k, key) or k.startswith(key + '.'):
-                        return True
-            return False            
+        # All keys and their dotted prefixes. A key is a composite key if 
+        # it is contained in this set.
+        composite_keys = set()
+        if config:
+            for key in config.keys():
+                parts = key.split('.')
+                for i in range(1, len(parts) + 1):
+                    composite_keys.add('.'.join(parts[:i]))
         
-        def walk(obj, config, path):
+        def walk(serializer, path, id_=None):
             """
             Method that walks through the class definitions and build
             the classes.
             
-            @param obj: The class that has to build.
-            @type obj: C{ConfigSerializer}
-            
-            @param config: The config that has to be build to an class.
-            @type config: C{dict}
+            @param serializer: The class that has to build.
+            @type serializer: C{ConfigSerializer}
             
             @param path: The current path where the method is running.
             @type path: C{list}
             
+            @param id_: The id of an array item.
+            @type id_: C{string}
+            
             @return: Returns the object representation for the given config.
             @rtype: C{ConfigSerializer}
             """
-
-            members = inspect.getmembers(obj.types, ConfigSerializer.predicate)
-            for name, clazz in members:
-                if not cmp(name, 'id'):
-                    continue 
-                          
+            
+            obj = serializer()
+            obj.id = id_
+            for name, clazz in serializer._get_plan():
                 key = '.'.join(path + [name])
-                if not has_composite_key(config, key):
+                if not key in composite_keys:
                     if not clazz.optional:
                         msg = "Unable to set attribute '%s' in class '%s'. " \
                             + "This paramter is not optional."
@@ -378,20 +474,22 @@ class ConfigSerializer(object):
                 if isinstance(clazz, Array):
                     if issubclass(clazz.serializer, ConfigSerializer):
                         value = [
-                            walk(
-                                clazz.serializer(), config, path + [name, item]
-                            ) for item in value
+                            walk(clazz.serializer, path + [name, item], item) 
+                                for item in value
                         ]
                 elif inspect.isclass(clazz) and issubclass(clazz, 
                                                            ConfigSerializer):
-                    value = walk(clazz(), config, path + [name])
+                    value = walk(clazz, path + [name])
                 elif isinstance(clazz, ConfigSerializer):
-                    value = walk(clazz, config, path + [name])
+                    # The declaration is shared, so a new object is built.
+                    value = walk(clazz.__class__, path + [name])
+                if isinstance(value, list):
+                    value = tuple(value)
                 setattr(obj, name, value)
+            obj._frozen = True
             return obj
         
-        cls.__section__ = config
-        return walk(cls(), config, [])
+        return walk(cls, [])
     
     def to_config(self):
         """
@@ -420,12 +518,7 @@ class ConfigSerializer(object):
             @rtype: C{dict}
             """
             
-            members = inspect.getmembers(obj.types, ConfigSerializer.predicate)
-            for name, clazz in members:
-                
-                if not cmp(name, 'id'):
-                    continue 
-                
+            for name, clazz in obj._get_plan():
                 key = '.'.join(path + [name])
                 value = getattr(obj, name)
                 if not value:
@@ -442,7 +535,8 @@ class ConfigSerializer(object):
                             walk(config, item, path + [name, item.id])
                             config[key].append(item.id)
                         continue
-                elif issubclass(clazz, ConfigSerializer):
+                elif isinstance(clazz, ConfigSerializer) or inspect.isclass(clazz) \
+                     and issubclass(clazz, ConfigSerializer):
                     walk(config, value, path + [name])
                     continue
                 
@@ -460,6 +554,7 @@ class Module(object):
     
     transaction = None
     logger = None
+    _configs = None
     
     def __new__(cls, transaction):
         """
@@ -483,9 +578,37 @@ class Module(object):
         
         # Generate an own logger for every module.
         obj.logger = LoggerFactory().create(cls.__module__)
+        
+        # Deserialized configurations by the id of their section.
+        obj._configs = {}
 
         return obj
     
+    def deserialize(self, config):
+        """
+        Returns the object representation of a configuration section. Every 
+        section is only deserialized once per module instance, so the checks 
+        and handlers of a hook run share the results.
+        
+        :param config: The configuration section of the module. Already 
+                       deserialized configurations, e.g. of a compiled 
+                       execution plan, are returned as they are.
+        :type config: C{Section}, ConfigSerializer
+        
+        :return: The deserialized configuration.
+        :rtype: ConfigSerializer
+        """
+        
+        if isinstance(config, ConfigSerializer):
+            return config
+        
+        # The entry keeps the section alive, so its id cannot be reused.
+        entry = self._configs.get(id(config))
+        if entry is None or not entry[0] is config:
+            entry = config, self.__config__.from_config(config)
+            self._configs[id(config)] = entry
+        return entry[1]
+    
     @staticmethod
     def config(config_class):
         """
@@ -522,6 +645,56 @@ class Check(Module):
     """
     Base object for all checks.
     """
+    
+    executor = None
+    
+    # Attributes of the changed files the check reads with get_file.
+    prefetch_attributes = ()
+    
+    def prefetch(self, config):
+        """
+        Returns the files the check will read with the given configuration.
+        These files are fetched concurrently before the checks of a profile 
+        run. By default the changed files with one of the prefetch_attributes 
+        are returned. Checks with other access patterns override this method.
+        
+        :param config: The check configuration that has to be used.
+        :type config: C{Section}
+        
+        :return: The filenames that are read by the check.
+        :rtype: list of strings
+        """
+        
+        if not self.prefetch_attributes:
+            return []
+        config = self.deserialize(config)
+        files = self.transaction.get_files(config.check_files, config.ignore_files)
+        return [
+            filename for filename, attribute in files.iteritems() 
+                if attribute in self.prefetch_attributes
+        ]
+    
+    def map_files(self, function, items):
+        """
+        Applies a per-file function to all items and returns the results in 
+        the order of the items. The items are processed on the process pool 
+        of the assigned executor if there is one. Therefore the function has 
+        to be defined on module level and the items have to be picklable, 
+        e.g. paths of the temporary file copies instead of file objects.
+        
+        :param function: The function that checks one file.
+        :type function: callable
+        
+        :param items: The arguments for the function calls.
+        :type items: list
+        
+        :return: The results of the function calls.
+        :rtype: list
+        """
+        
+        if self.executor is None:
+            return [function(item) for item in items]
+        return self.executor.map(function, items)
         
     @staticmethod
     def success(msg=""):
@@ -586,12 +759,16 @@ class Check(Module):
         """
         
         name = self.__class__.__name__
-        config = self.__config__.from_config(config)
+        config = self.deserialize(config)
         entry = ProtocolEntry(name, config)
         try:
             entry.start()
             entry.result, entry.msg = self._run(config)
             entry.end()
+        except TransactionCancelledException:
+            entry.result = constants.EXCEPTION
+            entry.msg = "Check '%s' has been cancelled." % name
+            self.logger.debug(entry.msg)
         except Exception, exc:
             if debug:
                 raise exc
@@ -669,7 +846,7 @@ class Handler(Module):
         :type debug: C{boolean}
         """
         
-        config = self.__config__.from_config(config)
+        config = self.deserialize(config)
             
         try:
             if not self._skip_entry(config, entry):
@@ -711,10 +888,12 @@ class Handler(Module):
         
         if not config.protocol is None:
             include, exclude = config.protocol.include, config.protocol.exclude
-            self.logger.debug("Include: %s", str(include))
-            self.logger.debug("Exclude: %s", str(exclude))
+            self.logger.debug("Include: %s", include)
+            self.logger.debug("Exclude: %s", exclude)
             protocol = protocol.filter(include, exclude)
-        self.logger.debug("Checks: " + str([entry.check for entry in protocol]))
+        self.logger.debug(
+            "Checks: %s", LazyMessage(lambda: [entry.check for entry in protocol])
+        )
         return protocol
     
     def summarize(self, config, protocol, debug=False):
@@ -733,7 +912,7 @@ class Handler(Module):
         :type debug: C{boolean}
         """
         
-        config = self.__config__.from_config(config)
+        config = self.deserialize(config)
         protocol = self._prepare_protocol(config, protocol)
         try:
             self._summarize(config, protocol)
@@ -781,10 +960,7 @@ class CheckManager(object):
         :rtype: C{list<string>}
         """
         
-        result = list()
-        for entrypoint in pkg_resources.iter_entry_points(self._group):
-            result.append(entrypoint.name)
-        return result
+        return PluginRegistry.get(self._group).names
     
     def load(self, name):
         """
@@ -797,10 +973,7 @@ class CheckManager(object):
         :rtype: C{Check}, C{Handler}
         """
         
-        for entrypoint in pkg_resources.iter_entry_points(self._group):
-            if entrypoint.name == name:
-                return entrypoint.load()
-        raise ImportError("Entry point %s not found" % name)
+        return PluginRegistry.get(self._group).load(name)
     
     def fetch(self, module, transaction=None):
         """
@@ -817,8 +990,10 @@ class CheckManager(object):
         :rtype: C{Check}, C{Handler}
         """
         
-        instance = self.cache.get(module, self.load(module)(transaction))
-        self.cache[module] = instance
+        instance = self.cache.get(module)
+        if instance is None:
+            instance = self.load(module)(transaction)
+            self.cache[module] = instance
         return instance
     
     available_modules = property(_get_available_modules)
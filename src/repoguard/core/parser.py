@@ -0,0 +1,175 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Fast parser for the configuration files of RepoGuard.
+
+The configuration files only use a small subset of the ConfigObj syntax:
+nested sections, single and quoted values, comma separated lists and
+comments. Values like ${hooks} are interpolated by ConfigObj when they are
+accessed, so they are kept unchanged. Content that uses any other ConfigObj
+feature, e.g. quoted list items or multiline values, is left to the
+ConfigObj parser.
+"""
+
+
+import os
+import re
+
+
+_SECTION = re.compile(r"^(\[+)([^\[\]#'\"]+)(\]+)\s*(?:#.*)?$")
+_QUOTED_VALUE = re.compile(r"""^([^'"=]+)=\s*(?:'([^']*)'|"([^"]*)")\s*(?:#.*)?$""")
+
+
+class ParsedSection(dict):
+    """
+    Dictionary of a parsed section that iterates its keys in their
+    configured order. It is much faster than an OrderedDict, but only
+    supports adding keys.
+    """
+
+    __slots__ = ("_keys", )
+
+    def __init__(self):
+        dict.__init__(self)
+        self._keys = []
+
+    def __setitem__(self, key, value):
+        if not key in self:
+            self._keys.append(key)
+        dict.__setitem__(self, key, value)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def items(self):
+        return [(key, self[key]) for key in self._keys]
+
+
+
+def parse(lines):
+    """
+    Parses the given configuration lines.
+
+    :param lines: The lines of the configuration.
+    :type lines: list of unicode strings
+
+    :return: The sections and values in their configured order or None
+             if the lines use syntax that is not supported by this parser
+             or are no valid ConfigObj configuration.
+    :rtype: ParsedSection
+    """
+
+    root = ParsedSection()
+    stack = [root]
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] == "#":
+            continue
+        if line[0] == "[":
+            match = _SECTION.match(line)
+            if match is None:
+                return None
+            depth, name = len(match.group(1)), match.group(2).strip()
+            if depth != len(match.group(3)) or depth > len(stack) or not name:
+                return None
+            parent = stack[depth - 1]
+            if name in parent:
+                return None
+            section = ParsedSection()
+            parent[name] = section
+            del stack[depth:]
+            stack.append(section)
+            continue
+
+        if "'" in line or '"' in line:
+            match = _QUOTED_VALUE.match(line)
+            if match is None:
+                return None
+            key, value = match.group(1).strip(), match.group(2)
+            if value is None:
+                value = match.group(3)
+            if not key or key in stack[-1]:
+                return None
+            stack[-1][key] = value
+            continue
+
+        key, separator, value = line.partition("=")
+        key = key.strip()
+        if not separator or not key or key in stack[-1]:
+            return None
+        value = value.split("#", 1)[0].strip()
+        if not value:
+            # ConfigObj returns a byte string for empty values.
+            value = ""
+        elif value == ",":
+            value = []
+        elif "," in value:
+            value = [item.strip() for item in value.split(",")]
+            if not value[-1]:
+                value.pop()
+            if not all(value):
+                return None
+        stack[-1][key] = value
+    return root
+
+def read(infile, encoding="UTF-8"):
+    """
+    Parses a configuration file or a list of configuration lines.
+
+    :param infile: The path of the configuration file or its lines. All
+                   other kinds of input are returned unchanged.
+    :type infile: string or list
+
+    :param encoding: The encoding of the configuration.
+    :type encoding: string
+
+    :return: The parsed configuration or infile if it cannot be parsed by
+             this module. In this case ConfigObj has to parse it.
+    :rtype: ParsedSection
+    """
+
+    if isinstance(infile, basestring):
+        if not os.path.isfile(infile):
+            return infile
+        file_object = open(infile, "rb")
+        try:
+            content = file_object.read()
+        finally:
+            file_object.close()
+        try:
+            lines = content.decode(encoding).splitlines()
+        except UnicodeDecodeError:
+            return infile
+    elif isinstance(infile, (list, tuple)):
+        try:
+            lines = [
+                line if isinstance(line, unicode) else line.decode(encoding)
+                    for line in infile
+            ]
+        except UnicodeDecodeError:
+            return infile
+    else:
+        return infile
+
+    if lines and lines[0].startswith(u"\ufeff"):
+        lines[0] = lines[0][1:]
+    parsed = parse(lines)
+    if parsed is None:
+        return infile
+    return parsed
@@ -0,0 +1,264 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Persistent index of all paths of a repository.
+
+The index is a SQLite database that is stored in the hooks directory.
+It contains every path of a revision with an exact and a case-folded key.
+Both keys are indexed so that existence and case-insensitive lookups are
+B-tree lookups instead of scans of the complete repository tree. The
+post-commit run updates the index incrementally with the changed paths
+of every new revision. The index uses write-ahead logging, so readers
+can keep a consistent snapshot while another process updates it.
+"""
+
+
+import sqlite3
+
+from repoguard.core.transaction import Transaction
+
+
+def _normalize(path):
+    """
+    Returns the path without leading and trailing slashes.
+    """
+
+    return path.strip("/")
+
+def _subtree_end(path):
+    """
+    Returns the smallest string that is greater than all paths below
+    the given directory path.
+    """
+
+    return path + "0" # "0" is the character following "/".
+
+
+class PathIndex(object):
+    """
+    On-disk index of all paths of a repository revision.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS paths (
+            path TEXT PRIMARY KEY,
+            folded TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS paths_folded ON paths (folded);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path, timeout=30.0):
+        """
+        Constructor.
+
+        :param path: Path of the index file. It is created if it does not
+                     exist.
+        :type path: string
+
+        :param timeout: Seconds to wait for a lock held by another process.
+        :type timeout: float
+        """
+
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=timeout)
+        self._connection.isolation_level = None
+        self._connection.text_factory = str
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(self._SCHEMA)
+
+    def close(self):
+        """
+        Closes the index file.
+        """
+
+        self._connection.close()
+
+    def _get_revision(self):
+        """
+        Returns the revision the index represents or None if the index
+        has not been built yet.
+
+        :rtype: int
+        """
+
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        if row is None:
+            return None
+        return int(row[0])
+
+    def _set_revision(self, revision):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('revision', ?)",
+            (str(revision),))
+
+    def begin_read(self):
+        """
+        Starts a read transaction. All further queries see the index as it
+        is now, even if another process updates it meanwhile. The read 
+        transaction ends with end_read or when the index is closed.
+
+        :return: The revision the snapshot represents.
+        :rtype: int
+        """
+
+        self._connection.execute("BEGIN")
+        return self.revision
+
+    def end_read(self):
+        """
+        Ends the read transaction that has been started with begin_read.
+        """
+
+        self._connection.execute("ROLLBACK")
+
+    def exists(self, path):
+        """
+        Returns whether the given file or directory exists.
+
+        :param path: The repository path.
+        :type path: string
+
+        :rtype: boolean
+        """
+
+        row = self._connection.execute(
+            "SELECT 1 FROM paths WHERE path = ?", (_normalize(path),)).fetchone()
+        return not row is None
+
+    def find_ignore_case(self, path):
+        """
+        Returns all paths that are equal to the given path ignoring the case.
+
+        :param path: The repository path.
+        :type path: string
+
+        :rtype: list of strings
+        """
+
+        rows = self._connection.execute(
+            "SELECT path FROM paths WHERE folded = ?",
+            (_normalize(path).lower(),))
+        return [row[0] for row in rows]
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM paths").fetchone()[0]
+
+    def _add(self, paths):
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO paths (path, folded) VALUES (?, ?)",
+            ((path, path.lower()) for path in (_normalize(p) for p in paths) if path))
+
+    def _remove(self, path):
+        path = _normalize(path)
+        self._connection.execute(
+            "DELETE FROM paths WHERE path = ? OR (path > ? AND path < ?)",
+            (path, path + "/", _subtree_end(path)))
+
+    def rebuild(self, transaction):
+        """
+        Rebuilds the complete index from the tree of the given revision.
+
+        :param transaction: The revision that has to be indexed.
+        :type transaction: Transaction
+        """
+
+        tree = transaction._get_tree() # pylint: disable=W0212
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.execute("DELETE FROM paths")
+            self._add(tree)
+            self._set_revision(int(transaction.txn_name))
+            self._connection.execute("COMMIT")
+        except:
+            self._connection.execute("ROLLBACK")
+            raise
+
+    def update(self, transaction):
+        """
+        Applies the changes of the given revision to the index. The index
+        has to represent the preceding revision.
+
+        :param transaction: The revision that has to be applied.
+        :type transaction: Transaction
+        """
+
+        # pylint: disable=W0212
+        revision = int(transaction.txn_name)
+        if self.revision != revision - 1:
+            return
+        changed = transaction._get_changed_paths()
+        # Copied directories only appear with their root. Their trees are 
+        # read before the write lock is taken. All other added directories 
+        # list their children themselves.
+        copied = set(path.strip("/") for path in transaction._get_copied_paths())
+        trees = dict(
+            (filename, transaction._get_tree(filename)) for filename, attributes in changed
+                if attributes[0] in ("A", "R") and filename.endswith("/") 
+                and filename.strip("/") in copied
+        )
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            if self.revision != revision - 1:
+                # Another process already applied the revision.
+                self._connection.execute("ROLLBACK")
+                return
+            for filename, attributes in changed:
+                if attributes[0] in ("D", "R"):
+                    self._remove(filename)
+                if attributes[0] in ("A", "R"):
+                    self._add(trees.get(filename, [filename]))
+            self._set_revision(revision)
+            self._connection.execute("COMMIT")
+        except:
+            self._connection.execute("ROLLBACK")
+            raise
+
+    def synchronize(self, repos_path, revision, transaction_class=Transaction, limit=None):
+        """
+        Brings the index up to the given revision by applying all revisions
+        that have not been applied yet.
+
+        :param repos_path: The path to the repository.
+        :type repos_path: string
+
+        :param revision: The revision the index has to represent afterwards.
+        :type revision: int
+
+        :param transaction_class: The transaction backend that is used.
+        :type transaction_class: Transaction
+
+        :param limit: The maximum number of revisions that are applied. 
+                      The index stays behind if more revisions are missing.
+        :type limit: int
+        """
+
+        current = self.revision
+        if current is None:
+            return
+        if not limit is None:
+            revision = min(revision, current + limit)
+        for number in range(current + 1, revision + 1):
+            transaction = transaction_class(repos_path, str(number))
+            try:
+                self.update(transaction)
+            finally:
+                transaction.cleanup()
+
+    revision = property(_get_revision)
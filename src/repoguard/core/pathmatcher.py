@@ -0,0 +1,195 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compiled matching of repository paths against lists of regular expressions.
+"""
+
+
+import re
+
+
+# Patterns which change their meaning when they are combined with others.
+_NOT_COMBINABLE = re.compile(r"\\[1-9]|\(\?P=|\(\?[iLmsux]+\)")
+
+# Patterns like "^project/trunk/" or "^project/.*" which match a literal prefix.
+_LITERAL_PREFIX = re.compile(r"^\^((?:[^.^$*+?{}\[\]\\|()]|\\[^A-Za-z0-9])*)(?:\.\*)?$")
+
+
+def _literal_prefix(pattern):
+    """
+    Returns the literal prefix a pattern matches or None if the pattern 
+    is no plain prefix pattern.
+    """
+
+    match = _LITERAL_PREFIX.match(pattern)
+    if match is None:
+        return None
+    return re.sub(r"\\(.)", r"\1", match.group(1))
+
+
+class PathMatcher(object):
+    """
+    Matches paths against a list of patterns which have to be included
+    and a list of patterns which have to be ignored. Every pattern list is
+    compiled once into a single regular expression. Lists whose patterns
+    cannot be combined are matched pattern by pattern.
+    """
+
+    _matchers = {}
+
+    def __init__(self, check_list, ignore_list):
+        """
+        Constructor.
+
+        :param check_list: Patterns of paths which have to be included.
+        :type check_list: list of strings
+
+        :param ignore_list: Patterns of paths which have to be ignored.
+        :type ignore_list: list of strings
+        """
+
+        self._check = self._compile(check_list)
+        self._ignore = self._compile(ignore_list)
+
+    @classmethod
+    def create(cls, check_list, ignore_list):
+        """
+        Returns the matcher for the given pattern lists. Matchers are shared
+        by all callers which use the same patterns.
+        """
+
+        key = (tuple(check_list), tuple(ignore_list))
+        matcher = cls._matchers.get(key)
+        if matcher is None:
+            matcher = cls(check_list, ignore_list)
+            cls._matchers[key] = matcher
+        return matcher
+
+    @staticmethod
+    def _compile(patterns):
+        """
+        Returns a function that tells whether any of the patterns matches
+        a path.
+        """
+
+        if not patterns:
+            return lambda path: False
+
+        if len(patterns) > 1 and not any(_NOT_COMBINABLE.search(pattern) for pattern in patterns):
+            try:
+                return re.compile("|".join("(?:%s)" % pattern for pattern in patterns)).search
+            except (re.error, AssertionError):
+                # Python 2 limits the number of groups with an assertion.
+                pass
+        regexes = [re.compile(pattern) for pattern in patterns]
+        if len(regexes) == 1:
+            return regexes[0].search
+        return lambda path: any(regex.search(path) for regex in regexes)
+
+    def match(self, path):
+        """
+        Returns whether the path is included and not ignored.
+
+        :param path: The path that has to be matched.
+        :type path: string
+
+        :rtype: boolean
+        """
+
+        return bool(self._check(path)) and not self._ignore(path)
+
+    def filter(self, paths):
+        """
+        Returns the paths which are included and not ignored.
+
+        :param paths: The paths that have to be matched.
+        :type paths: iterable of strings
+
+        :rtype: list of strings
+        """
+
+        check, ignore = self._check, self._ignore
+        return [path for path in paths if check(path) and not ignore(path)]
+
+
+class ProfileRouter(object):
+    """
+    Assigns every changed path to the profiles that cover it. Profiles 
+    whose regex is a literal prefix are looked up in a prefix trie, all 
+    other regexes are matched one by one. Paths that are not covered by 
+    any profile with a regex belong to the profiles without a regex.
+    """
+
+    def __init__(self, profiles):
+        """
+        Constructor.
+
+        :param profiles: The (name, regex) tuples of all profiles in their 
+                         configured order. The regex of default profiles 
+                         is None.
+        :type profiles: list of tuples
+        """
+
+        self._names = []
+        self._defaults = []
+        self._regexes = []
+        self._trie = {}
+        for name, regex in profiles:
+            self._names.append(name)
+            if regex is None:
+                self._defaults.append(name)
+                continue
+            prefix = _literal_prefix(regex)
+            if prefix is None:
+                self._regexes.append((name, re.compile(regex)))
+            else:
+                node = self._trie
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, []).append(name)
+
+    def _match_prefixes(self, path):
+        node = self._trie
+        names = list(node.get(None, ()))
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                break
+            names.extend(node.get(None, ()))
+        return names
+
+    def route(self, changes):
+        """
+        Returns a dictionary that maps every profile name to the list of 
+        (filename, attributes) tuples of the paths it covers.
+
+        :param changes: The (filename, attributes) tuples of all changed paths.
+        :type changes: list of tuples
+
+        :rtype: dict
+        """
+
+        partitions = dict((name, []) for name in self._names)
+        for change in changes:
+            filename = change[0]
+            names = self._match_prefixes(filename)
+            for name, regex in self._regexes:
+                if regex.search(filename):
+                    names.append(name)
+            if not names:
+                names = self._defaults
+            for name in names:
+                partitions[name].append(change)
+        return partitions
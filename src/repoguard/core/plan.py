@@ -0,0 +1,282 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Ahead-of-time compiled execution plans.
+
+A plan contains everything a hook run derives from the project
+configuration: the profiles in their configured order, the parsed check
+and handler lists of their processes, the deserialized check and handler
+configurations and the plugin classes. The plan file starts with a header
+that identifies the files and plugins the plan has been compiled from, so
+a stale plan is detected before its plugins are imported.
+"""
+
+
+import cPickle
+import os
+import tempfile
+
+from repoguard.core import constants
+from repoguard.core.config import file_stamp
+from repoguard.core.module import CheckManager, HandlerManager
+from repoguard.core.registry import PluginRegistry, fingerprint
+
+
+# Has to be incremented whenever the structure of the plan changes.
+PLAN_VERSION = 1
+
+
+class CompiledProcess(object):
+    """
+    Precommit or postcommit process of a compiled profile. It provides the
+    checks, success and error attributes of a Process.
+    """
+
+    __slots__ = ("checks", "success", "error")
+
+    def __init__(self, checks, success, error):
+        """
+        Constructor.
+
+        :param checks: The (name, config, interp) tuples of the checks.
+        :type checks: list of tuples
+
+        :param success: The (name, config) tuples of the success handlers.
+        :type success: list of tuples
+
+        :param error: The (name, config) tuples of the error handlers.
+        :type error: list of tuples
+        """
+
+        self.checks = checks
+        self.success = success
+        self.error = error
+
+
+class CompiledProfile(object):
+    """
+    Profile of a compiled plan. It provides the name, regex and get_process
+    members of a Profile.
+    """
+
+    __slots__ = ("name", "regex", "processes")
+
+    def __init__(self, name, regex, processes):
+        """
+        Constructor.
+
+        :param name: The name of the profile.
+        :type name: string
+
+        :param regex: The regex of the profile or None for default profiles.
+        :type regex: string
+
+        :param processes: Maps the hooks to their compiled processes.
+        :type processes: dict
+        """
+
+        self.name = name
+        self.regex = regex
+        self.processes = processes
+
+    def get_process(self, hook):
+        """
+        Returns the process for the given hook or None if the profile has
+        no process for this hook.
+
+        :param hook: Pre- or postcommit process.
+        :type hook: constants.PRECOMMIT, constants.POSTCOMMIT
+
+        :rtype: CompiledProcess
+        """
+
+        if not hook in constants.HOOKS:
+            raise ValueError("Unknown hook with the name '%s'", hook)
+        return self.processes.get(hook)
+
+
+class ExecutionPlan(object):
+    """
+    Compiled form of a validated project configuration. It can be used
+    instead of the ProjectConfig to run the hooks.
+    """
+
+    def __init__(self, profiles, plugins, template_dirs=(), stamps=(),
+                 plugin_fingerprint=None):
+        """
+        Constructor.
+
+        :param profiles: The compiled profiles in their configured order.
+        :type profiles: list of CompiledProfile
+
+        :param plugins: Maps constants.CHECKS and constants.HANDLERS to
+                        dictionaries of the plugin classes by name.
+        :type plugins: dict
+
+        :param template_dirs: The template directories of the compilation.
+        :type template_dirs: tuple of strings
+
+        :param stamps: The file stamps of the project configuration, its
+                       templates and the template directories.
+        :type stamps: list of tuples
+
+        :param plugin_fingerprint: The fingerprint of the installed plugins.
+        :type plugin_fingerprint: string
+        """
+
+        self.profiles = profiles
+        self.plugins = plugins
+        self.template_dirs = tuple(template_dirs)
+        self.stamps = list(stamps)
+        self.plugin_fingerprint = plugin_fingerprint
+
+    @classmethod
+    def compile(cls, config, template_dirs=None):
+        """
+        Compiles a validated project configuration.
+
+        :param config: The project configuration. It has to be read from
+                       a file.
+        :type config: ProjectConfig
+
+        :param template_dirs: The template directories the configuration
+                              has been merged with.
+        :type template_dirs: list of strings
+
+        :raise ImportError: If a check or handler cannot be loaded.
+
+        :rtype: ExecutionPlan
+        """
+
+        template_dirs = template_dirs or []
+        managers = {
+            constants.CHECKS : CheckManager(),
+            constants.HANDLERS : HandlerManager()
+        }
+        plugins = {constants.CHECKS : {}, constants.HANDLERS : {}}
+
+        def resolve(type_, name, section):
+            plugin = plugins[type_].get(name)
+            if plugin is None:
+                plugin = managers[type_].load(name)
+                plugins[type_][name] = plugin
+            return plugin.__config__.from_config(section)
+
+        profiles = []
+        for profile in config.profiles:
+            processes = {}
+            for hook in constants.HOOKS:
+                process = profile.get_process(hook)
+                if not process:
+                    continue
+                processes[hook] = CompiledProcess(
+                    [
+                        (name, resolve(constants.CHECKS, name, section), interp)
+                            for name, section, interp in process.checks
+                    ], [
+                        (name, resolve(constants.HANDLERS, name, section))
+                            for name, section in process.success
+                    ], [
+                        (name, resolve(constants.HANDLERS, name, section))
+                            for name, section in process.error
+                    ]
+                )
+            profiles.append(CompiledProfile(profile.name, profile.regex, processes))
+
+        paths = [os.path.abspath(config.filename)] + config.extended.values() + template_dirs
+        return cls(
+            profiles, plugins, template_dirs, [file_stamp(path) for path in paths],
+            fingerprint()
+        )
+
+    def _get_header(self):
+        return (
+            PLAN_VERSION, constants.VERSION, self.template_dirs, self.stamps,
+            self.plugin_fingerprint
+        )
+
+    def dump(self, path):
+        """
+        Writes the plan to the given file.
+
+        :param path: The path of the plan file.
+        :type path: string
+        """
+
+        # Concurrent hooks must never read a partially written plan.
+        handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            file_object = os.fdopen(handle, "wb")
+            try:
+                cPickle.dump(self._get_header(), file_object, cPickle.HIGHEST_PROTOCOL)
+                cPickle.dump(
+                    (self.profiles, self.plugins), file_object, cPickle.HIGHEST_PROTOCOL
+                )
+            finally:
+                file_object.close()
+            os.rename(tmp_path, path)
+        except: # pylint: disable=W0702
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, template_dirs=None):
+        """
+        Reads a plan file.
+
+        :param path: The path of the plan file.
+        :type path: string
+
+        :param template_dirs: The current template directories.
+        :type template_dirs: list of strings
+
+        :return: The plan or None if the file does not exist, is corrupt or
+                 one of the files or plugins the plan has been compiled
+                 from changed.
+        :rtype: ExecutionPlan
+        """
+
+        try:
+            file_object = open(path, "rb")
+        except IOError:
+            return None
+        try:
+            try:
+                header = cPickle.load(file_object)
+                version, repoguard_version, dirs, stamps, plugin_fingerprint = header
+                if version != PLAN_VERSION or repoguard_version != constants.VERSION \
+                   or dirs != tuple(template_dirs or ()) \
+                   or stamps != [file_stamp(stamp[0]) for stamp in stamps] \
+                   or plugin_fingerprint != fingerprint():
+                    return None
+                profiles, plugins = cPickle.load(file_object)
+            finally:
+                file_object.close()
+        except (EOFError, ValueError, TypeError, AttributeError, ImportError,
+                cPickle.UnpicklingError):
+            return None
+        return cls(profiles, plugins, dirs, stamps, plugin_fingerprint)
+
+    def register_plugins(self):
+        """
+        Registers the plugin classes of the plan, so they are used without
+        looking up their entry points.
+        """
+
+        for type_, plugins in self.plugins.iteritems():
+            registry = PluginRegistry.get("repoguard." + type_)
+            for name, plugin in plugins.iteritems():
+                registry.register(name, plugin)
@@ -19,6 +19,10 @@
 
 import subprocess
 import sys
+import tempfile
+
+
+CHUNK_SIZE = 64 * 1024
 
 
 class ProcessException(Exception):
@@ -83,6 +87,41 @@ def execute(command, raw_out=False):
     else:
         raise ProcessException(_decode_to_unicode(command), exit_code, output)
 
+def stream(command, file_object, chunk_size=CHUNK_SIZE):
+    """
+    Executes a given command as external process and writes its output 
+    in chunks to the given file object. The output is never held in 
+    memory as a whole.
+    
+    :param command: The command that has to be executed.
+    :type command: string
+    :param file_object: The file object the output is written to.
+    :type file_object: file
+    :param chunk_size: The maximum number of bytes that are read at once.
+    :type chunk_size: int
+    
+    :raises ProcessException: Is raised when the process execution failed.
+    """
+    
+    errors = tempfile.TemporaryFile()
+    try:
+        process = subprocess.Popen(
+            command, shell=True, stdout=subprocess.PIPE, stderr=errors)
+        while True:
+            chunk = process.stdout.read(chunk_size)
+            if not chunk:
+                break
+            file_object.write(chunk)
+        process.stdout.close()
+        exit_code = process.wait()
+        
+        if exit_code != 0:
+            errors.seek(0)
+            output = _decode_to_unicode(errors.read())
+            raise ProcessException(_decode_to_unicode(command), exit_code, output)
+    finally:
+        errors.close()
+
 def _decode_to_unicode(binary_string, raw_out=False):
     if raw_out:
         return binary_string
@@ -0,0 +1,267 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Registry of the plugins that are published as entry points.
+
+The entry points of a group are indexed once per process and plugin
+modules are imported when a plugin is loaded for the first time. The
+index can be persisted to a manifest file. The manifest is only used as
+long as the installed distributions did not change, so pkg_resources
+does not have to be imported at all when the manifest is valid.
+"""
+
+
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+
+_DISTRIBUTION_INFO = (
+    (".egg-info", "entry_points.txt"),
+    (".dist-info", "entry_points.txt"),
+    (".egg", os.path.join("EGG-INFO", "entry_points.txt"))
+)
+
+
+def _get_linked_info_paths(link_path):
+    """
+    Returns the entry point files of a distribution that has been installed 
+    with setup.py develop. The first line of its egg-link file is the 
+    directory that contains the egg-info of the project.
+    """
+
+    try:
+        link_file = open(link_path)
+        try:
+            project_dir = link_file.readline().strip()
+        finally:
+            link_file.close()
+    except IOError:
+        return []
+    if not project_dir:
+        return []
+    project_dir = os.path.join(os.path.dirname(link_path), project_dir)
+    return sorted(glob.glob(os.path.join(project_dir, "*.egg-info", "entry_points.txt")))
+
+
+def fingerprint():
+    """
+    Returns a fingerprint of the installed distributions. It changes when
+    a distribution is installed, removed or its entry points are changed.
+
+    :rtype: string
+    """
+
+    stamps = []
+    for path in sys.path:
+        if not os.path.isdir(path):
+            continue
+        stamps.append((path, os.path.getmtime(path)))
+        for name in sorted(os.listdir(path)):
+            info_paths = []
+            if name.endswith(".egg-link"):
+                info_paths = _get_linked_info_paths(os.path.join(path, name))
+            for extension, info in _DISTRIBUTION_INFO:
+                if name.endswith(extension):
+                    info_paths.append(os.path.join(path, name, info))
+            for info_path in info_paths:
+                if os.path.exists(info_path):
+                    stamps.append((info_path, os.path.getmtime(info_path)))
+    return hashlib.md5(repr(stamps)).hexdigest()
+
+
+class _ManifestEntry(object):
+    """
+    Entry point that has been read from the manifest.
+    """
+
+    def __init__(self, name, module_name, attrs):
+        self.name = name
+        self.module_name = str(module_name)
+        self.attrs = [str(attr) for attr in attrs]
+
+    def load(self):
+        obj = __import__(self.module_name, fromlist=["__name__"])
+        for attr in self.attrs:
+            obj = getattr(obj, attr)
+        return obj
+
+
+class PluginRegistry(object):
+    """
+    Index of the entry points of one group. Use get to obtain the shared
+    registry of a group.
+    """
+
+    # Path of the manifest file. The manifest is not used if it is None.
+    manifest_path = None
+
+    _registries = {}
+
+    def __init__(self, group):
+        """
+        Constructor.
+
+        :param group: The entry point group, e.g. "repoguard.checks".
+        :type group: string
+        """
+
+        self.group = group
+        self._entries = None
+        self._plugins = {}
+
+    @classmethod
+    def get(cls, group):
+        """
+        Returns the registry of the given group.
+
+        :param group: The entry point group.
+        :type group: string
+
+        :rtype: PluginRegistry
+        """
+
+        registry = cls._registries.get(group)
+        if registry is None:
+            registry = cls(group)
+            cls._registries[group] = registry
+        return registry
+
+    @classmethod
+    def reset(cls):
+        """
+        Discards the registries of all groups.
+        """
+
+        cls._registries.clear()
+
+    def _get_entries(self):
+        if self._entries is None:
+            entries = None
+            if not self.manifest_path is None:
+                entries = self._read_manifest()
+            if entries is None:
+                import pkg_resources
+                entries = dict(
+                    (entrypoint.name, entrypoint)
+                    for entrypoint in pkg_resources.iter_entry_points(self.group)
+                )
+                if not self.manifest_path is None:
+                    self._write_manifest(entries)
+            self._entries = entries
+        return self._entries
+
+    def _read_manifest(self):
+        """
+        Returns the entries of the group from the manifest or None if the
+        manifest does not exist, is outdated or does not contain the group.
+        """
+
+        try:
+            file_object = open(self.manifest_path, "rb")
+            try:
+                manifest = json.load(file_object)
+            finally:
+                file_object.close()
+        except (IOError, ValueError):
+            return None
+        if manifest.get("fingerprint") != fingerprint() \
+           or not self.group in manifest.get("groups", {}):
+            return None
+        return dict(
+            (name, _ManifestEntry(name, module_name, attrs))
+            for name, (module_name, attrs) in manifest["groups"][self.group].iteritems()
+        )
+
+    def _write_manifest(self, entries):
+        """
+        Adds the entries of the group to the manifest. Entries of other
+        groups are kept if the manifest is still valid.
+        """
+
+        current = fingerprint()
+        groups = {}
+        try:
+            file_object = open(self.manifest_path, "rb")
+            try:
+                manifest = json.load(file_object)
+            finally:
+                file_object.close()
+            if manifest.get("fingerprint") == current:
+                groups = manifest.get("groups", {})
+        except (IOError, ValueError):
+            pass
+        groups[self.group] = dict(
+            (name, (entry.module_name, list(entry.attrs)))
+            for name, entry in entries.iteritems()
+        )
+
+        # Concurrent hooks must never read a partially written manifest.
+        try:
+            handle, path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.manifest_path)))
+            file_object = os.fdopen(handle, "wb")
+            try:
+                json.dump({"fingerprint" : current, "groups" : groups}, file_object)
+            finally:
+                file_object.close()
+            os.rename(path, self.manifest_path)
+        except (IOError, OSError):
+            pass
+
+    def _get_names(self):
+        """
+        Returns the names of all plugins of the group.
+
+        :rtype: list of strings
+        """
+
+        return self._get_entries().keys()
+
+    def load(self, name):
+        """
+        Returns the plugin with the given name. Its module is imported
+        on the first call.
+
+        :param name: The name of the plugin.
+        :type name: string
+
+        :raise ImportError: If no plugin with this name exists.
+        """
+
+        plugin = self._plugins.get(name)
+        if plugin is None:
+            entry = self._get_entries().get(name)
+            if entry is None:
+                raise ImportError("Entry point %s not found" % name)
+            plugin = entry.load()
+            self._plugins[name] = plugin
+        return plugin
+
+    def register(self, name, plugin):
+        """
+        Registers an already loaded plugin under the given name.
+
+        :param name: The name of the plugin.
+        :type name: string
+
+        :param plugin: The plugin class.
+        """
+
+        self._plugins[name] = plugin
+
+    names = property(_get_names)
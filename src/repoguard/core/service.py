@@ -0,0 +1,256 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Resident hook service.
+
+The service preloads all check and handler modules and the project
+configurations of the served repositories once. It accepts pre-commit and
+post-commit requests on a local Unix socket and runs every request in a
+forked child process, so the preloaded state is shared copy-on-write and
+one run cannot influence another.
+
+A request is a single JSON line with the keys hook, repo_path, txn_name,
+profile, halt_on_exception and jobs. The response is a line with the exit
+code of the hook followed by everything the run wrote to stdout and stderr.
+"""
+
+
+import errno
+import json
+import os
+import socket
+import SocketServer
+import sys
+import tempfile
+
+import pkg_resources
+
+from repoguard.core import constants
+from repoguard.core.config import ProjectConfig, RepoGuardConfig, file_stamp
+from repoguard.core.logger import LoggerFactory
+from repoguard.core.registry import PluginRegistry
+from repoguard.core.validator import ConfigValidator
+
+
+def preload_modules():
+    """
+    Imports all available check and handler modules. Modules with missing
+    optional dependencies are skipped.
+
+    :return: The number of loaded modules.
+    :rtype: int
+    """
+
+    logger = LoggerFactory().create(__name__)
+    count = 0
+    for module_type in (constants.CHECKS, constants.HANDLERS):
+        registry = PluginRegistry.get("repoguard." + module_type)
+        for name in registry.names:
+            try:
+                registry.load(name)
+                count += 1
+            except (ImportError, pkg_resources.DistributionNotFound):
+                logger.debug("Module %s not preloaded.", name, exc_info=True)
+    return count
+
+
+class _HookRequestHandler(SocketServer.StreamRequestHandler):
+    """
+    Reads one request and writes its response.
+    """
+
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        exit_code, output = self.server.run_hook(request)
+        self.wfile.write("%d\n" % exit_code)
+        self.wfile.write(output)
+
+
+class HookServer(SocketServer.ForkingMixIn, SocketServer.UnixStreamServer):
+    """
+    Forking Unix socket server that runs hooks with preloaded configurations.
+    """
+
+    def __init__(self, socket_path, runner, main_config, repositories=()):
+        """
+        Constructor.
+
+        :param socket_path: The path of the Unix socket.
+        :type socket_path: string
+
+        :param runner: Function that runs a hook and returns its exit code.
+                       It is called with the arguments hook, repo_path,
+                       txn_name, profile_name, halt_on_exception, jobs and
+                       the keyword arguments main_config and project_config.
+        :type runner: callable
+
+        :param main_config: The main configuration.
+        :type main_config: RepoGuardConfig
+
+        :param repositories: Paths of the repositories whose project
+                             configurations are preloaded.
+        :type repositories: list of strings
+        """
+
+        self.logger = LoggerFactory().create(self.__module__)
+        self.runner = runner
+        self.main_config = main_config
+        self._main_stamp = self._get_main_stamp()
+        self._projects = {}
+        for repo_path in repositories:
+            self.preload(repo_path)
+
+        self._remove_stale_socket(socket_path)
+        SocketServer.UnixStreamServer.__init__(self, socket_path, _HookRequestHandler)
+        os.chmod(socket_path, 0600)
+
+    @staticmethod
+    def _remove_stale_socket(socket_path):
+        """
+        Removes a socket file that has been left by a service which is
+        not running anymore.
+
+        :raise socket.error: If another service uses the socket.
+        """
+
+        if not os.path.exists(socket_path):
+            return
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(socket_path)
+        except socket.error, exc:
+            if exc.errno != errno.ECONNREFUSED:
+                raise
+            os.remove(socket_path)
+        else:
+            raise socket.error(errno.EADDRINUSE, "Service already running on %s." % socket_path)
+        finally:
+            client.close()
+
+    @staticmethod
+    def _get_config_path(repo_path):
+        return os.path.join(repo_path, "hooks", constants.CONFIG_FILENAME)
+
+    def _get_main_stamp(self):
+        if not self.main_config.filename:
+            return None
+        return file_stamp(self.main_config.filename)
+
+    def preload(self, repo_path):
+        """
+        Loads and validates the project configuration of a repository.
+        Requests for repositories without a valid preloaded configuration
+        load their configuration themselves.
+
+        :param repo_path: The path to the repository.
+        :type repo_path: string
+        """
+
+        repo_path = os.path.abspath(repo_path)
+        path = self._get_config_path(repo_path)
+        template_dirs = self.main_config.template_dirs
+        extended = []
+        try:
+            project_config = ProjectConfig(path, os.path.dirname(path), template_dirs)
+            extended = project_config.extended.values()
+            if self.main_config.validate:
+                ConfigValidator(excepts=True).validate(project_config)
+        except Exception: # pylint: disable=W0703
+            # The error is reported by the requests of the repository.
+            self.logger.warning("Configuration of %s not preloaded.", repo_path, exc_info=True)
+            project_config = None
+        # The configuration is reloaded when the project file, one of its 
+        # templates or the template directories change.
+        stamps = [file_stamp(stamp_path) for stamp_path in [path] + extended + template_dirs]
+        self._projects[repo_path] = (stamps, project_config)
+
+    def refresh(self):
+        """
+        Reloads the main configuration and the project configurations 
+        which have been changed.
+        """
+
+        main_stamp = self._get_main_stamp()
+        if main_stamp != self._main_stamp:
+            self.logger.debug("Reloading main configuration.")
+            self._main_stamp = main_stamp
+            try:
+                self.main_config = RepoGuardConfig(self.main_config.filename)
+            except Exception: # pylint: disable=W0703
+                self.logger.warning("Main configuration not reloaded.", exc_info=True)
+            else:
+                for repo_path in self._projects.keys():
+                    self.preload(repo_path)
+                return
+
+        for repo_path, (stamps, _) in self._projects.items():
+            if stamps != [file_stamp(stamp[0]) for stamp in stamps]:
+                self.logger.debug("Reloading configuration of %s.", repo_path)
+                self.preload(repo_path)
+
+    def process_request(self, request, client_address):
+        # The parent refreshes the configurations so every child starts
+        # with the current state.
+        self.refresh()
+        SocketServer.ForkingMixIn.process_request(self, request, client_address)
+
+    def run_hook(self, request):
+        """
+        Runs the requested hook and captures its output.
+
+        :param request: The decoded request.
+        :type request: dict
+
+        :return: The exit code and the output of the hook.
+        :rtype: tuple of int and string
+        """
+
+        repo_path = os.path.abspath(request["repo_path"])
+        project_config = self._projects.get(repo_path, (None, None))[1]
+        txn_name = request.get("txn_name")
+        if not txn_name is None:
+            txn_name = str(txn_name)
+
+        output = tempfile.TemporaryFile()
+        saved = [os.dup(1), os.dup(2)]
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(output.fileno(), 1)
+        os.dup2(output.fileno(), 2)
+        try:
+            exit_code = self.runner(
+                str(request["hook"]), repo_path, txn_name, request.get("profile"),
+                request.get("halt_on_exception", False), request.get("jobs"),
+                main_config=self.main_config, project_config=project_config
+            )
+        finally:
+            # The child process exits without running the exit handlers.
+            LoggerFactory().flush()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+        try:
+            output.seek(0)
+            return exit_code, output.read()
+        finally:
+            output.close()
+
+    def server_close(self):
+        SocketServer.UnixStreamServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
@@ -0,0 +1,273 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Transaction backend that uses the Subversion Python bindings.
+
+The repository and the transaction or revision root are opened once and
+all queries are answered in-process instead of running one svnlook
+process per query.
+"""
+
+
+from svn import core, fs, repos
+
+from repoguard.core.transaction import FileNotFoundException, Transaction
+
+
+_CHUNK_SIZE = 64 * 1024
+
+_canonicalize = getattr(core, "svn_dirent_canonicalize", core.svn_path_canonicalize)
+
+
+class FSTransaction(Transaction):
+    """
+    Transaction implementation based on the svn.fs and svn.repos bindings.
+    """
+
+    def __init__(self, repos_path, txn_name, **kwargs):
+        """
+        Opens the repository and the root of the given transaction or revision.
+        """
+
+        Transaction.__init__(self, repos_path, txn_name, **kwargs)
+
+        self._fs = repos.fs(repos.open(_canonicalize(repos_path)))
+        self._txn = None
+        if self.txn_name is None:
+            self._rev = fs.youngest_rev(self._fs)
+            self._root = fs.revision_root(self._fs, self._rev)
+        elif self.type == "revision":
+            self._rev = int(self.txn_name)
+            self._root = fs.revision_root(self._fs, self._rev)
+        else:
+            self._txn = fs.open_txn(self._fs, self.txn_name)
+            self._rev = fs.txn_base_revision(self._txn)
+            self._root = fs.txn_root(self._txn)
+        self._base_root = None
+
+    @staticmethod
+    def _path(filename):
+        return "/" + filename.strip("/")
+
+    def _revision_property(self, name):
+        if self._txn is None:
+            value = fs.revision_prop(self._fs, self._rev, name)
+        else:
+            value = fs.txn_prop(self._txn, name)
+        return value or ""
+
+    def _get_user_id(self):
+        """ Returns a string with the username of the current transaction. """
+
+        return self._revision_property(core.SVN_PROP_REVISION_AUTHOR).strip()
+
+    def _get_commit_msg(self):
+        """
+        Returns the commit message.
+        """
+
+        return self._revision_property(core.SVN_PROP_REVISION_LOG).strip()
+
+    def _is_dir(self, root, path):
+        return fs.check_path(root, path) == core.svn_node_dir
+
+    def _get_base_root(self):
+        if self._base_root is None:
+            if self._txn is None:
+                self._base_root = fs.revision_root(self._fs, self._rev - 1)
+            else:
+                self._base_root = fs.revision_root(self._fs, self._rev)
+        return self._base_root
+
+    def _get_changed_paths(self):
+        """
+        Returns a list of (filename, attributes) tuples in the format of
+        svnlook changed.
+        Do NOT use in your checks or handlers.
+        """
+
+        changed = []
+        for path, change in fs.paths_changed(self._root).iteritems():
+            if change.change_kind == fs.path_change_delete:
+                attributes = "D"
+                is_dir = self._is_dir(self._get_base_root(), path)
+            else:
+                if change.change_kind == fs.path_change_add:
+                    attributes = "A"
+                elif change.change_kind == fs.path_change_replace:
+                    attributes = "R"
+                elif change.text_mod:
+                    attributes = "U"
+                else:
+                    attributes = "_"
+                if change.prop_mod and attributes in ("U", "_"):
+                    attributes += "U"
+                is_dir = self._is_dir(self._root, path)
+            filename = path.lstrip("/")
+            if is_dir:
+                filename += "/"
+            changed.append((filename, attributes))
+        changed.sort()
+        return changed
+
+    def prefetch(self, filenames, workers=1):
+        """
+        Fetches the given files sequentially. The content is read in-process,
+        so there is no process start-up latency to hide and the bindings 
+        are not shared between threads.
+        Do NOT use in your checks or handlers.
+        """
+
+        return Transaction.prefetch(self, filenames, 1)
+
+    def _cat(self, filename, file_object):
+        """
+        Writes the content of the given file in chunks to the given file object.
+        Do NOT use in your checks or handlers.
+        """
+
+        stream = fs.file_contents(self._root, self._path(filename))
+        try:
+            while True:
+                chunk = core.svn_stream_read(stream, _CHUNK_SIZE)
+                if not chunk:
+                    break
+                file_object.write(chunk)
+        finally:
+            core.svn_stream_close(stream)
+
+    def _exists(self, filename):
+        """
+        Returns whether the given path exists.
+        Do NOT use in your checks or handlers.
+        """
+
+        return fs.check_path(self._root, self._path(filename)) != core.svn_node_none
+
+    def _list_directory(self, path):
+        """
+        Returns the set of the normalized paths of the entries of the given 
+        directory or None if it does not exist.
+        Do NOT use in your checks or handlers.
+        """
+
+        start = self._path(path)
+        kind = fs.check_path(self._root, start)
+        if kind == core.svn_node_none:
+            return None
+        entries = set([start.strip("/")])
+        if kind == core.svn_node_dir:
+            prefix = start.rstrip("/") + "/"
+            entries.update(
+                (prefix + name).strip("/") for name in fs.dir_entries(self._root, start)
+            )
+        return entries
+
+    def _get_tree(self, path=""):
+        """
+        Returns the full paths of all nodes of the repository tree or of
+        the subtree below the given path. Directories end with a slash.
+        Do NOT use in your checks or handlers.
+        """
+
+        start = self._path(path)
+        if start == "/":
+            tree = ["/"]
+            pending = ["/"]
+        elif self._is_dir(self._root, start):
+            tree = [start.lstrip("/") + "/"]
+            pending = [start + "/"]
+        else:
+            return [start.lstrip("/")]
+        while pending:
+            path = pending.pop()
+            entries = fs.dir_entries(self._root, path)
+            for name in sorted(entries.keys()):
+                child = path + name
+                if entries[name].kind == core.svn_node_dir:
+                    tree.append(child.lstrip("/") + "/")
+                    pending.append(child + "/")
+                else:
+                    tree.append(child.lstrip("/"))
+        return tree
+
+    def _get_copied_paths(self):
+        """
+        Returns the list of changed paths that have been copied.
+        Do NOT use in your checks or handlers.
+        """
+
+        copied = []
+        for path, change in fs.paths_changed(self._root).iteritems():
+            if change.change_kind in (fs.path_change_add, fs.path_change_replace):
+                revision = fs.copied_from(self._root, path)[0]
+                if revision >= 0:
+                    copied.append(path.lstrip("/"))
+        return copied
+
+    def _get_property_names(self, filename):
+        return self._get_file_properties(filename).keys()
+
+    def _get_property_value(self, keyword, filename):
+        return self._get_file_properties(filename)[keyword]
+
+    def _get_property_snapshot(self):
+        """
+        Returns the properties of all changed paths that still exist.
+        The bindings read them in-process, so the snapshot is loaded at 
+        once on first access.
+        Do NOT use in your checks or handlers.
+        """
+
+        self._lock.acquire()
+        try:
+            if self._properties is None:
+                filenames = [
+                    filename for filename, attributes in self._get_changes()
+                        if not attributes.startswith("D")
+                ]
+                self._properties = self._load_properties(filenames)
+            return self._properties
+        finally:
+            self._lock.release()
+
+    def _get_file_properties(self, filename):
+        """
+        Returns the property dictionary of a file. Properties of files which
+        are not part of the snapshot are loaded separately.
+        Do NOT use in your checks or handlers.
+        """
+
+        snapshot = self._get_property_snapshot()
+        if not filename in snapshot:
+            properties = self._load_properties([filename])
+            if not filename in properties:
+                raise FileNotFoundException(filename)
+            snapshot.update(properties)
+        return snapshot[filename]
+
+    def _load_properties(self, filenames):
+        """
+        Returns a dictionary that maps all given filenames which exist to
+        a dictionary of their properties.
+        Do NOT use in your checks or handlers.
+        """
+
+        properties = {}
+        for filename in filenames:
+            path = self._path(filename)
+            if fs.check_path(self._root, path) != core.svn_node_none:
+                properties[filename] = fs.node_proplist(self._root, path)
+        return properties
@@ -20,8 +20,15 @@ import os
 import re
 import shutil
 import tempfile
+import threading
 
 from repoguard.core import process
+from repoguard.core.cache import ResultCache, DEFAULT_SIZE, DEFAULT_SPILL_SIZE
+from repoguard.core.pathmatcher import PathMatcher
+
+
+# Existence of paths below copied directories is not decided by the changes.
+_COPIED = object()
 
 class FileNotFoundException(Exception):
     def __init__(self, filename):
@@ -31,12 +38,22 @@ class PropertyNotFoundException(Exception):
     def __init__(self, keyword, filename):
         Exception.__init__(self, "Property %r for file %r not set." % (keyword, filename))
 
+class TransactionCancelledException(Exception):
+    def __init__(self):
+        Exception.__init__(self, "The access to the transaction has been cancelled.")
+
 
 class Transaction(object):
 
-    def __init__(self, repos_path, txn_name):
+    def __init__(self, repos_path, txn_name, cache_size=DEFAULT_SIZE, 
+                 cache_spill_size=DEFAULT_SPILL_SIZE):
         """ 
         Initialize the transaction object. 
+        
+        :param cache_size: Number of bytes of svnlook output that are kept 
+                           in memory.
+        :param cache_spill_size: Outputs of this size or larger are cached 
+                                 in the temporary directory.
         """
         
         if txn_name is None: # HEAD revision
@@ -53,16 +70,51 @@ class Transaction(object):
         self.txn_name = txn_name
         self._profile = re.compile(".*")
         self.tmpdir = tempfile.mkdtemp()
-        self.cache = {}
+        self.cache = ResultCache(cache_size, cache_spill_size, self.tmpdir)
+        self.path_index = None
+        self._changed = None
+        self._partition = None
+        self._files = {}
+        # Properties of all changed paths. Only the bindings backend uses it.
+        self._properties = None
+        self._delta = None
+        self._folded_delta = None
+        self._folded_counts = None
+        self._existing = {}
+        self._lock = threading.RLock()
+        self._cancelled = threading.Event()
+
+    def _svnlook_command(self, command, arg=""):
+        if self.txn_name is None:
+            return 'svnlook %s "%s" %s' % (command, self.repos_path, arg)
+        return 'svnlook --%s %s %s "%s" %s' % (self.type, self.txn_name, command, self.repos_path, arg)
+
+    def cancel(self):
+        """
+        Lets all further queries of checks that are still running fail with 
+        a TransactionCancelledException.
+        Do NOT use in your checks or handlers.
+        """
+        self._cancelled.set()
+
+    def resume(self):
+        """
+        Allows queries again after the running checks have been cancelled.
+        Do NOT use in your checks or handlers.
+        """
+        self._cancelled.clear()
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise TransactionCancelledException()
 
     def _execute_svn(self, command, arg="", split=False):
-        if self.txn_name is None:
-            command = 'svnlook %s "%s" %s' % (command, self.repos_path, arg)
-        else:
-            command = 'svnlook --%s %s %s "%s" %s' % (self.type, self.txn_name, command, self.repos_path, arg)
+        self._check_cancelled()
+        command = self._svnlook_command(command, arg)
         
-        if command in self.cache:
-            return self.cache[command]
+        output = self.cache.get(command)
+        if not output is None:
+            return output
         
         try:
             output = process.execute(command, raw_out=True)
@@ -76,7 +128,7 @@ class Transaction(object):
             output = [x.strip() for x in output.split("\n") if x.strip()]
         
         self.cache[command] = output
-        return self.cache[command]
+        return output
 
     def cleanup(self):
         """
@@ -84,6 +136,9 @@ class Transaction(object):
         Do NOT use in your checks or handlers.
         """
         shutil.rmtree(self.tmpdir)
+        if not self.path_index is None:
+            self.path_index.close()
+            self.path_index = None
         
     def _get_profile(self):
         """
@@ -98,12 +153,67 @@ class Transaction(object):
         Do NOT use in your checks or handlers.
         """
         self._profile = re.compile(profile)
+        self._partition = None
+
+    def set_partition(self, name, changes):
+        """
+        Restricts the files of the transaction to the changed paths that 
+        have been assigned to the given profile.
+        Do NOT use in your checks or handlers.
+        
+        :param name: The name of the profile.
+        :type name: string
+        
+        :param changes: The (filename, attributes) tuples of the profile.
+        :type changes: list of tuples
+        """
+        
+        self._partition = (name, changes)
 
     def _get_user_id(self):
         """ Returns a string with the username of the current transaction. """
         user = self._execute_svn("author")
         return user.strip()
 
+    def _get_changed_paths(self):
+        """
+        Returns a list of (filename, attributes) tuples for every path that 
+        has been changed in the transaction or revision.
+        Do NOT use in your checks or handlers.
+        """
+        
+        output = self._execute_svn("changed", split=True)
+        changed = []
+        for entry in output:
+            attributes = entry[0:3].strip()
+            filename = entry[4:].strip()
+            changed.append((filename, attributes))
+        return changed
+
+    def _get_copied_paths(self):
+        """
+        Returns the list of changed paths that have been copied.
+        Do NOT use in your checks or handlers.
+        """
+        
+        output = self._execute_svn("changed", "--copy-info", split=True)
+        return [entry[4:].strip() for entry in output if entry[2:3] == "+"]
+
+    def _get_changes(self):
+        """
+        Returns the (filename, attributes) tuples of all changed paths. 
+        The list is determined once and shared by all callers.
+        Do NOT use in your checks or handlers.
+        """
+        
+        self._lock.acquire()
+        try:
+            if self._changed is None:
+                self._changed = self._get_changed_paths()
+            return self._changed
+        finally:
+            self._lock.release()
+
     def get_files(self, check_list=[".*"], ignore_list=[]):        
         """
         Returns a map of all modified files. The keys of the map
@@ -116,25 +226,31 @@ class Transaction(object):
         @param ignore_list List of regular expressions for files which should be ignored.
         """
         
-        output = self._execute_svn("changed", split=True)
-        files = {}
-        for entry in output:
-            attributes = entry[0:3].strip()
-            filename = entry[4:].strip()
-
-            if self._profile.search(filename) and self.__check(filename, check_list) and not self.__check(filename, ignore_list):
-                files[filename] = attributes
-        return files
-
-    def __check(self, datei, items):
-        for item in items:
-            regex = re.compile(item)
-            if regex.search(datei):
-                return True
-        return False
+        if self._partition is None:
+            scope = self._profile.pattern
+        else:
+            scope = (self._partition[0], )
+        key = (tuple(check_list), tuple(ignore_list), scope)
+        files = self._files.get(key)
+        if files is None:
+            if self._partition is None:
+                changes = [
+                    change for change in self._get_changes() 
+                        if self._profile.search(change[0])
+                ]
+            else:
+                changes = self._partition[1]
+            matcher = PathMatcher.create(check_list, ignore_list)
+            files = {}
+            for filename, attributes in changes:
+                if matcher.match(filename):
+                    files[filename] = attributes
+            self._files[key] = files
+        return dict(files)
 
     def get_file(self, filename):
         """ Returns the path to a temporary copy of a file in the repository. """
+        self._check_cancelled()
         if not self.file_exists(filename):
             raise FileNotFoundException(filename)
 
@@ -142,47 +258,308 @@ class Transaction(object):
         if os.path.exists(tmpfilename):
             return tmpfilename
 
-        content = self._execute_svn("cat", "\"" + filename + "\"")
-
         dirname = os.path.dirname(filename)
         tmpdirname = os.path.join(self.tmpdir, dirname)
         if dirname and not os.path.exists(tmpdirname):
-            os.makedirs(tmpdirname)
-
-        file_object = open(tmpfilename, "w")
+            try:
+                os.makedirs(tmpdirname)
+            except OSError:
+                # Another check created the directory concurrently.
+                if not os.path.isdir(tmpdirname):
+                    raise
+
+        # The copy becomes visible as a whole for concurrently running checks.
+        handle, partname = tempfile.mkstemp(dir=tmpdirname or self.tmpdir)
+        file_object = os.fdopen(handle, "wb")
         try:
-            file_object.write(content)
+            self._cat(filename, file_object)
         finally:
             file_object.close()
+        os.rename(partname, tmpfilename)
         return tmpfilename
 
+    def prefetch(self, filenames, workers=8):
+        """
+        Fetches the given files concurrently into the temporary directory,
+        so that later get_file calls find the copies. Files that cannot be 
+        fetched are skipped; the check that reads them reports the error.
+        Do NOT use in your checks or handlers.
+        
+        :param filenames: The files that have to be fetched.
+        :type filenames: list of strings
+        
+        :param workers: The maximum number of concurrent fetches.
+        :type workers: int
+        
+        :return: The number of fetched files and their total size in bytes.
+        :rtype: tuple
+        """
+        
+        def fetch(filename):
+            try:
+                return os.path.getsize(self.get_file(filename))
+            except (FileNotFoundException, process.ProcessException, 
+                    EnvironmentError):
+                return None
+        
+        filenames = sorted(set(filenames))
+        if workers <= 1 or len(filenames) <= 1:
+            sizes = [fetch(filename) for filename in filenames]
+        else:
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(min(workers, len(filenames)))
+            try:
+                sizes = pool.map(fetch, filenames)
+            finally:
+                pool.close()
+                pool.join()
+        sizes = [size for size in sizes if not size is None]
+        return len(sizes), sum(sizes)
+
+    def _cat(self, filename, file_object):
+        """
+        Writes the content of the given file in chunks to the given file 
+        object. The content is not cached.
+        Do NOT use in your checks or handlers.
+        """
+        
+        process.stream(self._svnlook_command("cat", "\"" + filename + "\""), file_object)
+
     def file_exists(self, filename, ignore_case=False):
         """ 
         Returns whether a file exists in the current transaction or revision of 
         the repository, optionally case-insensitive. 
         """
-        exists = False
+        exists = None
 
         if ignore_case:
-            filename = filename.lower()
-            files = self._execute_svn("tree", "--full-paths", split=True)
-            count = 0
-            for fname in files:
-                if fname.lower() == filename:
-                    count += 1
-                    if count >= 2:
-                        exists = True
-                        break
-
+            if not self.path_index is None:
+                matches = self._find_ignore_case_indexed(filename)
+                if not matches is None:
+                    exists = len(matches) >= 2
+            if exists is None:
+                folded = filename.strip("/").lower()
+                exists = self._get_folded_counts().get(folded, 0) >= 2
+        elif not self._properties is None and filename in self._properties:
+            # Paths of the property snapshot of the bindings backend are 
+            # known to exist.
+            exists = True
         else:
-            try:
-                self._execute_svn("proplist", "\"" + filename + "\"", split=True)
+            exists = self._existing.get(filename.strip("/"))
+            if exists is None and not self.path_index is None:
+                exists = self._exists_indexed(filename)
+            if exists is None:
+                exists = self._exists(filename)
+        return exists
+
+    def files_exist(self, filenames):
+        """
+        Returns whether the given files exist in the current transaction or 
+        revision of the repository. The queries are answered with the 
+        changes of the transaction and the path index if possible. The 
+        remaining files are looked up with one listing per parent directory.
+        
+        :param filenames: The paths of the files.
+        :type filenames: list of strings
+        
+        :return: Maps the paths to whether they exist.
+        :rtype: dict
+        """
+        
+        result = {}
+        pending = {}
+        for filename in filenames:
+            path = filename.strip("/")
+            exists = self._existing.get(path)
+            if exists is None and not self._properties is None and filename in self._properties:
                 exists = True
-            except process.ProcessException:
-                pass
+            if exists is None:
+                exists = self._exists_by_changes(path)
+                if exists is None and not self.path_index is None:
+                    exists = self.path_index.exists(path)
+                elif exists is _COPIED:
+                    exists = None
+            if exists is None:
+                pending.setdefault(os.path.dirname(path), []).append(filename)
+            else:
+                result[filename] = exists
+        
+        for directory, directory_filenames in pending.iteritems():
+            entries = self._list_directory(directory)
+            for filename in directory_filenames:
+                result[filename] = not entries is None and filename.strip("/") in entries
+        
+        self._lock.acquire()
+        try:
+            for filename, exists in result.iteritems():
+                self._existing[filename.strip("/")] = exists
+        finally:
+            self._lock.release()
+        return result
+
+    def _get_delta(self):
+        """
+        Returns a dictionary that maps the normalized changed paths to their
+        attributes and the set of the normalized copied paths.
+        Do NOT use in your checks or handlers.
+        """
+        
+        self._lock.acquire()
+        try:
+            if self._delta is None:
+                changed = dict(
+                    (filename.strip("/"), attributes) 
+                    for filename, attributes in self._get_changes()
+                )
+                copied = set(path.strip("/") for path in self._get_copied_paths())
+                self._delta = changed, copied
+            return self._delta
+        finally:
+            self._lock.release()
 
+    def _exists_indexed(self, filename):
+        """
+        Answers an existence query with the path index of the base revision 
+        and the changes of the transaction. Returns None if the query can 
+        only be answered with the tree, i.e. below a copied directory.
+        Do NOT use in your checks or handlers.
+        """
+        
+        path = filename.strip("/")
+        exists = self._exists_by_changes(path)
+        if exists is _COPIED:
+            return None
+        if exists is None:
+            return self.path_index.exists(path)
         return exists
 
+    def _exists_by_changes(self, path):
+        """
+        Answers an existence query of a normalized path with the changes of 
+        the transaction. Returns None if the changes do not affect the path 
+        and _COPIED if the path is below a copied directory.
+        Do NOT use in your checks or handlers.
+        """
+        
+        changed, copied = self._get_delta()
+        if path in changed:
+            return not changed[path].startswith("D")
+        parent = os.path.dirname(path)
+        while parent:
+            if parent in copied:
+                return _COPIED
+            attributes = changed.get(parent)
+            if attributes and attributes[0] in ("A", "D", "R"):
+                # New directories list all their children.
+                return False
+            parent = os.path.dirname(parent)
+        return None
+
+    def _find_ignore_case_indexed(self, filename):
+        """
+        Returns the paths of the transaction which are equal to the given 
+        path ignoring the case. Returns None if the query can only be 
+        answered with the tree, i.e. below a copied directory.
+        Do NOT use in your checks or handlers.
+        """
+        
+        folded_changed, folded_copied = self._get_folded_delta()
+        folded = filename.strip("/").lower()
+        parent = os.path.dirname(folded)
+        while parent:
+            if parent in folded_copied:
+                return None
+            parent = os.path.dirname(parent)
+
+        matches = set(
+            path for path in self.path_index.find_ignore_case(folded)
+                if self._exists_indexed(path)
+        )
+        for path, attributes in folded_changed.get(folded, ()):
+            if not attributes.startswith("D"):
+                matches.add(path)
+        return matches
+
+    def _get_folded_delta(self):
+        """
+        Returns a dictionary that maps the case-folded changed paths to
+        their (path, attributes) tuples and the set of the case-folded 
+        copied paths.
+        Do NOT use in your checks or handlers.
+        """
+        
+        self._lock.acquire()
+        try:
+            if self._folded_delta is None:
+                changed, copied = self._get_delta()
+                folded_changed = {}
+                for path, attributes in changed.iteritems():
+                    folded_changed.setdefault(path.lower(), []).append((path, attributes))
+                folded_copied = set(path.lower() for path in copied)
+                self._folded_delta = folded_changed, folded_copied
+            return self._folded_delta
+        finally:
+            self._lock.release()
+
+    def _get_folded_counts(self):
+        """
+        Returns a dictionary that maps the case-folded normalized paths of 
+        the tree to the number of paths they represent. Files and 
+        directories share the same keys. The tree is only listed once.
+        Do NOT use in your checks or handlers.
+        """
+        
+        self._lock.acquire()
+        try:
+            if self._folded_counts is None:
+                counts = {}
+                for path in self._get_tree():
+                    folded = path.strip("/").lower()
+                    counts[folded] = counts.get(folded, 0) + 1
+                self._folded_counts = counts
+            return self._folded_counts
+        finally:
+            self._lock.release()
+
+    def _exists(self, filename):
+        """
+        Returns whether the given path exists.
+        Do NOT use in your checks or handlers.
+        """
+        
+        try:
+            self._execute_svn("proplist", "\"" + filename + "\"", split=True)
+            return True
+        except process.ProcessException:
+            return False
+
+    def _list_directory(self, path):
+        """
+        Returns the set of the normalized paths of the entries of the given 
+        directory or None if it does not exist.
+        Do NOT use in your checks or handlers.
+        """
+        
+        arg = "--full-paths --non-recursive"
+        if path:
+            arg += " \"" + path + "\""
+        try:
+            output = self._execute_svn("tree", arg, split=True)
+        except process.ProcessException:
+            return None
+        return set(entry.strip("/") for entry in output)
+
+    def _get_tree(self, path=""):
+        """
+        Returns the full paths of all nodes of the repository tree or of
+        the subtree below the given path. Directories end with a slash.
+        Do NOT use in your checks or handlers.
+        """
+        
+        if path:
+            return self._execute_svn("tree", "--full-paths \"" + path + "\"", split=True)
+        return self._execute_svn("tree", "--full-paths", split=True)
+
     def _get_commit_msg(self):
         """ 
         Returns the commit message. 
@@ -206,6 +583,23 @@ class Transaction(object):
                 revision = self.txn_name
         return str(revision)
 
+    def _get_base_revision(self):
+        """
+        Returns the number of the revision the transaction or revision is 
+        based on or None for the HEAD revision.
+        Do NOT use in your checks or handlers.
+        """
+        
+        if self.txn_name is None:
+            return None
+        try:
+            revision = int(self.txn_name.split("-")[0])
+        except ValueError:
+            return None
+        if self.type == "revision":
+            revision -= 1
+        return revision
+
     def get_property(self, keyword, filename):
         """ 
         Returns a specified property of a file.
@@ -213,27 +607,55 @@ class Transaction(object):
         
         if not self.has_property(keyword, filename):
             raise PropertyNotFoundException(keyword, filename)
-    
-        return self._execute_svn("propget", " ".join([keyword, "\"" + filename + "\""]))
+        return self._get_property_value(keyword, filename)
 
     def has_property(self, keyword, filename):
         """
         Checks if a given file has the given property.
         """
         
-        return keyword in self.list_properties(filename)
+        return keyword in self._get_property_names(filename)
 
     def list_properties(self, filename):
         """
         Returns a list of names of the properties for a file.
         """
         
-        if not self.file_exists(filename):
+        return list(self._get_property_names(filename))
+
+    def get_properties(self, filename):
+        """
+        Returns a dictionary with the names and values of all properties 
+        of a file.
+        """
+        
+        return dict(
+            (name, self._get_property_value(name, filename)) 
+            for name in self._get_property_names(filename)
+        )
+
+    def _get_property_names(self, filename):
+        """
+        Returns the names of the properties of a file. The svnlook results 
+        are cached, so every file is only listed once.
+        Do NOT use in your checks or handlers.
+        """
+        
+        try:
+            return self._execute_svn("proplist", "\"" + filename + "\"", split=True)
+        except process.ProcessException:
             raise FileNotFoundException(filename)
 
-        return self._execute_svn("proplist", "\"" + filename + "\"", split=True)
+    def _get_property_value(self, keyword, filename):
+        """
+        Returns the unchanged value of an existing property of a file.
+        Do NOT use in your checks or handlers.
+        """
+        
+        return self._execute_svn("propget", " ".join([keyword, "\"" + filename + "\""]))
 
     profile = property(_get_profile, _set_profile)
     user_id = property(_get_user_id)
     revision = property(_get_revision)
+    base_revision = property(_get_base_revision)
     commit_msg = property(_get_commit_msg)
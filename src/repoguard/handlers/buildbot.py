@@ -22,6 +22,7 @@ from twisted.spread import pb
 from twisted.cred import credentials
 from twisted.internet import reactor
 
+from repoguard.core.logger import LazyMessage
 from repoguard.core.module import Handler, HandlerConfig, String, Integer
 
 class Config(HandlerConfig):
@@ -43,7 +44,7 @@ class BuildBot(Handler):
         comments = self.transaction.commit_msg.splitlines()
         change = {'who': who, 'files': files, 'comments': comments}
         remote.callRemote('addChange', change).addCallback(self.stop)
-        self.logger.debug("%s: %s", who, " ".join(files))
+        self.logger.debug("%s: %s", who, LazyMessage(" ".join, files))
         
     def _summarize(self, config, _):
         client = pb.PBClientFactory()
@@ -22,10 +22,37 @@ software systems.
 
 import sys
 
-import pkg_resources
-
 from optparse import OptionParser
 
+from repoguard.core import constants
+
+
+# Commands of the hook scripts. They are dispatched without scanning the
+# installed tools, because pkg_resources is expensive to import.
+_HOOK_COMMANDS = {
+    constants.PRECOMMIT : "repoguard.tools.checker:Checker",
+    constants.POSTCOMMIT : "repoguard.tools.checker:Checker"
+}
+
+
+def _load_tool(path):
+    """
+    Imports and instantiates the tool class with the given 
+    "module:class" path.
+    """
+    
+    module_name, class_name = path.split(":")
+    module = __import__(module_name, fromlist=[class_name])
+    return getattr(module, class_name)()
+
+def _execute(tool, descriptor):
+    """
+    Executes the command method of the given tool.
+    """
+    
+    full_name = tool.__class__.__name__ + " Tools v" + constants.VERSION
+    parser = OptionParser(usage=descriptor.usage, version=full_name)
+    return getattr(tool, descriptor.method)(parser) or 0
 
 def main(argv=sys.argv):
     """
@@ -35,6 +62,12 @@ def main(argv=sys.argv):
     :type argv: list of command line arguments.
     """
     
+    if argv[1:] and argv[1] in _HOOK_COMMANDS:
+        tool = _load_tool(_HOOK_COMMANDS[argv[1]])
+        return _execute(tool, tool.descriptors[argv[1]])
+    
+    import pkg_resources
+    
     usage = "\n  repoguard [options] mode\n\n" \
           + "Following 'mode'-values are accepted:\n"
           
@@ -59,8 +92,7 @@ def main(argv=sys.argv):
             tools[command] = (tool, descriptor)
         
     usage += "Write repoguard mode -h to get more help for every option"
-    version = pkg_resources.require("repoguard")[0].version
-    full_name = "RepoGuard Command Line Tools v" + version
+    full_name = "RepoGuard Command Line Tools v" + constants.VERSION
     parser = OptionParser(usage=usage, version=full_name)
     if not argv[1:] or not tools.has_key(argv[1]):
         parser.parse_args()
@@ -68,9 +100,7 @@ def main(argv=sys.argv):
         return 1    
     
     tool, descriptor = tools[argv[1]]
-    full_name = tool.__class__.__name__ + " Tools v" + version
-    parser = OptionParser(usage=descriptor.usage, version=full_name)
-    return getattr(tool, descriptor.method)(parser) or 0
+    return _execute(tool, descriptor)
 
 if __name__ == "__main__":
     sys.exit(main(sys.argv))
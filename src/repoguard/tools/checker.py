@@ -21,12 +21,11 @@ Main tool to handle pre and post commits.
 import os
 import tempfile
 
-import validate
-
 from repoguard.core import constants
-from repoguard.core.checker import RepoGuard
-from repoguard.core.config import RepoGuardConfig
+from repoguard.core.checker import RepoGuard, FileExecutor
+from repoguard.core.config import ConfigCache, RepoGuardConfig
 from repoguard.core.logger import LoggerFactory
+from repoguard.core.registry import PluginRegistry
 
 from repoguard.tools.base import Tool
 
@@ -43,6 +42,16 @@ Arguments:
 
 os.environ['PYTHON_EGG_CACHE'] = tempfile.gettempdir()
 
+def _validate_error():
+    """
+    Returns the exception class of invalid configurations. The expression
+    of an except clause is only evaluated when an exception occurred, so 
+    the validate module is not imported by runs without validation.
+    """
+    
+    from validate import ValidateError
+    return ValidateError
+
 class Checker(Tool):
     """
     Tool for the repoguard execution on transaction base.
@@ -76,6 +85,10 @@ class Checker(Tool):
             "-p", "--profile", dest="profile_name", default=None,
             help="Concrete profile which should be executed."
         )
+        parser.add_option(
+            "-j", "--jobs", dest="jobs", type="int", default=None,
+            help="Number of checks of a profile that run concurrently."
+        )
         parser.add_option(
             "--halt-on-exception", action="store_true", default=False, dest="halt_on_exception",
             help=(
@@ -93,10 +106,14 @@ class Checker(Tool):
             parser.print_help()
             return 1
         
-        return self.checker(hook, repo_path, txn_name, options.profile_name, options.halt_on_exception)
+        return self.checker(
+            hook, repo_path, txn_name, options.profile_name, 
+            options.halt_on_exception, options.jobs
+        )
     
     @staticmethod
-    def checker(hook, repo_path, txn_name, profile_name, halt_on_exception):
+    def checker(hook, repo_path, txn_name, profile_name, halt_on_exception, jobs=None, 
+                main_config=None, project_config=None):
         """
         Function to singularize the repoguard in precommit or postcommit mode.
         
@@ -111,42 +128,85 @@ class Checker(Tool):
         
         :param halt_on_exception: Flag which indicates whether we halt on unexpected exceptions or not.
         :type halt_on_exception: boolean
+        
+        :param jobs: Number of checks that run concurrently. The setting of 
+                     the main configuration is used when it is None.
+        :type jobs: int
+        
+        :param main_config: The preloaded main configuration. It is loaded 
+                            when it is None.
+        :type main_config: RepoGuardConfig
+        
+        :param project_config: The preloaded and already validated project 
+                               configuration. When it is None the compiled 
+                               execution plan of the repository is used. 
+                               Without a current plan the configuration is 
+                               loaded and validated.
+        :type project_config: ProjectConfig
         """
         
         logger = LoggerFactory().create('%s.tools.checker' % constants.NAME)
         try:
             hooks_path = os.path.abspath(os.path.join(repo_path, "hooks"))
-            project_config = os.path.join(hooks_path, constants.CONFIG_FILENAME)
+            config_path = os.path.join(hooks_path, constants.CONFIG_FILENAME)
             os.chdir(hooks_path)
             
             logger.debug("RepoGuard initializing...")
             repoguard = RepoGuard(hook, repo_path)
         
+            if main_config is None:
+                logger.debug("Loading configuration...")
+                main_config = RepoGuardConfig(constants.CONFIG_PATH)
+            PluginRegistry.manifest_path = main_config.plugin_manifest
+            
             logger.debug("Loading transaction...")
-            repoguard.load_transaction(txn_name)
+            repoguard.load_transaction(
+                txn_name, main_config.backend, 
+                cache_size=main_config.cache_size, 
+                cache_spill_size=main_config.cache_spill_size
+            )
     
-            logger.debug("Loading configuration...")
-            main_config = RepoGuardConfig(constants.CONFIG_PATH)
-            repoguard.load_config(main_config.template_dirs, project_config)
-            
-            logger.debug("Validating configuration...")
-            if main_config.validate:
-                repoguard.validate()
-            else:
-                logger.warning("Validation skipped.")
+            repoguard.jobs = jobs or main_config.jobs
+            repoguard.prefetch_workers = main_config.prefetch_workers
+            if main_config.processes != 1:
+                repoguard.executor = FileExecutor(
+                    main_config.processes, main_config.process_min_files
+                )
+            plan_path = os.path.join(hooks_path, constants.PLAN_FILENAME)
+            if not project_config is None:
+                repoguard.main = project_config
+            elif not repoguard.load_plan(plan_path, main_config.template_dirs):
+                config_cache = None
+                if main_config.config_cache:
+                    config_cache = ConfigCache(main_config.config_cache)
+                repoguard.load_config(
+                    main_config.template_dirs, config_path, config_cache
+                )
+                
+                logger.debug("Validating configuration...")
+                if main_config.validate:
+                    repoguard.validate()
+                else:
+                    logger.warning("Validation skipped.")
             
             logger.debug("RepoGuard running...")
             if profile_name:
                 result = repoguard.run_profile(profile_name)
             else:   
                 result = repoguard.run()
+            
+            if hook == constants.POSTCOMMIT:
+                try:
+                    repoguard.update_path_index()
+                except: # pylint: disable=W0702
+                    logger.exception("The path index could not be updated!")
 
             logger.debug("RepoGuard finished with %s.", result)
             if result == constants.SUCCESS:
                 return 0
             else:
                 return 1
-        except validate.ValidateError:
+        except _validate_error():
             logger.exception("The configuration is invalid!")
             return 1
         except: # pylint: disable=W0702
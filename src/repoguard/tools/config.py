@@ -23,7 +23,9 @@ import os
 
 from repoguard.core import constants
 from repoguard.core.logger import LoggerFactory
-from repoguard.core.config import RepoGuardConfig, ProjectConfig
+from repoguard.core.config import RepoGuardConfig, ProjectConfig, ValidationStamp
+from repoguard.core.plan import ExecutionPlan
+from repoguard.core.registry import PluginRegistry
 from repoguard.core.validator import ConfigValidator
 from repoguard.tools.base import Tool
 
@@ -62,6 +64,11 @@ class Configuration(Tool):
             help="be vewwy quiet (I'm hunting wabbits).", 
             default=True
         )
+        parser.add_option(
+            "-f", "--force", action="store_true", dest="force", default=False,
+            help="validate even if the configuration did not change since "
+                 "its last successful validation."
+        )
         options, args = parser.parse_args()
         
         if len(args) != 2:
@@ -79,14 +86,24 @@ class Configuration(Tool):
         main_config = RepoGuardConfig(constants.CONFIG_PATH)
         config_validator = ConfigValidator(override=level)
         config_obj = ProjectConfig(path, template_dirs=main_config.template_dirs)
-        for extend, path in config_obj.extended.iteritems():
-            logger.info("Extending %s (%s)", extend, path)
+        stamp = ValidationStamp(os.path.join(
+            os.path.dirname(os.path.abspath(path)), 
+            constants.VALIDATION_STAMP_FILENAME
+        ))
+        if not options.force and stamp.matches(config_obj):
+            logger.info(
+                "Configuration unchanged since its last validation. "
+                "Use --force to validate it anyway."
+            )
+            return 0
+        for extend, extend_path in config_obj.extended.iteritems():
+            logger.info("Extending %s (%s)", extend, extend_path)
         else:
             logger.info("Nothing to extend.")
         if config_validator.validate(config_obj):
-            return 0
-        else:
             return 1
+        stamp.record(config_obj)
+        return 0
     
     @Tool.command_method(
         command="show",
@@ -122,3 +139,45 @@ class Configuration(Tool):
                 i = tmp
             print ' ' * 3 * i + line
         return 0
+    
+    @Tool.command_method(
+        command="compile",
+        description="Compiles the execution plan of a project configuration",
+        usage="\n  repoguard compile path\n" \
+             + "Arguments:\n" \
+             + "  path\t\tPath to the configuration file in the hooks " \
+             + "directory of a repository."
+    )
+    def compile(self, parser):
+        """
+        Validates a project configuration and writes its execution plan 
+        to the hooks directory. The hooks use the plan until the 
+        configuration, one of its templates or the installed plugins change.
+        
+        :param parser: Parser associated with this tool.
+        :type parser: optparse object.
+        """
+        
+        args = parser.parse_args()[1]
+        if len(args) != 2:
+            parser.print_help()
+            return 1
+        
+        path = args[1]
+        hooks = os.path.dirname(os.path.abspath(path))
+        logging.basicConfig(format="%(message)s")
+        logger = LoggerFactory().create('%s.tools.config' % constants.NAME)
+        main_config = RepoGuardConfig(constants.CONFIG_PATH)
+        PluginRegistry.manifest_path = main_config.plugin_manifest
+        config_obj = ProjectConfig(path, hooks, main_config.template_dirs)
+        try:
+            ConfigValidator(excepts=True).validate(config_obj)
+            plan = ExecutionPlan.compile(config_obj, main_config.template_dirs)
+        except Exception, exc: # pylint: disable=W0703
+            logger.error("Unable to compile %s: %s", path, exc)
+            return 1
+        
+        plan_path = os.path.join(hooks, constants.PLAN_FILENAME)
+        plan.dump(plan_path)
+        logger.info("Execution plan written to %s.", plan_path)
+        return 0
@@ -23,7 +23,9 @@ import sys
 
 from configobj import ConfigObj
 
-from repoguard.core import constants
+from repoguard.core import constants, process
+from repoguard.core.pathindex import PathIndex
+from repoguard.core.transaction import Transaction
 from repoguard.tools.base import Tool
 
 
@@ -354,3 +356,60 @@ class Repository(Tool):
         else:
             print "Configuration NOT installed"
         return 0
+    
+    @Tool.command_method(
+        command="repo-index",
+        description="Rebuilds the path index of the current repository",
+        usage=""
+    )
+    def index(self, parser):
+        """
+        Rebuilds the path index of the current repository from the HEAD 
+        revision. The post-commit hook keeps the index up to date afterwards.
+        
+        :param parser: The parser for the current commandline.
+        :type parser: optparse object.
+        """
+        
+        parser.add_option(
+            "-q", "--quiet", action="store_false", dest="verbose",
+            help="be vewwy quiet (I'm hunting wabbits).", default=True
+        )
+        parser.add_option(
+            "-d", "--delete", action="store_true", dest="delete",
+            help="delete the path index", default=False
+        )
+        options = parser.parse_args()[0]
+        
+        try:
+            hooks = self._chhooks()
+        except IOError, exc:
+            print exc
+            return 1
+        
+        path = os.path.join(hooks, constants.PATH_INDEX_FILENAME)
+        if options.delete:
+            if os.path.exists(path):
+                os.remove(path)
+                # Files of the write-ahead log.
+                for suffix in ("-wal", "-shm"):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+                if options.verbose:
+                    print "%s successfully removed." % constants.PATH_INDEX_FILENAME
+            return 0
+        
+        repos_path = os.path.dirname(hooks)
+        revision = process.execute('svnlook youngest "%s"' % repos_path).strip()
+        transaction = Transaction(repos_path, revision)
+        index = PathIndex(path)
+        try:
+            index.rebuild(transaction)
+            if options.verbose:
+                print "Path index rebuilt for revision %s (%d paths)." % (
+                    index.revision, len(index)
+                )
+        finally:
+            index.close()
+            transaction.cleanup()
+        return 0
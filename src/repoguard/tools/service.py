@@ -0,0 +1,109 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Runs the RepoGuard as resident hook service.
+"""
+
+
+import os
+import signal
+import sys
+
+from repoguard.core import constants
+from repoguard.core.config import RepoGuardConfig
+from repoguard.core.logger import LoggerFactory
+from repoguard.core.registry import PluginRegistry
+from repoguard.core.service import HookServer, preload_modules
+from repoguard.tools.base import Tool
+from repoguard.tools.checker import Checker
+
+
+_USAGE = """
+  repoguard serve [options] [repo_path ...]
+Arguments:
+  repo_path\tThe paths to the repositories whose configurations 
+  \t\tare preloaded. Other repositories are served as well but 
+  \t\tload their configuration with every request.
+
+The hook scripts call the repoguard-client script instead of repoguard.
+The service has to run as the user that runs the hooks. The socket is 
+created in the hooks directory of the first repository by default. A 
+service for several repositories should use a socket in a directory that 
+only this user can write to and the hook scripts have to set 
+REPOGUARD_SOCKET accordingly.
+"""
+
+
+class Service(Tool):
+    """
+    Tool that serves pre and post commit requests of the repoguard-client.
+    """
+    
+    def __init__(self):
+        Tool.__init__(self, "Service tools v0.1")
+        
+    @Tool.command_method(
+        command="serve",
+        description="Runs the %s as resident hook service." % constants.NAME,
+        usage=_USAGE
+    )
+    def serve(self, parser):
+        """
+        Starts the service and serves requests until it is terminated.
+        
+        :param parser: Parser for the current command line.
+        :type parser: optparse object.
+        
+        :return: The return code.
+        :rtype: 0 for success else error.
+        """
+        
+        parser.add_option(
+            "-s", "--socket", dest="socket_path", 
+            default=os.getenv("REPOGUARD_SOCKET"),
+            help="Path of the Unix socket. Default: $REPOGUARD_SOCKET or "
+                 "repo_path/hooks/%s" % constants.SERVICE_SOCKET_FILENAME
+        )
+        options, args = parser.parse_args()
+        if os.name == "nt":
+            print "The service is not available on Windows."
+            return 1
+        if options.socket_path is None:
+            if len(args) < 2:
+                print "Either a socket or a repository path is required."
+                return 1
+            options.socket_path = os.path.join(
+                args[1], "hooks", constants.SERVICE_SOCKET_FILENAME
+            )
+        
+        logger = LoggerFactory().create('%s.tools.service' % constants.NAME)
+        main_config = RepoGuardConfig(constants.CONFIG_PATH)
+        PluginRegistry.manifest_path = main_config.plugin_manifest
+        logger.debug("Preloading modules...")
+        count = preload_modules()
+        server = HookServer(
+            options.socket_path, Checker.checker, main_config, args[1:]
+        )
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        logger.info(
+            "Serving on %s with %d modules preloaded.", options.socket_path, count
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
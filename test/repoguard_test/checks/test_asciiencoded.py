@@ -20,6 +20,10 @@ Tests the ASCII check.
 """
 
 
+import os
+import shutil
+import tempfile
+
 from configobj import ConfigObj
 import mock
 
@@ -30,59 +34,98 @@ class TestASCIIEncoded(object):
         
     @classmethod
     def setup_class(cls):
-        cls._file_mock = mock.MagicMock(spec=file)
         transaction = mock.Mock()
         transaction.get_files = mock.Mock(return_value={"filepath":"A"})
         
         cls._config = ConfigObj(encoding='UTF-8')
         cls._asciiencoded = asciiencoded.ASCIIEncoded(transaction)
 
-    def test_default_contains_ascii_only(self):
-        patcher = mock.patch("repoguard.checks.asciiencoded.open", create=True)
-        open_mock = patcher.start()
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        
+    def teardown_method(self, _):
+        shutil.rmtree(self._tmpdir)
+        
+    def _create_file(self, content):
+        path = os.path.join(self._tmpdir, "test.py")
+        file_object = open(path, "wb")
         try:
-            self._init_file_mock(open_mock, '""" doc"""\nprint "hllo@#"')
-            assert self._asciiencoded.ascii_check("test.py", "", "") == list()
+            file_object.write(content)
         finally:
-            patcher.stop()
+            file_object.close()
+        return path
+        
+    def test_default_contains_ascii_only(self):
+        path = self._create_file('""" doc"""\nprint "hllo@#"')
+        assert self._asciiencoded.ascii_check(path, "", "") == list()
             
     def test_default_contains_non_ascii(self):
-        patcher = mock.patch("repoguard.checks.asciiencoded.open", create=True)
-        open_mock = patcher.start()
-        try:
-            self._init_file_mock(open_mock, '""" doc"""\nprint "hällo@#"')
-            errors = self._asciiencoded.ascii_check("test.py", "", "")
-            assert errors[0][1] == 20
-        finally:
-            patcher.stop()
+        path = self._create_file('""" doc"""\nprint "hällo@#"')
+        errors = self._asciiencoded.ascii_check(path, "", "")
+        assert errors == [
+            (2, 9, 'print "hällo@#"'), (2, 10, 'print "hällo@#"')
+        ]
             
     def test_include_character(self):
-        patcher = mock.patch("repoguard.checks.asciiencoded.open", create=True)
-        open_mock = patcher.start()
-        try:
-            self._init_file_mock(open_mock, '""" doc"""\nprint "hällo@#"')
-            assert self._asciiencoded.ascii_check("test.py", "ä", "") == list()
-        finally:
-            patcher.stop()
+        path = self._create_file('""" doc"""\nprint "hällo@#"')
+        assert self._asciiencoded.ascii_check(path, "ä", "") == list()
+        assert self._asciiencoded.ascii_check(path, u"ä", "") == list()
             
     def test_exclude_character(self):
-        patcher = mock.patch("repoguard.checks.asciiencoded.open", create=True)
-        open_mock = patcher.start()
+        path = self._create_file('""" doc. """\nprint "hell@#"')
+        errors = self._asciiencoded.ascii_check(path, "", "e")
+        assert errors[0][:2] == (2, 9)
+        
+    def test_rows_and_lines(self):
+        path = self._create_file("a\x00\r\nb\n\nc\x01d\x02\n")
+        assert self._asciiencoded.ascii_check(path, "", "") == [
+            (1, 2, "a\x00\r\n"), (4, 2, "c\x01d\x02\n"), (4, 4, "c\x01d\x02\n")
+        ]
+        
+    def test_chunks(self):
+        path = self._create_file("a\x00\r\nb\n\nc\x01d\x02\n")
+        with mock.patch.object(asciiencoded, "_CHUNK_SIZE", 3):
+            assert self._asciiencoded.ascii_check(path, "", "") == [
+                (1, 2, "a\x00\r\n"), (4, 2, "c\x01d\x02\n"), (4, 4, "c\x01d\x02\n")
+            ]
+        
+    def test_format_msg(self):
+        errors = [(2, 9, 'print "hällo"\n')]
+        assert self._asciiencoded.format_msg("test.py", errors) == (
+            "Unexpected letters in file test.py:\n"
+            '2: print "hällo"\n\n'
+            "           ^\n"
+        )
+        
+    def test_findings_limited(self):
+        path = self._create_file("\x00" * 5000)
+        errors = self._asciiencoded.ascii_check(path, "", "")
+        assert len(errors) == asciiencoded.MAX_FINDINGS + 1
+        assert errors[-1][:2] == (1, asciiencoded.MAX_FINDINGS + 1)
+        assert len(errors[0][2]) == asciiencoded.MAX_LINE_LENGTH + 4
+        msg = self._asciiencoded.format_msg("test.py", errors)
+        assert msg.count("^") == asciiencoded.MAX_FINDINGS
+        assert "Only the first %d" % asciiencoded.MAX_FINDINGS in msg
+        
+    def test_memory_mapped(self):
+        path = self._create_file("a" * 100 + "\nb\xff\n")
+        with mock.patch.object(asciiencoded, "MMAP_SIZE", 10):
+            assert self._asciiencoded.ascii_check(path, "", "") == [(2, 2, "b\xff\n")]
+        
+    def test_run_success(self):
+        patcher = mock.patch.object(
+            asciiencoded.ASCIIEncoded, "ascii_check", mock.Mock(return_value=list()))
+        patcher.start()
         try:
-            self._init_file_mock(open_mock, '""" doc. """\nprint "hell@#"')
-            errors = self._asciiencoded.ascii_check("test.py", "", "e")
-            assert errors[0][1] == 22
+            assert self._asciiencoded.run(self._config, debug=True).success
         finally:
             patcher.stop()
-             
-    def _init_file_mock(self, open_mock, file_content):
-        open_mock.return_value = self._file_mock
-        self._file_mock.readlines = mock.Mock(return_value=[file_content])
-        
-    def test_run_success(self):
-        self._asciiencoded.ascii_check = mock.Mock(return_value=list()) 
-        assert self._asciiencoded.run(self._config, debug=True).success
         
     def test_run_error(self):
-        self._asciiencoded.ascii_check = mock.Mock(return_value=[(0, 0, 0)]) 
-        assert not self._asciiencoded.run(self._config, debug=True).success
+        patcher = mock.patch.object(
+            asciiencoded.ASCIIEncoded, "ascii_check", mock.Mock(return_value=[(0, 0, 0)]))
+        patcher.start()
+        try:
+            assert not self._asciiencoded.run(self._config, debug=True).success
+        finally:
+            patcher.stop()
@@ -43,3 +43,10 @@ class TestCaseInsensitiveFilenameClash(object):
         self._transaction.get_files.return_value = {"test.java": "A"}
         self._transaction.file_exists.return_value = False
         assert self._check.run(self.config).success
+
+    def test_detect_directory_clash(self):
+        self._transaction.get_files.return_value = {"Src/": "A", "old.java": "U"}
+        self._transaction.file_exists.reset_mock()
+        self._transaction.file_exists.return_value = True
+        assert not self._check.run(self.config).success
+        self._transaction.file_exists.assert_called_once_with("Src/", ignore_case=True)
@@ -43,14 +43,29 @@ class TestCheckout(object):
         cls._checkout = checkout.Checkout(cls._transaction)
         
     def test_success(self):
+        self._transaction.files_exist.return_value = {"test.java" : True}
         self._transaction.get_file.return_value = "filepath"
         assert self._checkout.run(self._config).success
 
     def test_missing_file(self):
-        self._transaction.file_exists.return_value = False
+        self._transaction.files_exist.return_value = {"test.java" : False}
         assert not self._checkout.run(self._config).success
 
     def test_move_failure(self):
+        self._transaction.files_exist.return_value = {"test.java" : True}
         self._transaction.get_file.return_value = "filepath"
         checkout.shutil.move.side_effect = IOError
         assert not self._checkout.run(self._config).success
+
+    def test_prefetch(self):
+        config = ConfigObj(_CONFIG_DEFAULT.splitlines()[2:] + [
+            "entries=entry1,entry2,entry3",
+            "entries.entry2.source=missing.java",
+            "entries.entry2.destination=/path/missing.java",
+            "entries.entry3.source=src/",
+            "entries.entry3.destination=/path/src"
+        ])
+        self._transaction.files_exist.return_value = {
+            "test.java" : True, "missing.java" : False, "src/" : True
+        }
+        assert self._checkout.prefetch(config) == ["test.java"]
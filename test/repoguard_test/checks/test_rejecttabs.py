@@ -19,54 +19,95 @@ Tests the RejectTabs check.
 """
 
 
+import os
+import shutil
+import tempfile
+
 from configobj import ConfigObj
 import mock
 
 from repoguard.checks import rejecttabs
+from repoguard.core.checker import FileExecutor
 
 
 class TestRejectTabs(object):
 
     def setup_method(self, _):
-        self._file_mock = mock.MagicMock()
+        self._tmpdir = tempfile.mkdtemp()
         self._transaction = mock.Mock()
         self._transaction.get_files = mock.Mock(return_value={"filepath":"A"})
+        self._set_mimetype(None)
+        self._transaction.get_file.side_effect = lambda name: os.path.join(self._tmpdir, name)
         
         self._config = ConfigObj()
         self._rejecttabs = rejecttabs.RejectTabs(self._transaction)
-
-    def test_leading_tab(self):
-        patcher = mock.patch("repoguard.checks.rejecttabs.open", create=True)
-        open_mock = patcher.start()
+        
+    def teardown_method(self, _):
+        shutil.rmtree(self._tmpdir)
+        
+    def _set_mimetype(self, mimetype):
+        self._transaction.has_property.return_value = not mimetype is None
+        self._transaction.get_property.return_value = mimetype
+        
+    def _create_file(self, content, filename="filepath"):
+        file_object = open(os.path.join(self._tmpdir, filename), "wb")
         try:
-            self._init_file_mock(open_mock, 'if True:\n\tprint "Hello world"')
-            assert not self._rejecttabs.run(self._config).success
+            file_object.write(content)
         finally:
-            patcher.stop()
+            file_object.close()
+
+    def test_leading_tab(self):
+        self._create_file('if True:\n\tprint "Hello world"')
+        assert not self._rejecttabs.run(self._config).success
             
     def test_leading_mixed_tab_space(self):
-        patcher = mock.patch("repoguard.checks.rejecttabs.open", create=True)
-        open_mock = patcher.start()
-        try:
-            self._init_file_mock(open_mock, 'if True:\n \tprint "Hello world"')
-            assert not self._rejecttabs.run(self._config).success
-        finally:
-            patcher.stop()
+        self._create_file('if True:\r\n \tprint "Hello world"')
+        assert not self._rejecttabs.run(self._config).success
             
     def test_inner_tab(self):
-        patcher = mock.patch("repoguard.checks.rejecttabs.open", create=True)
-        open_mock = patcher.start()
-        try:
-            self._init_file_mock(open_mock, 'if True:\n    print "\tHello world"')
-            assert self._rejecttabs.run(self._config).success
-        finally:
-            patcher.stop()
-            
-    def _init_file_mock(self, open_mock, file_content):
-        open_mock.return_value = self._file_mock
-        self._file_mock.__iter__ = lambda _: iter(file_content.splitlines())
+        self._create_file('if True:\n    print "\tHello world"\n\n')
+        assert self._rejecttabs.run(self._config).success
+        
+    def test_inner_tab_after_empty_line(self):
+        self._create_file('if True:\n  \n  print "\tHello world"')
+        assert self._rejecttabs.run(self._config).success
     
     def test_skip_binary_files(self):
-        self._transaction.has_property = mock.Mock(return_value=True)
-        self._transaction.get_property = mock.Mock(return_value="application/octet-stream")
+        self._create_file("\tbinary")
+        self._set_mimetype("application/octet-stream")
         assert self._rejecttabs.run(self._config).success
+        assert not self._transaction.get_file.called
+        
+    def test_skip_binary_content(self):
+        self._create_file("\0\n\tbinary")
+        assert self._rejecttabs.run(self._config).success
+        
+        self._set_mimetype("text/plain")
+        assert not self._rejecttabs.run(self._config).success
+        
+    def test_memory_mapped(self):
+        self._create_file("pass\n" * 100 + "\tpass\n")
+        with mock.patch.object(rejecttabs, "MMAP_SIZE", 10):
+            assert not self._rejecttabs.run(self._config).success
+        
+    def test_prefetch(self):
+        self._transaction.get_files.return_value = {"a.py" : "A", "b.py" : "D", "c.py" : "U"}
+        assert sorted(self._rejecttabs.prefetch(self._config)) == ["a.py", "c.py"]
+        
+    def test_process_pool(self):
+        executor = FileExecutor(2, min_files=2)
+        try:
+            files = {}
+            for index in range(20):
+                filename = "file%02d.py" % index
+                self._create_file(index % 3 and "pass\n" or "if True:\n\tpass\n", filename)
+                files[filename] = "A"
+            self._transaction.get_files.return_value = files
+            self._rejecttabs.executor = executor
+            
+            entry = self._rejecttabs.run(self._config)
+            assert entry.msg == "\n".join(
+                "File file%02d.py contains leading tabs" % index for index in range(0, 20, 3)
+            )
+        finally:
+            executor.close()
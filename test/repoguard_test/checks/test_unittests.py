@@ -35,6 +35,13 @@ class TestUnitTests(object):
         cls._config = ConfigObj()
         cls._unittests = unittests.UnitTests(cls._transaction)
 
+    def test_prefetch(self):
+        self._transaction.get_files = mock.Mock(return_value={
+            "src/Application.java":"A", "src/test/ApplicationTest.java":"A", 
+            "src/Removed.java":"D"
+        })
+        assert self._unittests.prefetch(self._config) == ["src/Application.java"]
+
     def test_skip_interface(self):
         self._transaction.get_files = mock.Mock(return_value={"ApplicationInterface.java":"A"})
         patcher = mock.patch("repoguard.checks.unittests.open", create=True)
@@ -51,7 +58,9 @@ class TestUnitTests(object):
         open_mock = patcher.start()
         try:
             self._init_file_mock(open_mock, "public class TestKlasse {\n}\n")
-            self._transaction.file_exists = mock.Mock(return_value=True)
+            self._transaction.files_exist = mock.Mock(
+                return_value={"ApplicationClassTest.java" : True}
+            )
             assert self._unittests.run(self._config).success
         finally:
             patcher.stop()
@@ -62,7 +71,9 @@ class TestUnitTests(object):
         open_mock = patcher.start()
         try:
             self._init_file_mock(open_mock, "public class TestKlasse {\n}\n")
-            self._transaction.file_exists = mock.Mock(return_value=False)
+            self._transaction.files_exist = mock.Mock(
+                return_value={"ApplicationClassTest.java" : False}
+            )
             assert not self._unittests.run(self._config).success
         finally:
             patcher.stop()
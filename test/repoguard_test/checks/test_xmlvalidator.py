@@ -19,13 +19,32 @@ Tests the XMLValidator check.
 """
 
 
+import os
+import shutil
+import StringIO
+import sys
+import tempfile
+
 from configobj import ConfigObj
 import mock
-import StringIO
+import pytest
 
 from repoguard.checks import xmlvalidator
 
 
+_SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+    <xs:element name="body">
+        <xs:complexType>
+            <xs:sequence>
+                <xs:element name="item" type="xs:int" maxOccurs="unbounded"/>
+            </xs:sequence>
+        </xs:complexType>
+    </xs:element>
+</xs:schema>
+"""
+
+
 class TestXMLValidator(object):
     
     @classmethod
@@ -45,3 +64,83 @@ class TestXMLValidator(object):
         content = '<?xml version="1.0" encoding="UTF-8"?>NOT_VALID'
         self._transaction.get_file = mock.Mock(return_value=StringIO.StringIO(content))
         assert not self._xmlvalidator.run(self._config).success
+
+    def test_validation_unbound_prefix(self):
+        content = '<?xml version="1.0" encoding="UTF-8"?><p:body></p:body>'
+        self._transaction.get_file = mock.Mock(return_value=StringIO.StringIO(content))
+        entry = self._xmlvalidator.run(self._config)
+        assert entry.msg == (
+            "XML validation error in file 'filepath': unbound prefix: line 1, column 38"
+        )
+
+
+class TestXMLValidatorFiles(object):
+    
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        self._transaction = mock.Mock()
+        self._transaction.get_files.return_value = {"a.xml" : "A", "b.xml" : "U"}
+        self._transaction.get_file.side_effect = lambda name: os.path.join(self._tmpdir, name)
+        self._xmlvalidator = xmlvalidator.XMLValidator(self._transaction)
+        self._write("schema.xsd", _SCHEMA)
+        
+    def teardown_method(self, _):
+        shutil.rmtree(self._tmpdir)
+        
+    def _write(self, filename, content):
+        file_object = open(os.path.join(self._tmpdir, filename), "wb")
+        try:
+            file_object.write(content)
+        finally:
+            file_object.close()
+            
+    def _config(self, schema=None):
+        config = ConfigObj()
+        if schema:
+            config["schema"] = os.path.join(self._tmpdir, schema)
+        return config
+    
+    def test_well_formed(self):
+        self._write("a.xml", "<body><item>1</item></body>")
+        self._write("b.xml", "<body><item>1</body>")
+        entry = self._xmlvalidator.run(self._config())
+        assert entry.msg == (
+            "XML validation error in file 'b.xml': mismatched tag: line 1, column 15"
+        )
+        
+    def test_schema_requires_lxml(self):
+        self._write("a.xml", "<body/>")
+        self._write("b.xml", "<body/>")
+        with mock.patch.dict(sys.modules, {"lxml" : None, "lxml.etree" : None}):
+            entry = self._xmlvalidator.run(self._config("schema.xsd"))
+        assert entry.result == "exception"
+        
+    def test_schema(self):
+        pytest.importorskip("lxml.etree")
+        self._write("a.xml", "<body><item>1</item><item>2</item></body>")
+        self._write("b.xml", "<body><item>x</item></body>")
+        entry = self._xmlvalidator.run(self._config("schema.xsd"))
+        assert not entry.success
+        assert "'b.xml'" in entry.msg
+        assert not "'a.xml'" in entry.msg
+        
+    def test_schema_external_entity(self):
+        pytest.importorskip("lxml.etree")
+        self._write("secret.txt", "SECRET")
+        self._write("schema.dtd", "<!ELEMENT body (item*)>\n<!ELEMENT item EMPTY>\n")
+        content = '<!DOCTYPE body [<!ENTITY x SYSTEM "file://%s">]>' \
+                  '<body><item>&x;</item></body>' % os.path.join(self._tmpdir, "secret.txt")
+        self._write("a.xml", content)
+        self._write("b.xml", content)
+        for schema in ("schema.xsd", "schema.dtd"):
+            entry = self._xmlvalidator.run(self._config(schema))
+            assert not entry.success
+            assert not "SECRET" in entry.msg
+        
+    def test_schema_cached(self):
+        pytest.importorskip("lxml.etree")
+        path = os.path.join(self._tmpdir, "schema.xsd")
+        schema = xmlvalidator._get_schema(path)
+        assert xmlvalidator._get_schema(path) is schema
+        self._write("schema.xsd", _SCHEMA + "\n")
+        assert not xmlvalidator._get_schema(path) is schema
@@ -0,0 +1,105 @@
+# pylint: disable=E1101,W0212
+# E1101: Pylint cannot find pytest.raises
+# W0212: Access to protected methods is ok in tests cases.
+#
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Test methods for the ResultCache class.
+"""
+
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from repoguard.core.cache import ResultCache
+
+
+class TestResultCache(object):
+    
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        self._cache = ResultCache(size=10, spill_size=8, spill_dir=self._tmpdir)
+        
+    def teardown_method(self, _):
+        shutil.rmtree(self._tmpdir)
+        
+    def test_get(self):
+        self._cache["a"] = "123"
+        self._cache["b"] = ["12", "34"]
+        assert self._cache["a"] == "123"
+        assert self._cache.get("b") == ["12", "34"]
+        assert self._cache.get("c") is None
+        pytest.raises(KeyError, self._cache.__getitem__, "c")
+        assert (self._cache.hits, self._cache.misses) == (2, 2)
+        assert self._cache.resident_size == 7
+        
+    def test_empty_values(self):
+        self._cache["a"] = ""
+        assert self._cache.get("a") == ""
+        assert "a" in self._cache
+        
+    def test_lru_eviction(self):
+        self._cache["a"] = "1234"
+        self._cache["b"] = "1234"
+        self._cache.get("a")
+        self._cache["c"] = "1234"
+        assert not "b" in self._cache
+        assert "a" in self._cache and "c" in self._cache
+        assert self._cache.evictions == 1
+        assert self._cache.resident_size == 8
+        
+    def test_replace(self):
+        self._cache["a"] = "1234"
+        self._cache["a"] = "12"
+        assert self._cache.resident_size == 2
+        assert len(self._cache) == 1
+        
+    def test_spill(self):
+        self._cache["large"] = "x" * 100
+        assert self._cache.spills == 1
+        assert self._cache.resident_size == 0
+        assert self._cache["large"] == "x" * 100
+        
+        self._cache.clear()
+        assert len(self._cache) == 0
+        spill_dirs = os.listdir(self._tmpdir)
+        assert len(spill_dirs) == 1
+        assert not os.listdir(os.path.join(self._tmpdir, spill_dirs[0]))
+        
+    def test_spill_discarded_concurrently(self):
+        self._cache["large"] = "x" * 100
+        # Another thread replaced the entry after the lookup.
+        os.remove(self._cache._entries["large"][2])
+        assert self._cache.get("large", "missing") == "missing"
+        assert self._cache.hits == 0
+        assert self._cache.misses == 1
+        
+    def test_no_spill_dir(self):
+        cache = ResultCache(size=10, spill_size=8)
+        cache["large"] = "x" * 100
+        assert not "large" in cache
+        
+    def test_stats(self):
+        self._cache["a"] = "1"
+        self._cache.get("a")
+        assert self._cache.stats == {
+            "hits" : 1, "misses" : 0, "evictions" : 0, "spills" : 0, 
+            "entries" : 1, "bytes" : 1
+        }
@@ -18,10 +18,19 @@
 
 
 import mock
+import os
 import random
+import shutil
+import tempfile
+import threading
+import time
+
+from validate import ValidateError
 
 from repoguard.core import constants, transaction
-from repoguard.core.checker import RepoGuard
+from repoguard.core.checker import RepoGuard, FileExecutor
+from repoguard.core.protocol import ProtocolEntry
+from repoguard.core.validator import ConfigValidator
 
 
 _CONFIG_DEFAULT = """
@@ -68,6 +77,31 @@ vcs=svn
 """
 
 
+_CONFIG_CONCURRENT = """
+vcs=svn
+
+[profiles]
+    [[default]]
+        [[[precommit]]]
+        checks=Slow.default, Fast.default, Failing.default.abortonerror, Waiting.default
+        error=Console.default,
+        success=,
+    
+[checks]
+    [[Slow]]
+        [[[default]]]
+    [[Fast]]
+        [[[default]]]
+    [[Failing]]
+        [[[default]]]
+    [[Waiting]]
+        [[[default]]]
+[handlers]
+    [[Console]]
+        [[[default]]]
+"""
+
+
 class TestRepoGuard(object):
     
     def setup_method(self, _):
@@ -124,6 +158,28 @@ class TestRepoGuard(object):
         assert self._checker.checks.fetch.call_args_list[1][0][0] == "PyLint"
         assert self._checker.checks.fetch.call_args_list[2][0][0] == "Checkstyle"
         
+    def test_default_profile_sees_all_files(self):
+        self._set_transaction_changeset(["A   ProjectA/x.py", "A   other/y.py"])
+        files = []
+        def run(*_):
+            files.append(sorted(self._checker.transaction.get_files()))
+            return mock.Mock(result=constants.SUCCESS)
+        self._checker.checks.fetch().run.side_effect = run
+        self._checker.checks.fetch.reset_mock()
+        self._checker.run()
+        assert [args[0][0] for args in self._checker.checks.fetch.call_args_list] == [
+            "Mantis", "PyLint"
+        ]
+        assert files == [["ProjectA/x.py", "other/y.py"], ["ProjectA/x.py"]]
+        
+    def test_match_regex_profile(self):
+        self._checker.main["profiles"]["ProjectB"]["regex"] = "vendors/deli/$"
+        self._set_transaction_changeset(["A   Other/vendors/deli/", "A   Other/vendors/"])
+        self._checker.run()
+        assert self._checker.checks.fetch.call_count == 2
+        assert self._checker.checks.fetch.call_args_list[0][0][0] == "Mantis"
+        assert self._checker.checks.fetch.call_args_list[1][0][0] == "Checkstyle"
+        
     def test_large_default_profile_changeset(self):
         large_changset = list()
         for _ in range(10000):
@@ -137,7 +193,209 @@ class TestRepoGuard(object):
         assert self._checker.checks.fetch.call_count == 1
         assert self._checker.checks.fetch.call_args[0][0] == "PyLint"
         
+    def test_prefetch(self):
+        self._checker.prefetch_workers = 4
+        self._checker.checks.fetch.return_value.prefetch.side_effect = [
+            ["a.py", "b.py"], ["b.py", "c.xml"], ["d.java"]
+        ]
+        self._checker.transaction.prefetch = mock.Mock(return_value=(4, 100))
+        self._set_transaction_changeset([
+            "A   ProjectB/vendors/deli/", "A   ProjectA/vendors/deli/", "A   Project/vendors/deli/"])
+        self._checker.run()
+        filenames = set()
+        for call in self._checker.transaction.prefetch.call_args_list:
+            filenames.update(call[0][0])
+            assert call[0][1] == 4
+        assert filenames == set(["a.py", "b.py", "c.xml", "d.java"])
+        
+    def test_load_transaction_bindings_fallback(self):
+        patcher = mock.patch.dict(
+            "sys.modules", {"svn": None, "repoguard.core.svnfs": None})
+        patcher.start()
+        try:
+            self._checker.load_transaction("10", constants.BINDINGS)
+            assert type(self._checker.transaction) is transaction.Transaction
+        finally:
+            patcher.stop()
+            self._checker.transaction.cleanup()
+        
     def test_run_missing_profile(self):
         self._checker.run_profile("UNDEFINED_PROFILE")
         
         assert self._checker.checks.fetch.call_count == 0
+
+
+class TestValidation(object):
+    
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self._tmpdir, "hooks"))
+        self._checker = RepoGuard(constants.PRECOMMIT, self._tmpdir)
+        self._checker.load_config("/template/dir", _CONFIG_DEFAULT.splitlines())
+        
+    def teardown_method(self, _):
+        shutil.rmtree(self._tmpdir)
+        
+    def test_unchanged(self):
+        with mock.patch.object(ConfigValidator, "validate", return_value=0) as validate:
+            assert self._checker.validate() == 0
+            assert self._checker.validate() == 0
+            assert validate.call_count == 1
+            self._checker.validate(force=True)
+            assert validate.call_count == 2
+            
+    def test_changed(self):
+        with mock.patch.object(ConfigValidator, "validate", return_value=0) as validate:
+            self._checker.validate()
+            self._checker.main["vcs"] = "git"
+            self._checker.validate()
+            assert validate.call_count == 2
+        
+    def test_invalid(self):
+        with mock.patch.object(ConfigValidator, "validate", side_effect=ValidateError) as validate:
+            for _ in range(2):
+                try:
+                    self._checker.validate()
+                except ValidateError:
+                    pass
+            assert validate.call_count == 2
+
+
+class TestConcurrentRepoGuard(object):
+    
+    def setup_method(self, _):
+        self._checker = RepoGuard(constants.PRECOMMIT, "/repo/dir")
+        self._checker.jobs = 4
+        self._checker.handlers = mock.Mock()
+        self._checker.transaction = transaction.Transaction("/path/to/repository", "10")
+        self._checker.transaction._execute_svn = mock.Mock(return_value=["A   file.txt"])
+        self._checker.load_config("/template/dir", _CONFIG_CONCURRENT.splitlines())
+        
+        self._started = dict()
+        self._cancelled = threading.Event()
+        self._checks = {
+            "Slow" : self._create_check("Slow", constants.SUCCESS, "slow", 0.2),
+            "Fast" : self._create_check("Fast", constants.SUCCESS, "fast"),
+            "Failing" : self._create_check("Failing", constants.SUCCESS, ""),
+            "Waiting" : mock.Mock()
+        }
+        self._checks["Waiting"].run.side_effect = self._wait_for_cancel
+        self._checker.checks = mock.Mock()
+        self._checker.checks.fetch.side_effect = lambda name, _: self._checks[name]
+        
+    def _create_check(self, name, result, msg, delay=0):
+        def run(config, interp):
+            self._started[name] = time.time()
+            time.sleep(delay)
+            return ProtocolEntry(name, config, result, msg)
+        check = mock.Mock()
+        check.run.side_effect = run
+        return check
+    
+    def _wait_for_cancel(self, config, interp):
+        # Simulates a long running check that queries the transaction.
+        self._started["Waiting"] = time.time()
+        for _ in range(10):
+            try:
+                self._checker.transaction._check_cancelled()
+            except transaction.TransactionCancelledException:
+                self._cancelled.set()
+                return ProtocolEntry("Waiting", config, constants.EXCEPTION, "cancelled")
+            time.sleep(0.05)
+        return ProtocolEntry("Waiting", config, constants.SUCCESS, "")
+    
+    def _protocol(self):
+        return self._checker.handlers.summarize.call_args[0][2]
+        
+    def test_run_in_order(self):
+        assert self._checker.run() == constants.SUCCESS
+        assert [entry.check for entry in self._protocol()] == [
+            "Slow", "Fast", "Failing", "Waiting"]
+        assert [call[0][2].check for call in self._checker.handlers.singularize.call_args_list] == [
+            "Slow", "Fast"]
+        # The fast check did not wait for the slow one.
+        assert self._started["Fast"] < self._started["Slow"] + 0.2
+        
+    def test_run_abort(self):
+        self._checks["Failing"] = self._create_check("Failing", constants.ERROR, "failed")
+        assert self._checker.run() == constants.ERROR
+        assert [entry.check for entry in self._protocol()] == ["Slow", "Fast", "Failing"]
+        assert self._cancelled.is_set()
+        assert not self._checker.transaction._cancelled.is_set()
+        
+    def test_run_abort_pending(self):
+        config = _CONFIG_CONCURRENT.replace(
+            "Slow.default, Fast.default, Failing.default.abortonerror, Waiting.default",
+            "Failing.default.abortonerror, Slow.default, Fast.default, Waiting.default"
+        )
+        self._checker.load_config("/template/dir", config.splitlines())
+        self._checker.jobs = 2
+        self._checks["Failing"] = self._create_check("Failing", constants.ERROR, "failed", 0.05)
+        self._checks["Fast"] = self._create_check("Fast", constants.SUCCESS, "", 0.5)
+        self._checks["Slow"] = self._create_check("Slow", constants.SUCCESS, "", 0.5)
+        assert self._checker.run() == constants.ERROR
+        assert [entry.check for entry in self._protocol()] == ["Failing"]
+        # Both workers were busy when the failure was reported.
+        assert not "Waiting" in self._started
+        
+    def test_run_starts_executor(self):
+        self._checker.executor = mock.Mock()
+        def run(config, interp):
+            self._started["Fast"] = threading.current_thread().name
+            assert self._checker.executor.start.called
+            assert not self._checker.executor.close.called
+            return ProtocolEntry("Fast", config, constants.SUCCESS, "")
+        self._checks["Fast"].run.side_effect = run
+        assert self._checker.run() == constants.SUCCESS
+        assert self._started["Fast"] != "MainThread"
+        assert self._checker.executor.close.called
+        
+    def test_run_sequential(self):
+        self._checker.jobs = 1
+        self._checks["Failing"] = self._create_check("Failing", constants.ERROR, "failed")
+        assert self._checker.run() == constants.ERROR
+        assert [entry.check for entry in self._protocol()] == ["Slow", "Fast", "Failing"]
+        assert not "Waiting" in self._started
+
+
+class TestFileExecutor(object):
+    
+    def test_map(self):
+        executor = FileExecutor(2, min_files=3)
+        try:
+            assert executor.map(abs, range(-50, 0)) == range(50, 0, -1)
+            assert not executor._pool is None
+        finally:
+            executor.close()
+        assert executor._pool is None
+            
+    def test_map_worker_thread(self):
+        executor = FileExecutor(2, min_files=3)
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(executor.map(abs, range(-5, 0))))
+        thread.start()
+        thread.join()
+        assert results == [[5, 4, 3, 2, 1]]
+        assert executor._pool is None
+        
+        executor.start()
+        try:
+            thread = threading.Thread(
+                target=lambda: results.append(executor.map(abs, range(-5, 0))))
+            thread.start()
+            thread.join()
+            assert results[1] == [5, 4, 3, 2, 1]
+            assert not executor._pool is None
+        finally:
+            executor.close()
+            
+    def test_map_small_batch(self):
+        executor = FileExecutor(2, min_files=3)
+        assert executor.map(abs, [-1, -2]) == [1, 2]
+        assert executor._pool is None
+        
+    def test_map_single_process(self):
+        executor = FileExecutor(1, min_files=0)
+        assert executor.map(abs, range(-5, 0)) == [5, 4, 3, 2, 1]
+        assert executor._pool is None
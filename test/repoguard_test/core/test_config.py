@@ -22,12 +22,15 @@ Test methods of the C{Config} class.
 
 
 import os
+import shutil
+import tempfile
 
 import mock
 import pytest
 
-from repoguard.core import constants
-from repoguard.core.config import ProjectConfig, RepoGuardConfig, Process
+from repoguard.core import cache, constants
+from repoguard.core.config import ConfigCache, ProjectConfig, RepoGuardConfig, Process
+from repoguard.core.config import ValidationStamp
 from repoguard.core import config
 
 
@@ -135,6 +138,51 @@ class TestRepoGuardConfig(object):
         
     def test_validate(self):
         assert not self.config.validate
+        
+    def test_backend(self):
+        assert self.config.backend == constants.SVNLOOK
+        
+        self.config["backend"] = constants.BINDINGS
+        assert self.config.backend == constants.BINDINGS
+        
+        self.config["backend"] = "unknown"
+        pytest.raises(ValueError, getattr, self.config, "backend")
+        
+    def test_jobs(self):
+        assert self.config.jobs == 1
+        
+        self.config["jobs"] = "4"
+        assert self.config.jobs == 4
+        
+        self.config["jobs"] = "0"
+        pytest.raises(ValueError, getattr, self.config, "jobs")
+        
+    def test_processes(self):
+        assert self.config.processes == 1
+        assert self.config.process_min_files == 50
+        
+        self.config["processes"] = "0"
+        self.config["process_min_files"] = "10"
+        assert self.config.processes == 0
+        assert self.config.process_min_files == 10
+        
+        self.config["processes"] = "-1"
+        pytest.raises(ValueError, getattr, self.config, "processes")
+        
+    def test_prefetch_workers(self):
+        assert self.config.prefetch_workers == 0
+        
+        self.config["prefetch_workers"] = "8"
+        assert self.config.prefetch_workers == 8
+        
+    def test_cache_sizes(self):
+        assert self.config.cache_size == cache.DEFAULT_SIZE
+        assert self.config.cache_spill_size == cache.DEFAULT_SPILL_SIZE
+        
+        self.config["cache_size"] = "1024"
+        self.config["cache_spill_size"] = "512"
+        assert self.config.cache_size == 1024
+        assert self.config.cache_spill_size == 512
 
 
 class TestProjectConfig(object):
@@ -224,6 +272,105 @@ class TestProjectConfig(object):
             process._set_success_handlers, [("File", "notexists")])
 
 
+
+class TestConfigCache(object):
+    
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        self._template_dir = os.path.join(self._tmpdir, "templates")
+        os.mkdir(self._template_dir)
+        self._write("templates/default.tpl.conf", _DEFAULT_CONFIG)
+        self._write("templates/python.tpl.conf", _PYTHON_CONFIG)
+        self._write("repo1/hooks/repoguard.conf", _PROJECT_CONFIG)
+        self._write("repo2/hooks/repoguard.conf", _PROJECT_CONFIG)
+        self._cache = ConfigCache(os.path.join(self._tmpdir, "cache"))
+        
+    def teardown_method(self, _):
+        shutil.rmtree(self._tmpdir)
+        
+    def _write(self, path, content):
+        path = os.path.join(self._tmpdir, path)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        file_object = open(path, "wb")
+        try:
+            file_object.write(content)
+        finally:
+            file_object.close()
+        
+    def _load(self, repository, cache_=None):
+        hooks = os.path.join(self._tmpdir, repository, "hooks")
+        return ProjectConfig(
+            os.path.join(hooks, "repoguard.conf"), hooks, [self._template_dir], 
+            cache_ or self._cache
+        )
+        
+    def test_cached(self):
+        expected = self._load("repo1", cache_=None)
+        self._load("repo1")
+        with mock.patch.object(ConfigCache, "store") as store:
+            cached = self._load("repo1")
+        assert not store.called
+        assert cached.dict() == expected.dict()
+        assert cached.extended == expected.extended
+        assert cached["DEFAULT"]["pythonhome"] == "D:/python25"
+        
+    def test_interpolation(self):
+        self._load("repo1")
+        config_ = self._load("repo2")
+        path = config_["handlers"]["File"]["default"]["file"]
+        assert path == os.path.join(self._tmpdir, "repo2", "hooks") + "/default.log"
+        
+    def test_shared_templates(self):
+        self._load("repo1")
+        self._load("repo2")
+        # Two projects and the two templates they extend.
+        assert len(os.listdir(self._cache.directory)) == 4
+        
+    def test_template_changed(self):
+        self._load("repo1")
+        self._write("templates/default.tpl.conf", "marker = changed\n" + _DEFAULT_CONFIG)
+        assert self._load("repo1")["marker"] == "changed"
+        
+    def test_corrupt_entry(self):
+        self._load("repo1")
+        for name in os.listdir(self._cache.directory):
+            self._write(os.path.join("cache", name), "corrupt")
+        assert sorted(self._load("repo1").extended.keys()) == ["default", "python"]
+
+
+class TestValidationStamp(object):
+    
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        self._stamp = ValidationStamp(os.path.join(self._tmpdir, "stamp"))
+        self._config = ProjectConfig(_DEFAULT_CONFIG.splitlines(), "/repo1/hooks")
+        
+    def teardown_method(self, _):
+        shutil.rmtree(self._tmpdir)
+        
+    def test_recorded(self):
+        assert not self._stamp.matches(self._config)
+        self._stamp.record(self._config)
+        assert self._stamp.matches(self._config)
+        
+    def test_hooks_location(self):
+        self._stamp.record(self._config)
+        assert self._stamp.matches(
+            ProjectConfig(_DEFAULT_CONFIG.splitlines(), "/repo2/hooks")
+        )
+        
+    def test_config_changed(self):
+        self._stamp.record(self._config)
+        self._config["vcs"] = "git"
+        assert not self._stamp.matches(self._config)
+        
+    def test_plugins_changed(self):
+        self._stamp.record(self._config)
+        with mock.patch.object(config, "fingerprint", return_value="changed"):
+            assert not self._stamp.matches(self._config)
+
+
 def test_no_extension_template_found():
     pytest.raises(ValueError, 
         ProjectConfig, _PROJECT_CONFIG.splitlines(), "hooks", ["template_path"])
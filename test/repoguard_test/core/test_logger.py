@@ -22,9 +22,15 @@ Tests of the LoggerFactory class.
 
 
 import logging
+import os
+import shutil
+import tempfile
+
+import mock
 import pytest
 
-from repoguard.core.logger import LoggerFactory
+from repoguard.core.logger import LazyMessage, LoggerFactory, QueueHandler
+from repoguard.core.logger import SharedRotatingFileHandler
 
 
 _LOGGER_CONFIG = """
@@ -53,6 +59,10 @@ class TestLoggerFactory(object):
         self.factory = LoggerFactory(config=_LOGGER_CONFIG.splitlines())
         assert self.factory.create().root.handlers
         assert id(self.factory) == id(LoggerFactory())
+        
+    def teardown_method(self, _):
+        # The test configuration must not be used by other tests.
+        LoggerFactory._instance = None
 
     def test_create_default(self):
         logger = self.factory.create()
@@ -84,3 +94,82 @@ class TestLoggerFactory(object):
     def test_create_from_variable_def(self):
         logger = self.factory.create("repoguard.interpolation")
         assert logger.root.handlers[0].level == 42
+
+
+class TestFileLogging(object):
+    
+    def setup_method(self, _):
+        LoggerFactory._instance = None
+        self._saved = logging.root, logging.Logger.manager
+        logging.root = logging.RootLogger(logging.WARNING)
+        logging.Logger.root = logging.root
+        logging.Logger.manager = logging.Manager(logging.root)
+        self._tmpdir = tempfile.mkdtemp()
+        
+    def teardown_method(self, _):
+        for handler in logging.root.handlers:
+            handler.close()
+        logging.root, logging.Logger.manager = self._saved
+        logging.Logger.root = logging.root
+        LoggerFactory._instance = None
+        shutil.rmtree(self._tmpdir)
+        
+    def _create_factory(self, *options):
+        config = ["output = %s" % self._tmpdir, "default = ERROR"] + list(options)
+        return LoggerFactory(config=config)
+    
+    def _read_log(self, name="repoguard.log"):
+        file_object = open(os.path.join(self._tmpdir, name), "rb")
+        try:
+            return file_object.read()
+        finally:
+            file_object.close()
+    
+    def test_queue(self):
+        factory = self._create_factory("queue = True")
+        assert isinstance(factory._file_handler, QueueHandler)
+        arguments = ["first"]
+        factory.create("repoguard.test").info("Message %s", arguments)
+        arguments.append("second")
+        factory.flush()
+        assert "Message ['first']" in self._read_log()
+        
+    def test_queue_close(self):
+        factory = self._create_factory("queue = True")
+        factory.create("repoguard.test").info("Message")
+        factory._file_handler.close()
+        assert "Message" in self._read_log()
+        
+    def test_file_level(self):
+        factory = self._create_factory("file_level = INFO")
+        logger = factory.create("repoguard.test")
+        debug, info = mock.Mock(), mock.Mock(return_value="payload")
+        logger.debug("Debug %s", LazyMessage(debug))
+        logger.info("Info %s", LazyMessage(info))
+        factory.flush()
+        assert not debug.called
+        assert info.called
+        content = self._read_log()
+        assert not "Debug" in content
+        assert "Info payload" in content
+        
+    def test_shared_rotation(self):
+        path = os.path.join(self._tmpdir, "shared.log")
+        first, second = [
+            SharedRotatingFileHandler(path, maxBytes=30, backupCount=5) 
+            for _ in range(2)
+        ]
+        try:
+            for index in range(4):
+                for handler in (first, second):
+                    handler.handle(logging.makeLogRecord({"msg" : "message %d" % index}))
+        finally:
+            first.close()
+            second.close()
+        lines = []
+        for name in sorted(os.listdir(self._tmpdir)):
+            if name.startswith("shared.log") and not name.endswith(".lock"):
+                lines.extend(self._read_log(name).splitlines())
+        assert sorted(lines) == sorted(["message %d" % (index / 2) for index in range(8)])
+        # Every file only has room for two records.
+        assert len(os.listdir(self._tmpdir)) == 5
@@ -24,17 +24,24 @@ Test module for the module package.
 """
 
 
+import inspect
+import pickle
+import pkgutil
+
 import pkg_resources
         
 from configobj import ConfigObj
 import mock
 import pytest
+import validate
 
+from repoguard import checks, handlers
 from repoguard.checks import log
 from repoguard.core import constants
 from repoguard.core.config import ProjectConfig
 from repoguard.core.module import Module, CheckManager, HandlerManager
-from repoguard.core.module import ConfigSerializer, String, Array, Handler
+from repoguard.core.module import ConfigSerializer, String, Integer, Boolean, Array, Handler
+from repoguard.core.registry import PluginRegistry
 
 
 # Configuration class definitions for test purposes
@@ -94,6 +101,142 @@ def test_conversion_to_config_dictionary():
     assert config["name.foo3.var"] == "test3"
 
 
+class _TestClass2(ConfigSerializer):
+    
+    class types(ConfigSerializer.types):
+        name = Array(_TestClass1)
+        subclass = _TestClass1
+        count = Integer(optional=True, default=1)
+        enabled = Boolean(optional=True)
+
+_TEST_CONFIG = """
+name = test1, test2, test3
+name.test1.var = test1
+name.test2.var = test2
+name.test3.var = test3
+subclass.var = test
+count = 5
+enabled = yes
+"""
+
+def test_plan_compiled_once():
+    config = ConfigObj(_TEST_CONFIG.splitlines())
+    _TestClass2.from_config(config)
+    with mock.patch.object(inspect, "getmembers") as getmembers:
+        test_class = _TestClass2.from_config(config)
+    assert not getmembers.called
+    assert test_class.count == 5
+    assert test_class.enabled is True
+    assert [item.var for item in test_class.name] == ["test1", "test2", "test3"]
+    
+def test_deserialize_once():
+    handler = Handler(None)
+    config = ConfigObj(_TEST_CONFIG.splitlines())
+    handler.__config__ = _TestClass2
+    assert handler.deserialize(config) is handler.deserialize(config)
+    other = ConfigObj(_TEST_CONFIG.splitlines())
+    assert not handler.deserialize(other) is handler.deserialize(config)
+    
+def test_deserialization_reuses_plans():
+    # Repeated deserializations build the plan of every serializer class 
+    # and the validator only once.
+    config = ConfigObj(_TEST_CONFIG.splitlines())
+    with mock.patch.dict(ConfigSerializer._plans, clear=True):
+        with mock.patch("repoguard.core.module._validator", None):
+            with mock.patch("validate.Validator", wraps=validate.Validator) as validator:
+                with mock.patch.object(
+                    inspect, "getmembers", wraps=inspect.getmembers) as getmembers:
+                    for _ in range(20):
+                        _TestClass2.from_config(config)
+    assert validator.call_count == 1
+    assert [call[0][0] for call in getmembers.call_args_list] == [
+        _TestClass2.types, _TestClass1.types
+    ]
+
+
+def _sample_config(serializer, config=None, path=()):
+    """
+    Returns a section with a value for every attribute of the serializer.
+    """
+    
+    if config is None:
+        config = ConfigObj()
+    for name, clazz in serializer._get_plan():
+        key = ".".join(path + (name, ))
+        type_ = clazz if inspect.isclass(clazz) else clazz.__class__
+        if type_ is Array:
+            if issubclass(clazz.serializer, ConfigSerializer):
+                config[key] = ["item1", "item2"]
+                for item in config[key]:
+                    _sample_config(clazz.serializer, config, path + (name, item))
+            else:
+                config[key] = ["value1", "value2"]
+        elif issubclass(type_, ConfigSerializer):
+            _sample_config(type_, config, path + (name, ))
+        elif type_ is Integer:
+            config[key] = "1"
+        elif type_ is Boolean:
+            config[key] = "true"
+        else:
+            config[key] = "value"
+    return config
+
+def _shipped_configs():
+    """
+    Returns the configuration classes of all checks and handlers whose 
+    dependencies are installed.
+    """
+    
+    configs = []
+    for package in (checks, handlers):
+        for _, name, _ in pkgutil.iter_modules(package.__path__):
+            try:
+                module = __import__(package.__name__ + "." + name, fromlist=["__name__"])
+            except ImportError:
+                continue
+            for obj in vars(module).values():
+                if inspect.isclass(obj) and issubclass(obj, Module) \
+                   and obj.__module__ == module.__name__:
+                    configs.append(obj.__config__)
+    return configs
+
+def test_shipped_configs_picklable():
+    configs = _shipped_configs()
+    assert len(configs) > 10
+    for config_class in configs:
+        for config in (ConfigObj(), _sample_config(config_class)):
+            try:
+                config_ = config_class.from_config(config)
+            except KeyError:
+                # Required attributes are missing in the empty section.
+                continue
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                copy = pickle.loads(pickle.dumps(config_, protocol))
+                assert copy.__class__ is config_class
+                assert copy.to_config() == config_.to_config()
+
+def test_config_read_only():
+    config = _TestClass2.from_config(ConfigObj(_TEST_CONFIG.splitlines()))
+    assert not hasattr(config, "__dict__")
+    assert isinstance(config.name, tuple)
+    pytest.raises(AttributeError, setattr, config, "count", 6)
+    pytest.raises(AttributeError, setattr, config.name[0], "var", "test")
+    pytest.raises(AttributeError, setattr, config, "unknown", 1)
+    pytest.raises(AttributeError, delattr, config.subclass, "var")
+    
+def test_declaration_not_modified():
+    class _Config(ConfigSerializer):
+        class types(ConfigSerializer.types):
+            sub = _TestClass1(optional=True)
+    
+    config1 = _Config.from_config({"sub.var" : "test1"})
+    config2 = _Config.from_config({"sub.var" : "test2"})
+    assert config1.sub.var == "test1"
+    assert config2.sub.var == "test2"
+    assert _Config.types.sub.var is None
+    assert not hasattr(_Config, "__section__")
+
+
 class TestModule(object):
     
     @classmethod
@@ -168,6 +311,7 @@ class TestCheckManager(object):
             check.load.return_value = log.Log
             checks.append(check)
         pkg_resources.iter_entry_points =  mock.Mock(return_value=checks)
+        PluginRegistry.reset()
 
     def test_available_checks(self):
         for check in self._cache.available_modules:
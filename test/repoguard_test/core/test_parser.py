@@ -0,0 +1,212 @@
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Compares the fast configuration parser with ConfigObj.
+"""
+
+
+import ast
+import glob
+import os
+import shutil
+import tempfile
+
+import mock
+import pytest
+from configobj import ConfigObj
+
+from repoguard.core import parser
+from repoguard.core.config import ProjectConfig
+
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..")
+_SHIPPED_FILES = glob.glob(os.path.join(_ROOT, "cfg", "*.conf")) \
+    + glob.glob(os.path.join(_ROOT, "cfg", "templates", "*.tpl.conf"))
+
+_SYNTAX = [
+    "x = # comment",
+    "x =",
+    "x =    a b   ",
+    "x = a#b",
+    "x = ,",
+    "x = , # comment",
+    "x = a,",
+    "x = a b , c ,",
+    "a b = c",
+    "x = $a ${b}",
+    "x = 'a' # comment",
+    'x = "a#b, c"',
+    "x = ''",
+    "x = ' a '",
+    "[ a b ] # comment\ny = 1",
+    "x = a\n[s]\n[[t]]\n[u]\nk = v",
+    "\xef\xbb\xbfx = \xc3\xa4, b",
+]
+
+_UNSUPPORTED = [
+    "x = 'a' b",
+    "x = 'a',",
+    "'x' = a",
+    "[ 'a' ]",
+    'x = """a\nb"""',
+    "x = a,,b",
+    "x = , a",
+    "x = a, b,,",
+    "x = 1\nx = 2",
+    "[a]\n[a]",
+    "[a]\n[[[b]]]",
+    "[a]]",
+    "[]",
+    "x",
+    " = x",
+    "x = \xff",
+]
+
+_TEMPLATE = """
+[profiles]
+    [[default]]
+        [[[precommit]]]
+        checks = Log.default,
+        success = ,
+        error = ,
+
+[checks]
+    [[Log]]
+        [[[default]]]
+        viewvc.url = ${hooks}/viewvc
+"""
+
+_PROJECT = """
+extends = base
+
+[profiles]
+    [[project]]
+        regex = ^project/
+        [[[postcommit]]]
+        checks = Log.default, RejectTabs
+        success = Console,
+        error = ,
+"""
+
+
+def _test_configs():
+    """
+    Returns the configuration strings of all test modules.
+    """
+
+    configs = []
+    test_root = os.path.join(_ROOT, "test")
+    for directory, _, filenames in os.walk(test_root):
+        for filename in sorted(filenames):
+            if not (filename.startswith("test_") and filename.endswith(".py")):
+                continue
+            path = os.path.join(directory, filename)
+            for node in ast.walk(ast.parse(open(path, "rb").read(), path)):
+                if isinstance(node, ast.Assign) and isinstance(node.value, ast.Str):
+                    names = [target.id for target in node.targets if isinstance(target, ast.Name)]
+                    if any("CONFIG" in name or "TEMPLATE" in name for name in names):
+                        configs.append(node.value.s)
+    return configs
+
+def _structure(section):
+    """
+    Returns the keys, values and subsections of a ConfigObj section in
+    their order.
+    """
+
+    return [
+        (key, _structure(value) if isinstance(value, dict) else value)
+        for key, value in section.items()
+    ]
+
+def _assert_equal(infile):
+    parsed = parser.read(infile)
+    assert not parsed is infile
+    expected = ConfigObj(infile, encoding="UTF-8", interpolation=False)
+    actual = ConfigObj(parsed, encoding="UTF-8", interpolation=False)
+    assert _structure(actual) == _structure(expected)
+
+
+@pytest.mark.parametrize("path", _SHIPPED_FILES)
+def test_shipped_files(path):
+    _assert_equal(path)
+
+def test_test_configs():
+    configs = _test_configs()
+    assert len(configs) > 20
+    for config in configs:
+        _assert_equal(config.splitlines())
+
+@pytest.mark.parametrize("config", _SYNTAX)
+def test_syntax(config):
+    _assert_equal(config.splitlines())
+
+@pytest.mark.parametrize("config", _UNSUPPORTED)
+def test_unsupported(config):
+    lines = config.splitlines()
+    assert parser.read(lines) is lines
+
+def test_other_input():
+    assert parser.read(None) is None
+    assert parser.read("missing.conf") == "missing.conf"
+    config = {"x" : "a"}
+    assert parser.read(config) is config
+
+
+class TestProjectConfig(object):
+
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        for name, content in [("base.tpl.conf", _TEMPLATE), ("repoguard.conf", _PROJECT)]:
+            file_object = open(os.path.join(self._tmpdir, name), "wb")
+            try:
+                file_object.write(content)
+            finally:
+                file_object.close()
+
+    def teardown_method(self, _):
+        shutil.rmtree(self._tmpdir)
+
+    def _load(self):
+        config = ProjectConfig(
+            os.path.join(self._tmpdir, "repoguard.conf"), "/hooks", [self._tmpdir]
+        )
+        result = []
+        for profile in config.profiles:
+            for hook in ("precommit", "postcommit"):
+                process = profile.get_process(hook)
+                if process:
+                    result.append((
+                        profile.name, profile.regex, hook,
+                        [(name, self._dict(section), interp) for name, section, interp in process.checks],
+                        [(name, self._dict(section)) for name, section in process.success],
+                        [(name, self._dict(section)) for name, section in process.error]
+                    ))
+        return config.filename, config.extended, result
+
+    @staticmethod
+    def _dict(section):
+        return section and section.dict()
+
+    def test_same_structures(self):
+        expected = self._load()
+        with mock.patch.object(parser, "read", side_effect=lambda infile: infile):
+            assert self._load() == expected
+        assert expected[2][1][3] == [
+            ("Log", {"viewvc.url" : "/hooks/viewvc"}, "abortonerror"),
+            ("RejectTabs", None, "abortonerror")
+        ]
@@ -0,0 +1,202 @@
+# pylint: disable=E1101,W0212
+# E1101: Pylint cannot find pytest.raises
+# W0212: Access to protected methods is ok in tests cases.
+#
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Test methods for the PathIndex class and its use by the Transaction class.
+"""
+
+
+import os
+import shutil
+import tempfile
+
+import mock
+
+from repoguard.core.pathindex import PathIndex
+from repoguard.core.transaction import Transaction
+
+
+_TREE = [
+    "/", "src/", "src/Main/", "src/Main/App.java", "src/Main/Util.java",
+    "src/MainTest/", "src/MainTest/AppTest.java", "README"
+]
+
+def _revision(number, changed, trees=None, copied=()):
+    transaction = mock.Mock()
+    transaction.txn_name = str(number)
+    transaction._get_changed_paths.return_value = changed
+    transaction._get_copied_paths.return_value = list(copied)
+    transaction._get_tree.side_effect = lambda path="": trees[path]
+    return transaction
+
+
+class TestPathIndex(object):
+
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        self._index = PathIndex(os.path.join(self._tmpdir, "repoguard.index"))
+        self._index.rebuild(_revision(5, [], {"": _TREE}))
+
+    def teardown_method(self, _):
+        self._index.close()
+        shutil.rmtree(self._tmpdir)
+
+    def test_rebuild(self):
+        assert self._index.revision == 5
+        assert len(self._index) == 7
+        assert self._index.exists("src/Main/")
+        assert self._index.exists("src/Main/App.java")
+        assert not self._index.exists("src/Main/app.java")
+
+    def test_find_ignore_case(self):
+        assert self._index.find_ignore_case("readme") == ["README"]
+        assert self._index.find_ignore_case("SRC/MAIN/") == ["src/Main"]
+        assert self._index.find_ignore_case("missing") == []
+
+    def test_persistence(self):
+        self._index.close()
+        self._index = PathIndex(os.path.join(self._tmpdir, "repoguard.index"))
+        assert self._index.revision == 5
+        assert self._index.exists("README")
+
+    def test_update(self):
+        revision = _revision(6, [
+            ("src/Main/", "D"), ("README", "U"), ("lib/", "A"), ("lib/a.jar", "A")
+        ], {})
+        self._index.update(revision)
+        # Added directories that are not copied list their children.
+        assert not revision._get_tree.called
+        assert self._index.revision == 6
+        assert self._index.exists("lib/")
+        assert not self._index.exists("src/Main")
+        assert not self._index.exists("src/Main/App.java")
+        # Directories sharing the prefix stay untouched.
+        assert self._index.exists("src/MainTest/AppTest.java")
+        assert self._index.exists("lib/a.jar")
+
+    def test_update_copied_directory(self):
+        trees = {"tags/1.0/": ["tags/1.0/", "tags/1.0/Main/", "tags/1.0/Main/App.java"]}
+        self._index.update(_revision(6, [("tags/1.0/", "A")], trees, ["tags/1.0/"]))
+        assert self._index.exists("tags/1.0/Main/App.java")
+
+    def test_update_out_of_order(self):
+        self._index.update(_revision(7, [("README", "D")]))
+        assert self._index.revision == 5
+        assert self._index.exists("README")
+
+    def test_synchronize(self):
+        revisions = {
+            "6": _revision(6, [("NEWS", "A")]),
+            "7": _revision(7, [("README", "D")])
+        }
+        self._index.synchronize("repo", 7, lambda _, number: revisions[number])
+        assert self._index.revision == 7
+        assert self._index.exists("NEWS")
+        assert not self._index.exists("README")
+
+    def test_synchronize_limit(self):
+        revisions = dict(
+            (str(number), _revision(number, [("file%d" % number, "A")])) 
+            for number in range(6, 11)
+        )
+        self._index.synchronize("repo", 10, lambda _, number: revisions[number], limit=2)
+        assert self._index.revision == 7
+        assert self._index.exists("file7")
+        assert not self._index.exists("file8")
+
+    def test_read_snapshot(self):
+        assert self._index.begin_read() == 5
+        writer = PathIndex(os.path.join(self._tmpdir, "repoguard.index"))
+        try:
+            writer.update(_revision(6, [("README", "D")]))
+            assert writer.revision == 6
+        finally:
+            writer.close()
+        # The reader does not see the concurrent update.
+        assert self._index.revision == 5
+        assert self._index.exists("README")
+        self._index.end_read()
+        assert self._index.revision == 6
+        assert not self._index.exists("README")
+
+
+class TestIndexedTransaction(object):
+
+    def setup_method(self, _):
+        self._transaction = Transaction("repoPath", "5-1")
+        self._transaction.path_index = mock.Mock(revision=5)
+        self._transaction.path_index.exists.side_effect = lambda path: path in _TREE
+        self._transaction.path_index.find_ignore_case.side_effect = lambda path: [
+            entry for entry in _TREE if entry.lower() == path
+        ]
+        self._transaction._execute_svn = mock.Mock()
+        self._transaction._execute_svn.side_effect = self._execute_svn
+        self._changed = []
+        self._copied = []
+
+    def _execute_svn(self, command, arg="", split=False):
+        if command == "changed" and arg == "--copy-info":
+            return ["A + %s" % path for path in self._copied]
+        if command == "changed":
+            return ["%-3s %s" % (attributes, path) for path, attributes in self._changed]
+        if command == "tree":
+            return ["src/", "src/main/app.java", "src/Main/App.java"]
+        return ""
+
+    def _svnlook_commands(self):
+        return [call[0][0] for call in self._transaction._execute_svn.call_args_list]
+
+    def test_base_revision(self):
+        assert self._transaction.base_revision == 5
+        assert Transaction("repoPath", "6").base_revision == 5
+        assert Transaction("repoPath", None).base_revision is None
+
+    def test_file_exists(self):
+        self._changed = [("NEWS", "A"), ("src/Main/Util.java", "D")]
+        assert self._transaction.file_exists("README")
+        assert self._transaction.file_exists("NEWS")
+        assert not self._transaction.file_exists("src/Main/Util.java")
+        assert not self._transaction.file_exists("missing.txt")
+        assert not "proplist" in self._svnlook_commands()
+
+    def test_file_exists_below_deleted_directory(self):
+        self._changed = [("src/Main/", "D")]
+        assert not self._transaction.file_exists("src/Main/App.java")
+
+    def test_file_exists_below_copied_directory(self):
+        self._changed = [("branch/", "A")]
+        self._copied = ["branch/"]
+        assert self._transaction.file_exists("branch/App.java")
+        assert "proplist" in self._svnlook_commands()
+
+    def test_file_exists_ignore_case(self):
+        self._changed = [("src/main/app.java", "A")]
+        assert self._transaction.file_exists("src/main/app.java", ignore_case=True)
+        assert not self._transaction.file_exists("readme", ignore_case=True)
+        assert not "tree" in self._svnlook_commands()
+
+    def test_file_exists_ignore_case_deleted(self):
+        self._changed = [("src/main/app.java", "A"), ("src/Main/", "D")]
+        assert not self._transaction.file_exists("src/main/app.java", ignore_case=True)
+
+    def test_file_exists_ignore_case_copied(self):
+        self._changed = [("src/main/app.java", "A")]
+        self._copied = ["src/"]
+        assert self._transaction.file_exists("src/main/app.java", ignore_case=True)
+        assert "tree" in self._svnlook_commands()
@@ -0,0 +1,113 @@
+# pylint: disable=E1101,W0212
+# E1101: Pylint cannot find pytest.raises
+# W0212: Access to protected methods is ok in tests cases.
+#
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Test methods for the PathMatcher class.
+"""
+
+
+import mock
+
+from repoguard.core import pathmatcher
+from repoguard.core.pathmatcher import PathMatcher, ProfileRouter
+from repoguard.core.transaction import Transaction
+
+
+_PATHS = ["src/App.java", "src/app.py", "test/AppTest.java", "doc/index.html"]
+
+
+def test_match():
+    matcher = PathMatcher([".*\.java$", "^doc/"], ["^test/"])
+    assert matcher.filter(_PATHS) == ["src/App.java", "doc/index.html"]
+    assert matcher.match("doc/index.html")
+    assert not matcher.match("test/AppTest.java")
+
+def test_match_empty_lists():
+    assert PathMatcher([], []).filter(_PATHS) == []
+    assert PathMatcher([".*"], []).filter(_PATHS) == _PATHS
+
+def test_match_not_combinable():
+    # Group references and inline flags are matched pattern by pattern.
+    matcher = PathMatcher([r"(a)\1", "(?i)APP\.PY", "doc"], [])
+    assert matcher.filter(_PATHS + ["aa"]) == ["src/app.py", "doc/index.html", "aa"]
+    
+def test_match_duplicate_group_names():
+    matcher = PathMatcher(["(?P<name>\.java)", "(?P<name>\.py)"], [])
+    assert matcher.filter(_PATHS) == ["src/App.java", "src/app.py", "test/AppTest.java"]
+
+def test_create_shares_matchers():
+    assert PathMatcher.create(["a", "b"], ["c"]) is PathMatcher.create(("a", "b"), ("c", ))
+    
+def test_get_files_compiles_once():
+    transaction = Transaction("repoPath", "10")
+    transaction._execute_svn = mock.Mock(
+        return_value=["A   %s" % path for path in _PATHS * 100]
+    )
+    try:
+        patcher = mock.patch.object(
+            pathmatcher.re, "compile", side_effect=pathmatcher.re.compile
+        )
+        compile_ = patcher.start()
+        try:
+            for _ in range(3):
+                assert transaction.get_files(["\.html$", "^src/"], ["\.py$"]) == {
+                    "src/App.java" : "A", "doc/index.html" : "A"
+                }
+        finally:
+            patcher.stop()
+        assert compile_.call_count <= 2
+        assert transaction._execute_svn.call_count == 1
+    finally:
+        transaction.cleanup()
+
+def test_literal_prefix():
+    assert pathmatcher._literal_prefix("^ProjectA") == "ProjectA"
+    assert pathmatcher._literal_prefix("^Project\.A/.*") == "Project.A/"
+    assert pathmatcher._literal_prefix("^") == ""
+    assert pathmatcher._literal_prefix("ProjectA") is None
+    assert pathmatcher._literal_prefix("^Project[AB]") is None
+    assert pathmatcher._literal_prefix("^ProjectA$") is None
+
+def test_route():
+    router = ProfileRouter([
+        ("default", None), ("a", "^src/"), ("app", "^src/App"), 
+        ("java", "\.java$"), ("other", None)
+    ])
+    changes = [(path, "A") for path in _PATHS]
+    assert router.route(changes) == {
+        "default" : [("doc/index.html", "A")],
+        "a" : [("src/App.java", "A"), ("src/app.py", "A")],
+        "app" : [("src/App.java", "A")],
+        "java" : [("src/App.java", "A"), ("test/AppTest.java", "A")],
+        "other" : [("doc/index.html", "A")]
+    }
+
+def test_get_files_of_partition():
+    transaction = Transaction("repoPath", "10")
+    transaction._execute_svn = mock.Mock(
+        return_value=["A   %s" % path for path in _PATHS]
+    )
+    try:
+        transaction.set_partition("a", [("src/App.java", "A"), ("src/app.py", "A")])
+        assert transaction.get_files() == {"src/App.java" : "A", "src/app.py" : "A"}
+        assert transaction.get_files(["\.py$"]) == {"src/app.py" : "A"}
+        transaction.profile = ".*"
+        assert len(transaction.get_files()) == 4
+    finally:
+        transaction.cleanup()
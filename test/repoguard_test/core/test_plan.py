@@ -0,0 +1,191 @@
+# pylint: disable=W0212
+# W0212: Access of protected members for test purposes is fine.
+#
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+""" Tests the compiled execution plans. """
+
+
+import os
+import shutil
+import tempfile
+import time
+
+import mock
+
+from repoguard.checks import log
+from repoguard.core import constants, plan
+from repoguard.core.checker import RepoGuard
+from repoguard.core.config import ProjectConfig
+from repoguard.core.module import CheckManager
+from repoguard.core.plan import ExecutionPlan
+from repoguard.core.registry import PluginRegistry
+from repoguard.handlers import console
+
+
+_TEMPLATE = """
+[handlers]
+    [[Console]]
+        [[[default]]]
+        protocol.include = Log,
+"""
+
+_CONFIG = """
+extends = base
+
+[profiles]
+    [[default]]
+        [[[precommit]]]
+        default = warning
+        checks = Log.default, Log.viewvc.abortonerror
+        success = ,
+        error = Console.default,
+
+    [[project]]
+        regex = ^project/
+        [[[postcommit]]]
+        checks = Log,
+        success = Console,
+        error = ,
+
+[checks]
+    [[Log]]
+        [[[default]]]
+        [[[viewvc]]]
+        viewvc.url = ${hooks}/viewvc
+        viewvc.root = repos
+"""
+
+
+def _load(name):
+    return {"Log" : log.Log, "Console" : console.Console}[name]
+
+
+class TestExecutionPlan(object):
+
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        self._template_dir = os.path.join(self._tmpdir, "templates")
+        self._hooks = os.path.join(self._tmpdir, "hooks")
+        os.mkdir(self._template_dir)
+        os.mkdir(self._hooks)
+        self._write(os.path.join(self._template_dir, "base.tpl.conf"), _TEMPLATE)
+        self._config_path = os.path.join(self._hooks, constants.CONFIG_FILENAME)
+        self._write(self._config_path, _CONFIG)
+        self._plan_path = os.path.join(self._hooks, constants.PLAN_FILENAME)
+        PluginRegistry.reset()
+
+    def teardown_method(self, _):
+        PluginRegistry.reset()
+        shutil.rmtree(self._tmpdir)
+
+    @staticmethod
+    def _write(path, content):
+        file_object = open(path, "wb")
+        try:
+            file_object.write(content)
+        finally:
+            file_object.close()
+
+    def _compile(self):
+        config = ProjectConfig(self._config_path, self._hooks, [self._template_dir])
+        with mock.patch.object(CheckManager, "load", side_effect=_load):
+            ExecutionPlan.compile(config, [self._template_dir]).dump(self._plan_path)
+
+    def test_load(self):
+        self._compile()
+        plan_ = ExecutionPlan.load(self._plan_path, [self._template_dir])
+        assert [(profile.name, profile.regex) for profile in plan_.profiles] == [
+            ("default", None), ("project", "^project/")
+        ]
+        default, project = plan_.profiles
+        assert default.get_process(constants.POSTCOMMIT) is None
+        assert project.get_process(constants.PRECOMMIT) is None
+
+        process = default.get_process(constants.PRECOMMIT)
+        assert [(name, interp) for name, _, interp in process.checks] == [
+            ("Log", constants.WARNING), ("Log", constants.ABORTONERROR)
+        ]
+        viewvc = process.checks[1][1].viewvc
+        assert (viewvc.url, viewvc.root) == (self._hooks + "/viewvc", "repos")
+        assert process.success == []
+        assert process.error[0][1].protocol.include == ("Log", )
+        assert plan_.plugins == {
+            constants.CHECKS : {"Log" : log.Log},
+            constants.HANDLERS : {"Console" : console.Console}
+        }
+
+    def test_register_plugins(self):
+        self._compile()
+        ExecutionPlan.load(self._plan_path, [self._template_dir]).register_plugins()
+        with mock.patch("pkg_resources.iter_entry_points", return_value=[]):
+            assert CheckManager().load("Log") is log.Log
+
+    def test_missing(self):
+        assert ExecutionPlan.load(self._plan_path, [self._template_dir]) is None
+
+    def test_corrupt(self):
+        self._write(self._plan_path, "corrupt")
+        assert ExecutionPlan.load(self._plan_path, [self._template_dir]) is None
+
+    def test_config_changed(self):
+        self._compile()
+        self._write(self._config_path, _CONFIG + "\n# Changed\n")
+        assert ExecutionPlan.load(self._plan_path, [self._template_dir]) is None
+
+    def test_template_changed(self):
+        self._compile()
+        path = os.path.join(self._template_dir, "base.tpl.conf")
+        self._write(path, _TEMPLATE)
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        assert ExecutionPlan.load(self._plan_path, [self._template_dir]) is None
+
+    def test_template_dirs_changed(self):
+        self._compile()
+        assert ExecutionPlan.load(self._plan_path, []) is None
+
+    def test_plugins_changed(self):
+        self._compile()
+        with mock.patch.object(plan, "fingerprint", return_value="changed"):
+            assert ExecutionPlan.load(self._plan_path, [self._template_dir]) is None
+
+    def test_version_changed(self):
+        self._compile()
+        with mock.patch.object(plan, "PLAN_VERSION", plan.PLAN_VERSION + 1):
+            assert ExecutionPlan.load(self._plan_path, [self._template_dir]) is None
+
+    def test_repoguard_load_plan(self):
+        checker = RepoGuard(constants.PRECOMMIT, self._tmpdir)
+        assert not checker.load_plan(self._plan_path, [self._template_dir])
+        self._compile()
+        assert checker.load_plan(self._plan_path, [self._template_dir])
+        assert [profile.name for profile in checker.main.profiles] == ["default", "project"]
+
+    def test_run(self):
+        self._compile()
+        checker = RepoGuard(constants.PRECOMMIT, self._tmpdir)
+        checker.load_plan(self._plan_path, [self._template_dir])
+        checker.checks = mock.Mock()
+        checker.handlers = mock.Mock()
+        checker.transaction = mock.Mock()
+        checker.transaction._get_changes.return_value = [("trunk/a.py", "A")]
+        check = checker.checks.fetch.return_value
+        check.run.return_value = mock.Mock(result=constants.SUCCESS, msg="", success=True)
+
+        assert checker.run() == constants.SUCCESS
+        configs = [args[0] for args, _ in check.run.call_args_list]
+        assert configs[0].viewvc is None
+        assert configs[1].viewvc.root == "repos"
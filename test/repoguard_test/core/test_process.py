@@ -21,6 +21,8 @@ Tests the process execution.
 """
 
 
+import sys
+
 import mock
 import pytest
 
@@ -57,3 +59,29 @@ def test_execute_error():
         pytest.raises(process.ProcessException, process.execute, "somecommand")
     finally:
         patcher.stop()
+
+class _RecordingFile(object):
+    
+    def __init__(self):
+        self.size = 0
+        self.largest_write = 0
+        
+    def write(self, data):
+        self.size += len(data)
+        self.largest_write = max(self.largest_write, len(data))
+
+def test_stream():
+    file_object = _RecordingFile()
+    command = '"%s" -c "import sys; sys.stdout.write(\'x\' * (8 * 1024 * 1024))"'
+    process.stream(command % sys.executable, file_object, chunk_size=4096)
+    assert file_object.size == 8 * 1024 * 1024
+    # The output never enters memory in larger pieces than one chunk.
+    assert file_object.largest_write <= 4096
+    
+def test_stream_error():
+    command = '"%s" -c "import sys; sys.stderr.write(\'failed\'); sys.exit(2)"'
+    error = pytest.raises(
+        process.ProcessException, process.stream, command % sys.executable, _RecordingFile()
+    ).value
+    assert error.exit_code == 2
+    assert error.output == "failed"
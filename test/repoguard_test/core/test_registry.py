@@ -0,0 +1,126 @@
+# pylint: disable=E1101,W0212
+# E1101: Pylint cannot find pytest.raises
+# W0212: Access to protected methods is ok in tests cases.
+#
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Test methods for the PluginRegistry class.
+"""
+
+
+import os
+import shutil
+import tempfile
+
+import mock
+import pkg_resources
+import pytest
+
+from repoguard.checks import log
+from repoguard.core import registry
+from repoguard.core.module import CheckManager
+from repoguard.core.registry import PluginRegistry
+
+
+def _entrypoint(name):
+    entrypoint = mock.Mock(module_name="repoguard.checks.log", attrs=("Log",))
+    entrypoint.name = name
+    entrypoint.load.return_value = log.Log
+    return entrypoint
+
+
+class TestPluginRegistry(object):
+    
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        PluginRegistry.reset()
+        self._entrypoints = mock.Mock(return_value=[_entrypoint("Log"), _entrypoint("Other")])
+        self._patch = mock.patch.object(pkg_resources, "iter_entry_points", self._entrypoints)
+        self._patch.start()
+        
+    def teardown_method(self, _):
+        self._patch.stop()
+        PluginRegistry.manifest_path = None
+        PluginRegistry.reset()
+        shutil.rmtree(self._tmpdir)
+        
+    def test_get(self):
+        assert PluginRegistry.get("repoguard.checks") is PluginRegistry.get("repoguard.checks")
+        assert not PluginRegistry.get("repoguard.checks") is PluginRegistry.get("repoguard.handlers")
+        
+    def test_index_once(self):
+        plugins = PluginRegistry.get("repoguard.checks")
+        assert sorted(plugins.names) == ["Log", "Other"]
+        assert plugins.load("Log") is log.Log
+        assert plugins.load("Log") is log.Log
+        pytest.raises(ImportError, plugins.load, "Missing")
+        assert self._entrypoints.call_count == 1
+        
+    def test_fetch_cached(self):
+        manager = CheckManager()
+        check = manager.fetch("Log")
+        with mock.patch.object(manager, "load") as load:
+            assert manager.fetch("Log") is check
+            assert not load.called
+        
+    def test_manifest(self):
+        PluginRegistry.manifest_path = os.path.join(self._tmpdir, "plugins.manifest")
+        assert sorted(PluginRegistry.get("repoguard.checks").names) == ["Log", "Other"]
+        assert os.path.exists(PluginRegistry.manifest_path)
+        
+        PluginRegistry.reset()
+        self._entrypoints.reset_mock()
+        plugins = PluginRegistry.get("repoguard.checks")
+        assert plugins.load("Log") is log.Log
+        assert not self._entrypoints.called
+        
+    def test_manifest_outdated(self):
+        PluginRegistry.manifest_path = os.path.join(self._tmpdir, "plugins.manifest")
+        PluginRegistry.get("repoguard.checks").names
+        
+        PluginRegistry.reset()
+        self._entrypoints.reset_mock()
+        with mock.patch.object(registry, "fingerprint", return_value="changed"):
+            PluginRegistry.get("repoguard.checks").names
+        assert self._entrypoints.called
+        
+    def test_manifest_invalid(self):
+        PluginRegistry.manifest_path = os.path.join(self._tmpdir, "plugins.manifest")
+        file_object = open(PluginRegistry.manifest_path, "wb")
+        try:
+            file_object.write("{invalid")
+        finally:
+            file_object.close()
+        assert sorted(PluginRegistry.get("repoguard.checks").names) == ["Log", "Other"]
+        
+    def test_fingerprint_develop_install(self):
+        site_dir = os.path.join(self._tmpdir, "site-packages")
+        info_dir = os.path.join(self._tmpdir, "project", "plugin.egg-info")
+        os.makedirs(site_dir)
+        os.makedirs(info_dir)
+        file_object = open(os.path.join(site_dir, "plugin.egg-link"), "w")
+        try:
+            file_object.write(os.path.dirname(info_dir) + "\n.\n")
+        finally:
+            file_object.close()
+        entry_points = os.path.join(info_dir, "entry_points.txt")
+        open(entry_points, "w").close()
+        
+        with mock.patch.object(registry.sys, "path", [site_dir]):
+            before = registry.fingerprint()
+            os.utime(entry_points, (0, 0))
+            assert registry.fingerprint() != before
@@ -0,0 +1,186 @@
+# pylint: disable=E1101,W0212
+# E1101: Pylint cannot find pytest.raises
+# W0212: Access to protected methods is ok in tests cases.
+#
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Test methods for the HookServer class and the repoguard-client script.
+"""
+
+
+import imp
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+import mock
+import pytest
+
+from repoguard.core.config import file_stamp
+from repoguard.core.service import HookServer
+
+
+_CLIENT_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "scripts", "repoguard-client"
+)
+
+def _runner(hook, repo_path, txn_name, profile_name, halt_on_exception, jobs, 
+            main_config, project_config):
+    os.write(2, "%s %s %s\n" % (hook, txn_name, profile_name))
+    os.write(1, "preloaded: %s\n" % (not project_config is None))
+    return 3
+
+
+class TestHookServer(object):
+    
+    def setup_method(self, _):
+        self._tmpdir = tempfile.mkdtemp()
+        self._repo_path = os.path.join(self._tmpdir, "repos")
+        os.makedirs(os.path.join(self._repo_path, "hooks"))
+        self._socket_path = os.path.join(self._tmpdir, "repoguard.sock")
+        self._template_dir = os.path.join(self._tmpdir, "templates")
+        os.makedirs(self._template_dir)
+        self._main_config = mock.Mock(
+            template_dirs=[self._template_dir], validate=False, filename=None
+        )
+        self._project_config = mock.patch("repoguard.core.service.ProjectConfig")
+        self._project_config.start().return_value.extended = {}
+        self._server = HookServer(
+            self._socket_path, _runner, self._main_config, [self._repo_path]
+        )
+        
+    def teardown_method(self, _):
+        self._server.server_close()
+        self._project_config.stop()
+        shutil.rmtree(self._tmpdir)
+        
+    def test_run_hook(self):
+        exit_code, output = self._server.run_hook({
+            "hook" : "precommit", "repo_path" : self._repo_path, 
+            "txn_name" : u"5-1", "profile" : "java"
+        })
+        assert exit_code == 3
+        assert "precommit 5-1 java" in output
+        assert "preloaded: True" in output
+        
+    def test_run_hook_not_preloaded(self):
+        _, output = self._server.run_hook({
+            "hook" : "postcommit", "repo_path" : self._tmpdir, "txn_name" : "6"
+        })
+        assert "preloaded: False" in output
+        
+    def test_preload_invalid_config(self):
+        self._main_config.validate = True
+        with mock.patch("repoguard.core.service.ConfigValidator") as validator:
+            validator.return_value.validate.side_effect = ValueError
+            self._server.preload(self._repo_path)
+        assert self._server._projects[self._repo_path][1] is None
+        
+    def test_refresh(self):
+        path = os.path.join(self._repo_path, "hooks", "repoguard.conf")
+        open(path, "w").close()
+        self._server.refresh()
+        assert self._server._projects[self._repo_path][0][0] == file_stamp(path)
+        
+    def test_refresh_template(self):
+        template = os.path.join(self._template_dir, "base.tpl.conf")
+        open(template, "w").close()
+        with mock.patch("repoguard.core.service.ProjectConfig") as project_config:
+            project_config.return_value.extended = {"base" : template}
+            self._server.preload(self._repo_path)
+            project_config.reset_mock()
+            self._server.refresh()
+            assert not project_config.called
+            
+            os.utime(template, (0, 0))
+            self._server.refresh()
+            assert project_config.called
+            
+    def test_refresh_main_config(self):
+        path = os.path.join(self._tmpdir, "repoguard.conf")
+        open(path, "w").write("validate = False\n")
+        self._main_config.filename = path
+        self._server._main_stamp = None
+        with mock.patch("repoguard.core.service.RepoGuardConfig") as config:
+            config.return_value.template_dirs = []
+            config.return_value.validate = False
+            config.return_value.filename = path
+            self._server.refresh()
+            config.assert_called_once_with(path)
+            assert self._server.main_config is config.return_value
+            self._server.refresh()
+            assert config.call_count == 1
+        
+    def test_remove_stale_socket(self):
+        stale = os.path.join(self._tmpdir, "stale.sock")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(stale)
+        server.close()
+        HookServer._remove_stale_socket(stale)
+        assert not os.path.exists(stale)
+        
+    def test_socket_in_use(self):
+        with pytest.raises(socket.error):
+            HookServer._remove_stale_socket(self._socket_path)
+        
+    def test_client(self, capsys):
+        client = imp.load_source("repoguard_client", _CLIENT_PATH)
+        thread = threading.Thread(target=self._server.handle_request)
+        thread.start()
+        with mock.patch.dict(os.environ, {"REPOGUARD_SOCKET" : self._socket_path}):
+            exit_code = client.main(["precommit", "-p", "java", self._repo_path, "5-1"])
+        thread.join()
+        assert exit_code == 3
+        output = capsys.readouterr()[1]
+        assert "precommit 5-1 java" in output
+        assert "preloaded: True" in output
+        
+    def test_client_fallback(self):
+        client = imp.load_source("repoguard_client", _CLIENT_PATH)
+        missing = os.path.join(self._tmpdir, "missing.sock")
+        with mock.patch.dict(os.environ, {"REPOGUARD_SOCKET" : missing}):
+            with mock.patch("os.execvp", side_effect=SystemExit(0)) as execvp:
+                with pytest.raises(SystemExit):
+                    client.main(["postcommit", self._repo_path, "6"])
+        execvp.assert_called_once_with(
+            "repoguard", ["repoguard", "postcommit", self._repo_path, "6"]
+        )
+        
+    def test_client_untrusted_service(self):
+        client = imp.load_source("repoguard_client", _CLIENT_PATH)
+        with mock.patch.dict(os.environ, {"REPOGUARD_SOCKET" : self._socket_path}):
+            with mock.patch("os.getuid", return_value=os.getuid() + 1):
+                with mock.patch("os.execvp", side_effect=SystemExit(0)) as execvp:
+                    with pytest.raises(SystemExit):
+                        client.main(["precommit", self._repo_path, "5-1"])
+        execvp.assert_called_once_with(
+            "repoguard", ["repoguard", "precommit", self._repo_path, "5-1"]
+        )
+        
+    def test_client_default_socket(self):
+        client = imp.load_source("repoguard_client", _CLIENT_PATH)
+        self._server.server_close()
+        socket_path = os.path.join(self._repo_path, "hooks", "repoguard.sock")
+        self._server = HookServer(socket_path, _runner, self._main_config)
+        thread = threading.Thread(target=self._server.handle_request)
+        thread.start()
+        with mock.patch.dict(os.environ, clear=True):
+            exit_code = client.main(["postcommit", self._repo_path, "6"])
+        thread.join()
+        assert exit_code == 3
@@ -0,0 +1,117 @@
+# pylint: disable=E1101,W0212
+# E1101: Pylint cannot find pytest.raises
+# W0212: Access to protected methods is ok in tests cases.
+#
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Compares the bindings based transaction with the svnlook based one
+on a local repository.
+"""
+
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from repoguard.core import process
+from repoguard.core.transaction import Transaction
+
+try:
+    from repoguard.core.svnfs import FSTransaction
+    process.execute("svnadmin --version")
+    process.execute("svnlook --version")
+    _SKIP = False
+except (ImportError, process.ProcessException):
+    _SKIP = True
+
+
+class TestFSTransaction(object):
+
+    pytestmark = pytest.mark.skipif("_SKIP")
+
+    @classmethod
+    def setup_class(cls):
+        cls._root = tempfile.mkdtemp()
+        cls._repos_path = os.path.join(cls._root, "repos")
+        working_copy = os.path.join(cls._root, "wc")
+        url = "file://" + cls._repos_path.replace(os.sep, "/")
+
+        process.execute('svnadmin create "%s"' % cls._repos_path)
+        process.execute('svn checkout -q "%s" "%s"' % (url, working_copy))
+        os.makedirs(os.path.join(working_copy, "src", "Main"))
+        for path, content in [("src/Main/App.java", "class App {\n}\n"),
+                              ("README", "read me\n")]:
+            file_object = open(os.path.join(working_copy, path), "wb")
+            try:
+                file_object.write(content)
+            finally:
+                file_object.close()
+        os.chdir(working_copy)
+        try:
+            process.execute("svn add -q src README")
+            process.execute("svn propset -q svn:keywords Date README")
+            process.execute('svn commit -q -m "Initial import" --username sally')
+        finally:
+            os.chdir(cls._root)
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(cls._root)
+
+    def setup_method(self, _):
+        self._svnlook = Transaction(self._repos_path, "1")
+        self._bindings = FSTransaction(self._repos_path, "1")
+
+    def teardown_method(self, _):
+        self._svnlook.cleanup()
+        self._bindings.cleanup()
+
+    def test_get_files(self):
+        assert self._bindings.get_files() == self._svnlook.get_files()
+        assert self._bindings.get_files([".*\.java"]) == {"src/Main/App.java": "A"}
+
+    def test_user_id(self):
+        assert self._bindings.user_id == self._svnlook.user_id == "sally"
+
+    def test_commit_msg(self):
+        assert self._bindings.commit_msg == self._svnlook.commit_msg
+
+    def test_get_file(self):
+        for filename in ("README", "src/Main/App.java"):
+            expected = open(self._svnlook.get_file(filename), "rb").read()
+            assert open(self._bindings.get_file(filename), "rb").read() == expected
+
+    def test_file_exists(self):
+        assert self._bindings.file_exists("src/Main/App.java")
+        assert not self._bindings.file_exists("src/Main/Missing.java")
+        assert not self._bindings.file_exists("readme", ignore_case=True)
+
+    def test_list_directory(self):
+        for path in ("", "src", "src/Main", "README"):
+            assert self._bindings._list_directory(path) == self._svnlook._list_directory(path)
+        assert self._bindings._list_directory("missing") is None
+
+    def test_tree(self):
+        assert sorted(self._bindings._get_tree()) == sorted(self._svnlook._get_tree())
+        assert self._bindings._get_tree("src/") == self._svnlook._get_tree("src/")
+
+    def test_properties(self):
+        assert self._bindings.list_properties("README") == ["svn:keywords"]
+        assert self._bindings.get_property("svn:keywords", "README") == "Date"
+        assert self._svnlook.get_property("svn:keywords", "README").strip() == "Date"
@@ -29,6 +29,12 @@ from repoguard.core import process
 from repoguard.core import transaction
 
 
+_PROPERTIES = {
+    "svn:ignore" : "*.pyc\n*.log\n", 
+    "svn:keywords" : "Date Revision", 
+    "svn:mime-type" : "text/plain"
+}
+
 class TestTransaction(object):
     
     def setup_method(self, _):
@@ -64,21 +70,58 @@ class TestTransaction(object):
             
     def test_get_file_not_cached(self):
         self._transaction.file_exists = mock.Mock(return_value=True)
+        self._transaction._cat = mock.Mock()
         transaction.os.makedirs = mock.Mock()
         not_cached_filepath = "/path/existing.java"
         patcher = mock.patch("repoguard.core.transaction.os.path.exists", create=True)
         exists_mock = patcher.start()
         try:
-            patcher_ = mock.patch("repoguard.core.transaction.open", create=True)
+            patcher_ = mock.patch.multiple(
+                "repoguard.core.transaction.os", fdopen=mock.DEFAULT, rename=mock.DEFAULT)
             patcher_.start()
+            mkstemp_patcher = mock.patch(
+                "repoguard.core.transaction.tempfile.mkstemp", return_value=(0, "part"))
+            mkstemp_patcher.start()
             try:
                 exists_mock.return_value = False
                 assert not_cached_filepath in self._transaction.get_file(not_cached_filepath)
             finally:
+                mkstemp_patcher.stop()
                 patcher_.stop()
         finally:
             patcher.stop()
 
+    def test_get_file_streamed(self):
+        self._transaction.file_exists = mock.Mock(return_value=True)
+        patcher = mock.patch("repoguard.core.transaction.process.stream")
+        stream = patcher.start()
+        try:
+            stream.side_effect = lambda command, file_object: file_object.write("content")
+            filename = self._transaction.get_file("test.txt")
+            assert open(filename, "rb").read() == "content"
+            assert "cat" in stream.call_args[0][0]
+            assert not self._transaction._execute_svn.called
+            assert not self._transaction.cache
+        finally:
+            patcher.stop()
+            self._transaction.cleanup()
+
+    def test_prefetch(self):
+        self._transaction.file_exists = mock.Mock(side_effect=lambda name: name != "missing.txt")
+        self._transaction._cat = mock.Mock(
+            side_effect=lambda name, file_object: file_object.write(name * 10))
+        try:
+            filenames = ["file%d.txt" % index for index in range(20)]
+            count, size = self._transaction.prefetch(filenames + filenames[:5] + ["missing.txt"], 4)
+            assert count == 20
+            assert size == sum(len(filename) * 10 for filename in filenames)
+            assert self._transaction._cat.call_count == 20
+            
+            self._transaction.get_file("file3.txt")
+            assert self._transaction._cat.call_count == 20
+        finally:
+            self._transaction.cleanup()
+
     def test_file_exists(self):
         assert self._transaction.file_exists("test 1.txt")
     
@@ -94,35 +137,114 @@ class TestTransaction(object):
         self._transaction._execute_svn.return_value = list()
         assert not self._transaction.file_exists("bla.txt", True)
 
+    def test_files_exist(self):
+        trees = {
+            "src/main" : ["src/main/", "src/main/A.java", "src/main/B.java"],
+            "src/test" : ["src/test/", "src/test/ATest.java"]
+        }
+        def execute_svn(command, arg="", split=False):
+            if command == "changed":
+                return ["A   src/test/BTest.java", "D   src/test/CTest.java", "A   new/"]
+            directory = arg.split('"')[1]
+            if not directory in trees:
+                raise process.ProcessException(command, 1, "")
+            return trees[directory]
+        self._transaction._execute_svn.side_effect = execute_svn
+        
+        filenames = [
+            "src/main/A.java", "src/main/C.java", "src/test/ATest.java", 
+            "src/test/BTest.java", "src/test/CTest.java", "src/test/DTest.java",
+            "new/ATest.java", "missing/ATest.java"
+        ]
+        assert self._transaction.files_exist(filenames) == {
+            "src/main/A.java" : True, "src/main/C.java" : False, 
+            "src/test/ATest.java" : True, "src/test/BTest.java" : True, 
+            "src/test/CTest.java" : False, "src/test/DTest.java" : False, 
+            "new/ATest.java" : False, "missing/ATest.java" : False
+        }
+        # Two queries for the changes and one listing per unaffected directory.
+        commands = [call[0][0] for call in self._transaction._execute_svn.call_args_list]
+        assert sorted(commands) == ["changed", "changed", "tree", "tree", "tree"]
+        
+        # Later queries are answered without calling svnlook.
+        for filename in filenames:
+            self._transaction.file_exists(filename)
+        assert self._transaction.files_exist(filenames[:2]) == {
+            "src/main/A.java" : True, "src/main/C.java" : False
+        }
+        assert self._transaction._execute_svn.call_count == 5
+
+    def test_file_exists_ignorecase_tree_listed_once(self):
+        self._transaction._execute_svn.return_value = [
+            "/", "Src/", "Src/Main.java", "src", "docs/", "docs/a.txt", "docs/A.TXT"
+        ]
+        # Directories clash with files and added files with each other.
+        assert self._transaction.file_exists("src/", True)
+        assert self._transaction.file_exists("SRC", True)
+        assert self._transaction.file_exists("docs/a.txt", True)
+        assert not self._transaction.file_exists("Src/Main.java", True)
+        assert not self._transaction.file_exists("docs", True)
+        assert self._transaction._execute_svn.call_count == 1
+
+    def _init_svnlook_outputs(self, changed, properties):
+        def execute_svn(command, arg="", split=False):
+            if command == "changed":
+                return changed
+            filename = arg.split('"')[1]
+            if not filename in properties:
+                raise process.ProcessException(command, 1, "")
+            if command == "proplist":
+                return sorted(properties[filename])
+            return properties[filename][arg.split()[0]]
+        self._transaction._execute_svn.side_effect = execute_svn
+        
+    def _property_calls(self):
+        return [call[0][1] for call in self._transaction._execute_svn.call_args_list 
+                if call[0][0] in ("proplist", "propget")]
+
     def test_has_property(self):
-        self._transaction.file_exists = mock.Mock(return_value=True)
-        self._transaction._execute_svn.return_value = ["svn:keywords"]
+        self._init_svnlook_outputs(["A   test 1.txt"], {"test 1.txt": _PROPERTIES})
         assert self._transaction.has_property("svn:keywords", "test 1.txt")
         
     def test_has_property_not(self):
-        self._transaction.file_exists = mock.Mock(return_value=True)
-        self._transaction._execute_svn.return_value = ["svn:keywords"]
+        self._init_svnlook_outputs(["A   test 1.txt"], {"test 1.txt": _PROPERTIES})
         assert not self._transaction.has_property("keywordx", "test 1.txt")
     
     def test_get_property(self):
-        self._transaction.has_property = mock.Mock(return_value=True)
-        self._transaction._execute_svn.return_value = "Date"
-        assert self._transaction.get_property("svn:keywords", "test 1.txt") == "Date"
+        self._init_svnlook_outputs(["A   test 1.txt"], {"test 1.txt": _PROPERTIES})
+        assert self._transaction.get_property("svn:keywords", "test 1.txt") == "Date Revision"
+        # Values are returned unchanged including trailing newlines.
+        assert self._transaction.get_property("svn:ignore", "test 1.txt") == "*.pyc\n*.log\n"
        
     def test_get_property_not(self):
-        self._transaction.has_property = mock.Mock(return_value=False)
+        self._init_svnlook_outputs(["A   test 1.txt"], {"test 1.txt": _PROPERTIES})
         pytest.raises(transaction.PropertyNotFoundException,  
             self._transaction.get_property, "keywordx", "test 1.txt")
 
     def test_list_properties(self):
-        self._transaction.file_exists = mock.Mock(return_value=True)
-        self._transaction._execute_svn.return_value = ["svn:keywords"]
-        assert self._transaction.list_properties("test 1.txt") == ["svn:keywords"]
+        self._init_svnlook_outputs(["A   test 1.txt"], {"test 1.txt": _PROPERTIES})
+        assert sorted(self._transaction.list_properties("test 1.txt")) == [
+            "svn:ignore", "svn:keywords", "svn:mime-type"]
     
     def test_list_properties_file_not_found(self):
-        self._transaction.file_exists = mock.Mock(return_value=False)
+        self._init_svnlook_outputs(["A   test 1.txt"], {"test 1.txt": _PROPERTIES})
         pytest.raises(transaction.FileNotFoundException, 
             self._transaction.list_properties, "nonexisting.java")
+        
+    def test_get_properties(self):
+        self._init_svnlook_outputs(["A   test 1.txt"], {"test 1.txt": _PROPERTIES})
+        assert self._transaction.get_properties("test 1.txt") == _PROPERTIES
+        
+    def test_properties_loaded_per_file(self):
+        self._init_svnlook_outputs(
+            ["A   a.txt", "U   b.txt", "A   dir/", "D   c.txt"], 
+            {"a.txt": _PROPERTIES, "b.txt": {}, "dir/": {}})
+        assert self._transaction.has_property("svn:keywords", "a.txt")
+        assert self._transaction.get_property("svn:keywords", "a.txt") == "Date Revision"
+        # Only the requested file is queried.
+        assert self._property_calls() == [
+            '"a.txt"', '"a.txt"', 'svn:keywords "a.txt"'
+        ]
 
     def test_revision(self):
         assert self._transaction.revision == "11"
@@ -23,6 +23,7 @@ import mock
             
 from repoguard.core.config import ProjectConfig
 from repoguard.core.module import Handler
+from repoguard.core.registry import PluginRegistry
 from repoguard.core.validator import ConfigValidator
 
 
@@ -121,6 +122,7 @@ class TestConfigValidator(object):
             check.load.return_value = Handler
             all_handler_checks.append(check)
         pkg_resources.iter_entry_points = mock.Mock(return_value=all_handler_checks)
+        PluginRegistry.reset()
 
     def test_validate_for_success(self):
         config = ProjectConfig(_SUCCESS_CONFIG, "hooks")
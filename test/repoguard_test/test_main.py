@@ -0,0 +1,76 @@
+# pylint: disable=W0212
+# W0212: Access to protected methods is ok in tests cases.
+#
+# Copyright 2008 German Aerospace Center (DLR)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Test methods for the fast dispatch of the hook commands.
+"""
+
+
+import os
+import subprocess
+import sys
+
+from repoguard import main
+from repoguard.core import constants
+from repoguard.tools.checker import Checker
+
+
+# Modules which must not be imported before a hook actually needs them.
+# pkg_resources is still imported by the namespace packages.
+_DEFERRED_MODULES = (
+    "validate", "multiprocessing", "sqlite3", "suds", "twisted", "pylint"
+)
+
+# Tools, checks and handlers that must not be imported by the dispatch.
+_PLUGIN_PACKAGES = ("repoguard.checks.", "repoguard.handlers.", "repoguard.tools.")
+
+_SCRIPT = """
+import sys
+from repoguard import main
+main._load_tool(main._HOOK_COMMANDS[sys.argv[1]])
+print " ".join(sorted(name for name, module in sys.modules.items() if module))
+"""
+
+
+def _start_hook(hook):
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(sys.path)
+    command = [sys.executable, "-c", _SCRIPT, hook]
+    return subprocess.check_output(command, env=environment).split()
+
+
+def test_load_tool():
+    for hook in constants.HOOKS:
+        tool = main._load_tool(main._HOOK_COMMANDS[hook])
+        assert isinstance(tool, Checker)
+        assert hook in tool.descriptors
+
+def test_deferred_imports():
+    for hook in constants.HOOKS:
+        modules = set(name.split(".")[0] for name in _start_hook(hook))
+        assert "repoguard" in modules
+        for name in _DEFERRED_MODULES:
+            assert not name in modules
+
+def test_no_plugins_imported():
+    for hook in constants.HOOKS:
+        plugins = [
+            name for name in _start_hook(hook) 
+                if name.startswith(_PLUGIN_PACKAGES)
+        ]
+        assert plugins == ["repoguard.tools.base", "repoguard.tools.checker"]